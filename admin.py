@@ -0,0 +1,95 @@
+# Endpoint HTTP local de métricas y administración del servidor de soporte
+#
+# Permite revisar y manejar el servidor sin usar su consola (por ejemplo si
+# corre en segundo plano o dentro de la interfaz):
+#
+#   GET  /metrics                   métricas en formato de texto de Prometheus
+#   GET  /admin/estado              resumen en JSON: clientes, salas y métricas
+#   GET  /admin/clientes            clientes conectados con su sala y cola
+#   POST /admin/expulsar?nickname=  desconecta a los clientes con ese nickname
+#   POST /admin/detener             detiene el servidor
+#
+# Escucha solo en localhost por defecto: no tiene autenticación.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from metricas import formato_prometheus
+
+TIPO_PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
+
+class ManejadorAdmin(BaseHTTPRequestHandler):
+    """Atiende las peticiones; self.server.soporte es el servidor de soporte"""
+    def do_GET(self):
+        ruta = urlparse(self.path).path
+        soporte = self.server.soporte
+        if ruta == '/metrics':
+            self._responder(200, formato_prometheus(soporte.metricas), TIPO_PROMETHEUS)
+        elif ruta == '/admin/estado':
+            self._responder_json(200, {
+                'servidor': f"{soporte.host}:{soporte.port}",
+                'activo': soporte.activo,
+                'clientes': len(soporte.clientes),
+                'salas': soporte.salas.conteos_totales(),
+                'metricas': soporte.metricas.instantanea(),
+            })
+        elif ruta == '/admin/clientes':
+            self._responder_json(200, soporte.resumen_clientes())
+        else:
+            self._responder_json(404, {'error': f"Ruta desconocida: {ruta}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        soporte = self.server.soporte
+        if url.path == '/admin/expulsar':
+            nickname = parse_qs(url.query).get('nickname', [''])[0]
+            if not nickname:
+                self._responder_json(400, {'error': "Falta el parámetro nickname"})
+                return
+            self._responder_json(200, {'expulsados': soporte.expulsar(nickname)})
+        elif url.path == '/admin/detener':
+            self._responder_json(200, {'deteniendo': True})
+            # En otro hilo: detener el servidor también cierra este endpoint
+            threading.Thread(target=soporte.detener_servidor, daemon=True).start()
+        else:
+            self._responder_json(404, {'error': f"Ruta desconocida: {url.path}"})
+
+    def _responder_json(self, codigo, datos):
+        self._responder(codigo, json.dumps(datos, ensure_ascii=False), 'application/json; charset=utf-8')
+
+    def _responder(self, codigo, texto, tipo):
+        cuerpo = texto.encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass  # Sin una línea por petición en la consola del servidor
+
+class ServidorAdmin:
+    """Servidor HTTP en un hilo aparte; funciona igual con ambos modos del servidor de soporte"""
+    def __init__(self, soporte, host='localhost', port=9100):
+        self.soporte = soporte
+        self.host = host
+        self.port = port
+        self.http = None
+
+    def iniciar(self):
+        try:
+            self.http = ThreadingHTTPServer((self.host, self.port), ManejadorAdmin)
+        except OSError as e:
+            print(f"No se pudo abrir el endpoint de administración: {e}")
+            return False
+        self.http.daemon_threads = True
+        self.http.soporte = self.soporte
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        print(f" Métricas y administración en http://{self.host}:{self.port}/metrics")
+        return True
+
+    def detener(self):
+        if self.http:
+            self.http.shutdown()
+            self.http.server_close()
@@ -0,0 +1,99 @@
+# Auditoría de planes de ejecución de las consultas de reportes
+# Uso: python auditoria_consultas.py [ganadero.db] [--permitir tabla1,tabla2]
+#
+# Ejecuta EXPLAIN QUERY PLAN sobre cada consulta de reportes.py y termina con
+# código 1 si alguna recorre una tabla completa: cualquier SCAN, también los
+# que van por un índice (SCAN ... USING [COVERING] INDEX), salvo los aceptados
+# abajo.
+
+import re
+import sys
+from database import Database
+from reportes import CONSULTAS_REPORTES
+
+# Tablas que se pueden recorrer completas sin problema: catálogos pequeños y
+# resúmenes cuyo tamaño depende de la cantidad de meses y tipos
+TABLAS_PERMITIDAS = {'veterinarios', 'produccion_mensual_tipo'}
+
+# Recorridos completos por índice aceptados, por (consulta, tabla, índice): el
+# reporte necesita todas las filas. Un SCAN de otra consulta, de otra tabla o
+# por otro índice (o sin índice) se reporta.
+RECORRIDOS_ACEPTADOS = {
+    # Ranking de producción: recorre los animales por su clave y busca el
+    # resumen mensual de cada uno por clave primaria
+    ('top_animales', 'animales', 'sqlite_autoindex_animales_1'),
+    # Conteo por tipo de todos los eventos, leído solo del índice (sin la tabla)
+    ('eventos_por_tipo', 'eventos_sanitarios', 'idx_eventos_tipo_medicamento'),
+    # Listado completo por flujo y paginado: el índice ya da el orden pedido
+    ('detalle_produccion', 'produccion', 'idx_produccion_animal_fecha'),
+}
+
+# SCAN tabla [AS alias] [USING [COVERING] INDEX índice]; SQLite < 3.36 escribe SCAN TABLE
+PATRON_SCAN = re.compile(r'SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?')
+
+def _alias_tablas(sql):
+    """Relaciona cada alias usado en la consulta con el nombre real de la tabla"""
+    alias = {}
+    patron = r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?'
+    for tabla, nombre in re.findall(patron, sql, re.IGNORECASE):
+        alias[tabla] = tabla
+        if nombre and nombre.upper() not in ('ON', 'JOIN', 'WHERE', 'GROUP', 'ORDER', 'LIMIT',
+                                              'LEFT', 'INNER', 'CROSS', 'USING'):
+            alias[nombre] = tabla
+    return alias
+
+def plan_consulta(conn, sql):
+    """Retorna las líneas de detalle de EXPLAIN QUERY PLAN"""
+    return [fila[3] for fila in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+
+def auditar(db, consultas=None, permitidas=TABLAS_PERMITIDAS, aceptados=RECORRIDOS_ACEPTADOS):
+    """Retorna {nombre: (plan, [tablas recorridas completas])} para cada consulta"""
+    consultas = consultas or CONSULTAS_REPORTES
+    conn = db.get_connection()
+    resultado = {}
+
+    for nombre, sql in consultas.items():
+        plan = plan_consulta(conn, sql)
+        alias = _alias_tablas(sql)
+        recorridos = []
+        for detalle in plan:
+            coincidencia = PATRON_SCAN.match(detalle.strip())
+            if not coincidencia:
+                continue
+            tabla = alias.get(coincidencia.group(1), coincidencia.group(1))
+            indice = coincidencia.group(2)
+            if tabla in permitidas or (nombre, tabla, indice) in aceptados:
+                continue
+            recorridos.append(f"{tabla} (índice {indice})" if indice else tabla)
+        resultado[nombre] = (plan, recorridos)
+
+    return resultado
+
+def main():
+    args = sys.argv[1:]
+    permitidas = set(TABLAS_PERMITIDAS)
+    if '--permitir' in args:
+        i = args.index('--permitir')
+        permitidas = {t.strip() for t in args[i + 1].split(',') if t.strip()}
+        del args[i:i + 2]
+
+    db = Database(args[0] if args else 'ganadero.db')
+    print(f"Versión del esquema: {db.version_esquema()}")
+    resultado = auditar(db, permitidas=permitidas)
+    db.cerrar()
+
+    fallos = 0
+    for nombre, (plan, recorridos) in resultado.items():
+        estado = "FALLA" if recorridos else "OK"
+        print(f"\n[{estado}] {nombre}")
+        for detalle in plan:
+            print(f"    {detalle}")
+        if recorridos:
+            fallos += 1
+            print(f"    -> Recorrido completo de: {', '.join(recorridos)}")
+
+    print(f"\n{len(resultado) - fallos}/{len(resultado)} consultas sin recorridos completos no aceptados")
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+# Prueba de carga del chat de soporte
+#
+# Levanta el servidor en un puerto local y lo ataca con N clientes simulados
+# (asyncio, repartidos en varios procesos) que envían mensajes a una tasa fija.
+# Mide la latencia de ida y vuelta del eco del mensaje y de la respuesta
+# automática, los mensajes por segundo, la memoria y los hilos del servidor.
+#
+# Uso: python benchmark_chat.py --modo ambos --clientes 200 --tasa 2 --duracion 10 --salida resultados.json
+
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import threading
+import time
+from datetime import datetime
+from protocolo import crear_saludo, empaquetar, leer_mensaje
+from servidor_soporte import crear_servidor
+
+TIEMPO_CONEXION = 10  # Segundos para conectarse y recibir la bienvenida
+
+def percentiles(valores):
+    """Resumen exacto de una lista de latencias en milisegundos"""
+    if not valores:
+        return {'muestras': 0, 'p50': None, 'p95': None, 'p99': None, 'maximo': None, 'promedio': None}
+    valores = sorted(valores)
+
+    def p(porcentaje):
+        return round(valores[min(len(valores) - 1, int(len(valores) * porcentaje / 100))], 3)
+
+    return {
+        'muestras': len(valores),
+        'p50': p(50),
+        'p95': p(95),
+        'p99': p(99),
+        'maximo': round(valores[-1], 3),
+        'promedio': round(sum(valores) / len(valores), 3),
+    }
+
+def memoria_mb():
+    """Memoria residente actual del proceso (Linux) o la máxima alcanzada en otros sistemas"""
+    try:
+        with open('/proc/self/status') as archivo:
+            for linea in archivo:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def simular_cliente(puerto, nickname, tasa, inicio, fin, resultado):
+    """Un cliente: envía a la tasa pedida y mide cuándo vuelven su eco y la respuesta"""
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection('localhost', puerto), TIEMPO_CONEXION)
+        writer.write(empaquetar(crear_saludo(nickname)))
+        if await asyncio.wait_for(leer_mensaje(reader), TIEMPO_CONEXION) is None:  # Bienvenida
+            raise ConnectionError("Conexión cerrada en el saludo")
+    except (OSError, asyncio.TimeoutError):
+        resultado['errores'] += 1
+        return
+
+    enviados = {}            # secuencia -> momento de envío (eco pendiente)
+    sin_respuesta = []       # momentos de envío que esperan la respuesta automática
+    marca = f" {nickname}: hola #"
+
+    async def leer():
+        while True:
+            mensaje = await leer_mensaje(reader)
+            if mensaje is None:
+                return
+            ahora = time.perf_counter()
+            resultado['recibidos'] += 1
+            if mensaje.startswith('[Sistema]'):
+                if sin_respuesta:
+                    resultado['respuesta'].append((ahora - sin_respuesta.pop(0)) * 1000)
+            elif marca in mensaje:
+                secuencia = int(mensaje.rsplit('#', 1)[1])
+                momento = enviados.pop(secuencia, None)
+                if momento is not None:
+                    resultado['eco'].append((ahora - momento) * 1000)
+
+    lectura = asyncio.create_task(leer())
+    await asyncio.sleep(max(0, inicio - time.time()))
+
+    intervalo = 1 / tasa
+    secuencia = 0
+    proximo = time.perf_counter()
+    try:
+        while time.time() < fin:
+            momento = time.perf_counter()
+            enviados[secuencia] = momento
+            sin_respuesta.append(momento)
+            writer.write(empaquetar(f"hola #{secuencia}"))
+            await writer.drain()
+            resultado['enviados'] += 1
+            secuencia += 1
+            proximo += intervalo
+            await asyncio.sleep(max(0, proximo - time.perf_counter()))
+        await asyncio.sleep(1)  # Margen para que lleguen los últimos ecos
+    except ConnectionError:
+        resultado['errores'] += 1
+    finally:
+        resultado['sin_eco'] += len(enviados)
+        lectura.cancel()
+        writer.close()
+
+def proceso_clientes(puerto, nicknames, tasa, inicio, fin, cola):
+    """Corre un grupo de clientes en un proceso y envía los resultados por la cola"""
+    resultado = {'enviados': 0, 'recibidos': 0, 'errores': 0, 'sin_eco': 0,
+                'eco': [], 'respuesta': []}
+
+    async def todos():
+        await asyncio.gather(*(simular_cliente(puerto, n, tasa, inicio, fin, resultado)
+                            for n in nicknames))
+
+    asyncio.run(todos())
+    cola.put(resultado)
+
+def medir_servidor(detener, muestras):
+    """Toma cada 200 ms la memoria y la cantidad de hilos del proceso del servidor"""
+    while not detener.is_set():
+        muestras.append((memoria_mb(), threading.active_count()))
+        detener.wait(0.2)
+
+def ejecutar_prueba(modo, clientes, tasa, duracion, procesos, puerto):
+    """Ejecuta una prueba completa contra un modo de servidor y retorna sus resultados"""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        # El servidor imprime cada mensaje; en la prueba eso solo mediría la consola
+        servidor = crear_servidor(modo, port=puerto, consola=False, responder_siempre=True)
+        if not servidor.iniciar_servidor():
+            raise RuntimeError(f"No se pudo iniciar el servidor en el puerto {puerto}")
+
+        memoria_inicial = memoria_mb()
+        muestras = []
+        detener = threading.Event()
+        muestreo = threading.Thread(target=medir_servidor, args=(detener, muestras), daemon=True)
+        muestreo.start()
+
+        # Se da tiempo a que todos se conecten antes de empezar a enviar
+        inicio = time.time() + 2 + clientes / 500
+        fin = inicio + duracion
+        # spawn y no fork: el proceso ya tiene hilos del servidor con locks tomados
+        contexto = multiprocessing.get_context('spawn')
+        cola = contexto.Queue()
+        grupos = [[f"cliente{i}" for i in range(p, clientes, procesos)] for p in range(procesos)]
+        trabajadores = [contexto.Process(target=proceso_clientes,
+                                        args=(puerto, grupo, tasa, inicio, fin, cola))
+                        for grupo in grupos if grupo]
+        for trabajador in trabajadores:
+            trabajador.start()
+
+        parciales = [cola.get() for _ in trabajadores]
+        for trabajador in trabajadores:
+            trabajador.join()
+
+        detener.set()
+        muestreo.join()
+        metricas_servidor = servidor.metricas.instantanea()
+        servidor.detener_servidor()
+
+    enviados = sum(r['enviados'] for r in parciales)
+    recibidos = sum(r['recibidos'] for r in parciales)
+    return {
+        'modo': modo,
+        'clientes': clientes,
+        'tasa_por_cliente': tasa,
+        'duracion_s': duracion,
+        'procesos_clientes': procesos,
+        'errores_conexion': sum(r['errores'] for r in parciales),
+        'mensajes_enviados': enviados,
+        'mensajes_recibidos': recibidos,
+        'ecos_perdidos': sum(r['sin_eco'] for r in parciales),
+        'enviados_por_segundo': round(enviados / duracion, 1),
+        'entregados_por_segundo': round(recibidos / duracion, 1),
+        'latencia_eco_ms': percentiles([v for r in parciales for v in r['eco']]),
+        'latencia_respuesta_ms': percentiles([v for r in parciales for v in r['respuesta']]),
+        'memoria_inicial_mb': round(memoria_inicial, 1),
+        'memoria_maxima_mb': round(max((m for m, _ in muestras), default=memoria_inicial), 1),
+        'hilos_maximo': max((h for _, h in muestras), default=threading.active_count()),
+        'metricas_servidor': metricas_servidor,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del chat de soporte")
+    parser.add_argument('--modo', choices=['hilos', 'async', 'ambos'], default='ambos')
+    parser.add_argument('--clientes', type=int, default=50)
+    parser.add_argument('--tasa', type=float, default=1.0, help="Mensajes por segundo de cada cliente")
+    parser.add_argument('--duracion', type=float, default=10.0, help="Segundos enviando")
+    parser.add_argument('--procesos', type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                        help="Procesos entre los que se reparten los clientes")
+    parser.add_argument('--puerto', type=int, default=5100)
+    parser.add_argument('--salida', help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    modos = ['hilos', 'async'] if args.modo == 'ambos' else [args.modo]
+    resultados = []
+    for i, modo in enumerate(modos):
+        print(f"Probando modo '{modo}' con {args.clientes} clientes a {args.tasa} msg/s durante {args.duracion} s...")
+        resultado = ejecutar_prueba(modo, args.clientes, args.tasa, args.duracion,
+                                    args.procesos, args.puerto + i)
+        resultados.append(resultado)
+        eco = resultado['latencia_eco_ms']
+        print(f"  enviados/s: {resultado['enviados_por_segundo']}  entregados/s: {resultado['entregados_por_segundo']}")
+        print(f"  eco p50/p95/p99: {eco['p50']} / {eco['p95']} / {eco['p99']} ms")
+        respuesta = resultado['latencia_respuesta_ms']
+        print(f"  respuesta p50/p95/p99: {respuesta['p50']} / {respuesta['p95']} / {respuesta['p99']} ms")
+        print(f"  memoria máx: {resultado['memoria_maxima_mb']} MB  hilos máx: {resultado['hilos_maximo']}"
+            f"  errores: {resultado['errores_conexion']}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sistema': platform.platform(),
+                'resultados': resultados,
+            }, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+if __name__ == "__main__":
+    main()
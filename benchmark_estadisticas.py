@@ -0,0 +1,65 @@
+# Benchmark de las estadísticas del hato
+#
+# Compara estadisticas_hato (columnas con array, fecha de referencia única)
+# contra el recorrido anterior: Animal.get_edad() por animal (cada llamada
+# toma date.today()) y listas por especie armadas en Python. Ambos ordenan y
+# resumen igual, así que se verifica que den exactamente el mismo resultado.
+# La carga de columnas desde objetos Animal se incluye en el tiempo; desde la
+# base de datos, SQLite entrega el año y el ordinal de la fecha ya calculados.
+#
+# Uso: python benchmark_estadisticas.py [--animales 10000 100000 1000000]
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from estadisticas_hato import LIMITES_EDAD, LIMITES_PESO, _resumen, estadisticas_hato
+from modelos.animal import Animal
+
+ESPECIES = ('bovino', 'porcino', 'ovino', 'caprino', 'equino')
+
+def generar_hato(cantidad, rnd):
+    """Animales de hasta 15 años; uno de cada 50 sin fecha de nacimiento"""
+    hoy = date.today()
+    return [Animal(f"A{i}", rnd.choice(ESPECIES), round(rnd.uniform(20, 900), 1),
+                None if i % 50 == 0 else hoy - timedelta(days=rnd.randint(0, 15 * 365)))
+            for i in range(cantidad)]
+
+def estadisticas_por_objeto(animales):
+    """El método anterior: get_edad() (una date.today() por animal) y listas por especie"""
+    por_especie = {}
+    for animal in animales:
+        datos = por_especie.setdefault(animal.especie, ([], [], []))
+        datos[2].append(animal)
+        if animal.fecha_nac:
+            datos[0].append(animal.get_edad())
+        if animal.peso is not None:
+            datos[1].append(animal.peso)
+    return {especie: {'cantidad': len(de_especie),
+                      'edad': _resumen(sorted(edades), LIMITES_EDAD, 'años'),
+                      'peso': _resumen(sorted(pesos), LIMITES_PESO, 'kg')}
+            for especie, (edades, pesos, de_especie) in sorted(por_especie.items())}
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las estadísticas del hato")
+    parser.add_argument('--animales', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+    print(f"{'animales':>9} {'por objeto ms':>14} {'columnas ms':>12} {'mejora':>7}")
+    for cantidad in args.animales:
+        animales = generar_hato(cantidad, rnd)
+        objeto_ms, esperado = medir(estadisticas_por_objeto, animales)
+        columnas_ms, resultado = medir(estadisticas_hato, animales)
+        if resultado['por_especie'] != esperado:
+            raise SystemExit(f"Los resultados no coinciden con {cantidad} animales")
+        print(f"{cantidad:>9} {objeto_ms:>14.1f} {columnas_ms:>12.1f} {objeto_ms / columnas_ms:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
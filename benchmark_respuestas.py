@@ -0,0 +1,71 @@
+# Micro-benchmark del motor de respuestas automáticas
+#
+# Compara MotorRespuestas (una regex compilada, una pasada por mensaje) contra
+# el método anterior (minúsculas y un any(palabra in mensaje) por regla) con
+# cantidades crecientes de reglas generadas al azar. Verifica además que ambos
+# elijan la misma regla.
+#
+# Uso: python benchmark_respuestas.py [--reglas 10 100 500] [--mensajes 5000]
+
+import argparse
+import random
+import string
+import time
+from respuestas import MotorRespuestas, ReglaRespuesta, normalizar
+
+def palabra_al_azar(rnd, minimo=4, maximo=10):
+    return ''.join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(minimo, maximo)))
+
+def generar_reglas(cantidad, rnd, palabras_por_regla=4):
+    return [ReglaRespuesta([palabra_al_azar(rnd) for _ in range(palabras_por_regla)], f"Respuesta {i}")
+            for i in range(cantidad)]
+
+def generar_mensajes(reglas, cantidad, rnd, con_palabra=0.5):
+    """Mensajes de 8 a 20 palabras; la mitad contiene alguna palabra clave"""
+    mensajes = []
+    for _ in range(cantidad):
+        palabras = [palabra_al_azar(rnd, 2, 8) for _ in range(rnd.randint(8, 20))]
+        if rnd.random() < con_palabra:
+            palabras.insert(rnd.randrange(len(palabras)), rnd.choice(rnd.choice(reglas).palabras).upper())
+        mensajes.append(' '.join(palabras))
+    return mensajes
+
+def buscar_regla_lineal(reglas, mensaje):
+    """El método anterior: una búsqueda de subcadena por palabra y por regla"""
+    mensaje_lower = normalizar(mensaje)
+    for regla in reglas:
+        if any(palabra in mensaje_lower for palabra in regla.palabras):
+            return regla
+    return None
+
+def medir(funcion, mensajes):
+    inicio = time.perf_counter()
+    resultados = [funcion(m) for m in mensajes]
+    return (time.perf_counter() - inicio) / len(mensajes) * 1e6, resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark del motor de respuestas")
+    parser.add_argument('--reglas', type=int, nargs='+', default=[6, 50, 200, 500, 1000])
+    parser.add_argument('--mensajes', type=int, default=5000)
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+    print(f"{'reglas':>7} {'compilar ms':>12} {'motor µs/msg':>13} {'lineal µs/msg':>14} {'mejora':>7}")
+    for cantidad in args.reglas:
+        reglas = generar_reglas(cantidad, rnd)
+        mensajes = generar_mensajes(reglas, args.mensajes, rnd)
+
+        inicio = time.perf_counter()
+        motor = MotorRespuestas(reglas)
+        compilar_ms = (time.perf_counter() - inicio) * 1000
+
+        motor_us, elegidas = medir(motor.buscar_regla, mensajes)
+        lineal_us, esperadas = medir(lambda m: buscar_regla_lineal(reglas, m), mensajes)
+        if any(a is not b for a, b in zip(elegidas, esperadas)):
+            raise SystemExit(f"El motor eligió una regla distinta con {cantidad} reglas")
+
+        print(f"{cantidad:>7} {compilar_ms:>12.1f} {motor_us:>13.2f} {lineal_us:>14.2f} {lineal_us / motor_us:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Carga masiva de datos desde archivos CSV o JSONL
+# Uso: python cargador.py <animales|eventos|produccion> <archivo.csv|archivo.jsonl> [ganadero.db]
+
+import csv
+import json
+import sys
+from database import Database, TAMANO_LOTE
+
+def leer_csv(ruta):
+    """Genera una fila (dict) por línea del CSV; la primera línea son los encabezados"""
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        for fila in csv.DictReader(archivo):
+            yield fila
+
+def leer_jsonl(ruta, errores_lectura=None):
+    """Genera un dict por cada línea JSON no vacía.
+
+    Las líneas que no son JSON válido se saltan y se agregan a errores_lectura
+    como (número de línea, texto, mensaje), para que la carga siga.
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        for numero, linea in enumerate(archivo, 1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                fila = json.loads(linea)
+            except json.JSONDecodeError as e:
+                if errores_lectura is None:
+                    raise
+                errores_lectura.append((numero, linea, f"JSON inválido: {e}"))
+                continue
+            yield fila
+
+def leer_archivo(ruta, errores_lectura=None):
+    """Elige el lector según la extensión del archivo"""
+    if ruta.lower().endswith(('.jsonl', '.ndjson')):
+        return leer_jsonl(ruta, errores_lectura)
+    return leer_csv(ruta)
+
+def cargar(db, tipo, ruta, tamano_lote=TAMANO_LOTE):
+    """Carga el archivo en la tabla indicada y retorna el reporte de la carga.
+
+    Además de 'insertados' y 'errores' (por fila), el reporte trae
+    'errores_lectura': las líneas que no se pudieron leer, por número de línea.
+    """
+    metodos = {
+        'animales': db.agregar_animales_bulk,
+        'eventos': db.registrar_eventos_bulk,
+        'produccion': db.registrar_produccion_bulk,
+    }
+    if tipo not in metodos:
+        raise ValueError(f"Tipo no válido: {tipo}. Use animales, eventos o produccion")
+    errores_lectura = []
+    reporte = metodos[tipo](leer_archivo(ruta, errores_lectura), tamano_lote)
+    reporte['errores_lectura'] = errores_lectura
+    return reporte
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python cargador.py <animales|eventos|produccion> <archivo> [base_de_datos]")
+        return 1
+
+    tipo, ruta = sys.argv[1], sys.argv[2]
+    db = Database(sys.argv[3] if len(sys.argv) > 3 else 'ganadero.db')
+
+    try:
+        reporte = cargar(db, tipo, ruta)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        db.cerrar()
+
+    print(f"Registros insertados: {reporte['insertados']}")
+    print(f"Registros con error: {len(reporte['errores'])}")
+    for indice, fila, mensaje in reporte['errores'][:20]:
+        print(f"  - Fila {indice + 1}: {mensaje} ({fila})")
+    if len(reporte['errores']) > 20:
+        print(f"  ... y {len(reporte['errores']) - 20} más")
+    if reporte['errores_lectura']:
+        print(f"Líneas que no se pudieron leer: {len(reporte['errores_lectura'])}")
+        for numero, linea, mensaje in reporte['errores_lectura'][:20]:
+            print(f"  - Línea {numero}: {mensaje} ({linea})")
+        if len(reporte['errores_lectura']) > 20:
+            print(f"  ... y {len(reporte['errores_lectura']) - 20} más")
+    return 0 if not reporte['errores'] and not reporte['errores_lectura'] else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# Conexión de cliente al chat de soporte que se recupera sola
+#
+# Un hilo de E/S espera con select() sobre el socket y sobre un par de sockets
+# internos que sirven para despertarlo. Los mensajes a enviar se guardan en
+# una cola: si hay conexión se envían enseguida; si no, esperan y se envían
+# todos juntos en un solo envío al reconectar (después del saludo).
+#
+# El socket no bloquea: lo pendiente se escribe a medida que select() lo
+# marca como listo para escribir, y mientras tanto se sigue leyendo. Así un
+# servidor que deja de leer (contrapresión) no traba al cliente mientras le
+# envía mensajes que el propio cliente no lee.
+#
+# Si la conexión se cae durante un envío, ese lote vuelve a la cola: un
+# mensaje puede llegar dos veces, pero no se pierde.
+
+import random
+import select
+import socket
+import threading
+from collections import deque
+from protocolo import ErrorProtocolo, LectorMensajes, crear_saludo, empaquetar, empaquetar_varios
+
+# Estados que se informan con al_estado
+CONECTADO = 'conectado'
+RECONECTANDO = 'reconectando'
+DESCONECTADO = 'desconectado'
+
+class ClienteReconectable:
+    """Cliente del chat con reconexión automática (espera exponencial) y cola de salida"""
+    def __init__(self, host, port, nickname, al_recibir, al_estado=None,
+                espera_inicial=0.5, espera_maxima=30, tamano_buffer=1000, tiempo_conexion=5):
+        self.host = host
+        self.port = port
+        self.nickname = nickname
+        self.al_recibir = al_recibir    # Se llama desde el hilo de E/S con cada mensaje
+        self.al_estado = al_estado      # Se llama desde el hilo de E/S con CONECTADO/RECONECTANDO/...
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.tiempo_conexion = tiempo_conexion
+        self.salida = deque(maxlen=tamano_buffer)  # Sin conexión se descartan los más viejos
+        self.en_linea = False
+        self.activo = False
+        self.reconexiones = 0
+        self._primera_conexion = threading.Event()
+        self._detenido = threading.Event()
+        self._despertar_lectura, self._despertar_escritura = socket.socketpair()
+        self._despertar_lectura.setblocking(False)
+        self._despertar_escritura.setblocking(False)
+        self._hilo = None
+
+    def iniciar(self, esperar=None):
+        """Arranca el hilo de E/S; con esperar=segundos retorna si logró conectarse en ese plazo"""
+        self.activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+        if esperar is not None:
+            return self._primera_conexion.wait(esperar)
+        return True
+
+    def enviar(self, mensaje):
+        """Encola un mensaje; se envía ahora o al reconectar. Retorna False si ya se detuvo"""
+        if not self.activo:
+            return False
+        empaquetar(mensaje)  # Valida el largo aquí y no en el hilo de E/S
+        self.salida.append(mensaje)
+        self._despertar()
+        return True
+
+    def detener(self, despedida='salir'):
+        """Cierra la sesión; intenta avisar al servidor antes de cortar"""
+        if not self.activo:
+            return
+        if despedida and self.en_linea:
+            self.salida.append(despedida)
+        self.activo = False
+        self._detenido.set()
+        self._despertar()
+        if self._hilo and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout=2)
+
+    def _despertar(self):
+        try:
+            self._despertar_escritura.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Ya hay un aviso pendiente
+
+    def _tomar_salida(self):
+        # popleft es atómico: lo que otro hilo encole mientras tanto no se pierde
+        lote = []
+        while self.salida:
+            lote.append(self.salida.popleft())
+        return lote
+
+    def _informar(self, estado):
+        if self.al_estado:
+            self.al_estado(estado)
+
+    def _conectar(self):
+        """Abre el socket; retorna también el saludo junto con todo lo que quedó pendiente"""
+        sock = socket.create_connection((self.host, self.port), timeout=self.tiempo_conexion)
+        sock.setblocking(False)
+        lote = self._tomar_salida()
+        return sock, empaquetar(crear_saludo(self.nickname)) + empaquetar_varios(lote), lote
+
+    def _bucle(self):
+        espera = self.espera_inicial
+        while self.activo:
+            try:
+                sock, datos, lote = self._conectar()
+            except OSError:
+                # Espera exponencial con variación para no reconectar todos a la vez
+                self._detenido.wait(espera * random.uniform(0.5, 1.0))
+                espera = min(self.espera_maxima, espera * 2)
+                continue
+
+            espera = self.espera_inicial
+            self.en_linea = True
+            if self._primera_conexion.is_set():
+                self.reconexiones += 1
+            self._primera_conexion.set()
+            self._informar(CONECTADO)
+
+            self._atender(sock, datos, lote)
+
+            self.en_linea = False
+            sock.close()
+            if self.activo:
+                self._informar(RECONECTANDO)
+        self._informar(DESCONECTADO)
+        self._despertar_lectura.close()
+        self._despertar_escritura.close()
+
+    def _atender(self, sock, datos, lote):
+        """Recibe y envía hasta que la conexión se corte o se detenga el cliente.
+
+        datos son los bytes por enviar y lote los mensajes que contienen; si la
+        conexión se corta antes de enviarlos completos, el lote vuelve a la cola.
+        """
+        lector = LectorMensajes()
+        enviados = 0
+        try:
+            while True:
+                if enviados == len(datos) and self.salida:
+                    lote = self._tomar_salida()
+                    datos, enviados = empaquetar_varios(lote), 0
+                if not self.activo:
+                    # Último intento de enviar lo pendiente (la despedida) sin esperar de más
+                    sock.settimeout(1)
+                    sock.sendall(datos[enviados:])
+                    enviados = len(datos)
+                    return
+
+                escribir = [sock] if enviados < len(datos) else []
+                listos, para_escribir, _ = select.select([sock, self._despertar_lectura], escribir, [])
+                if self._despertar_lectura in listos:
+                    try:
+                        while self._despertar_lectura.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                if para_escribir:
+                    try:
+                        enviados += sock.send(memoryview(datos)[enviados:])
+                    except BlockingIOError:
+                        pass
+                if sock in listos:
+                    try:
+                        recibidos = sock.recv(65536)
+                    except BlockingIOError:
+                        continue
+                    if not recibidos:
+                        return
+                    for mensaje in lector.alimentar(recibidos):
+                        self.al_recibir(mensaje)
+        except (OSError, ErrorProtocolo, UnicodeDecodeError):
+            return
+        finally:
+            if enviados < len(datos):
+                self.salida.extendleft(reversed(lote))
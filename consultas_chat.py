@@ -0,0 +1,159 @@
+# Respuestas del chat con datos reales de ganadero.db
+#
+# Los hilos del chat nunca consultan SQLite: leen resultados ya calculados en
+# memoria. Cada consulta se guarda con su propia clave (el total de animales,
+# la producción de un mes, los eventos de un animal) y su propio tiempo de
+# vida. Un hilo de fondo (con su propia conexión) calcula solo las claves que
+# alguien pidió y que faltan o tienen más de ttl segundos; así una ráfaga de
+# preguntas iguales de muchos clientes cuesta una sola consulta.
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from metricas import Histograma
+from respuestas import normalizar
+
+CONSULTA_ANIMALES_POR_ESPECIE = '''
+    SELECT especie, COUNT(*) FROM animales GROUP BY especie ORDER BY especie
+'''
+
+CONSULTA_PRODUCCION_MES = '''
+    SELECT tipo, total, registros FROM produccion_mensual_tipo WHERE mes = ? ORDER BY tipo
+'''
+
+# Usa la clave primaria de animales y el índice (animal_id, fecha) de eventos
+CONSULTA_EVENTOS_ANIMAL = '''
+    SELECT (SELECT COUNT(*) FROM animales WHERE id = ?), COUNT(*), MAX(fecha)
+    FROM eventos_sanitarios WHERE animal_id = ?
+'''
+
+# Se busca en el mensaje original para conservar el ID tal como se escribió
+PATRON_ANIMAL = re.compile(r'animal\s+(?:id\s+)?#?\s*([\w-]+)', re.IGNORECASE)
+
+CLAVES_EN_MEMORIA = 1000   # Máximo de resultados guardados (los IDs los escribe el usuario)
+
+MENSAJE_CARGANDO = "Estoy cargando los datos del sistema, vuelve a preguntar en unos segundos."
+
+class DatosChat:
+    """Resultados de la base de datos para el chat, en caché por clave con tiempo de vida"""
+    def __init__(self, db, ttl=30):
+        self.db = db
+        self.ttl = ttl
+        self.consultas = 0         # Consultas hechas (para métricas y pruebas)
+        self.duracion = Histograma('db_datos_chat_ms', "Tiempo de recalcular en la base los datos del chat")
+        self._cache = OrderedDict()       # clave -> (momento, valor), del menos al más usado
+        self._pendientes = OrderedDict()  # Claves pedidas que el hilo de fondo aún no calcula
+        self._lock = threading.Lock()
+        self._pedido = threading.Event()
+        self._activo = True
+        # Lo que pregunta casi todo el mundo se calcula apenas arranca
+        self.obtener(('animales',))
+        self.obtener(('produccion', date.today().strftime('%Y-%m')))
+        self._hilo = threading.Thread(target=self._actualizar_en_fondo, daemon=True)
+        self._hilo.start()
+
+    def obtener(self, clave):
+        """Retorna el valor guardado de la clave (o None si aún no hay); nunca espera a la base de datos"""
+        with self._lock:
+            entrada = self._cache.get(clave)
+            if entrada is not None:
+                self._cache.move_to_end(clave)
+            if entrada is None or time.monotonic() - entrada[0] > self.ttl:
+                # Mientras se recalcula se sigue respondiendo con el valor anterior
+                self._pendientes[clave] = None
+                self._pedido.set()
+        return None if entrada is None else entrada[1]
+
+    def _actualizar_en_fondo(self):
+        while self._activo:
+            self._pedido.wait()
+            with self._lock:
+                claves = list(self._pendientes)
+                self._pendientes.clear()
+                self._pedido.clear()
+            for clave in claves:
+                if not self._activo:
+                    break
+                try:
+                    inicio = time.perf_counter()
+                    valor = self._calcular(clave)
+                    self.duracion.observar((time.perf_counter() - inicio) * 1000)
+                    self.consultas += 1
+                except Exception as e:
+                    print(f"Error actualizando datos del chat: {e}")
+                    continue
+                with self._lock:
+                    self._cache[clave] = (time.monotonic(), valor)
+                    self._cache.move_to_end(clave)
+                    while len(self._cache) > CLAVES_EN_MEMORIA:
+                        self._cache.popitem(last=False)
+
+    def _calcular(self, clave):
+        conexion = self.db.get_connection()
+        if clave[0] == 'animales':
+            return conexion.execute(CONSULTA_ANIMALES_POR_ESPECIE).fetchall()
+        if clave[0] == 'produccion':
+            return {normalizar(tipo): (tipo, total, registros)
+                    for tipo, total, registros in conexion.execute(CONSULTA_PRODUCCION_MES, (clave[1],))}
+        if clave[0] == 'eventos':
+            existe, cantidad, ultima = conexion.execute(CONSULTA_EVENTOS_ANIMAL, (clave[1], clave[1])).fetchone()
+            return (bool(existe), cantidad, ultima)
+        raise ValueError(f"Clave de datos del chat desconocida: {clave!r}")
+
+    def detener(self):
+        self._activo = False
+        self._pedido.set()
+
+def responder_total_animales(datos_chat, mensaje):
+    por_especie = datos_chat.obtener(('animales',))
+    if por_especie is None:
+        return MENSAJE_CARGANDO
+    total = sum(cantidad for _, cantidad in por_especie)
+    if total == 0:
+        return "Aún no hay animales registrados."
+    detalle = ', '.join(f"{cantidad} {especie}" for especie, cantidad in por_especie)
+    return f"Hay {total} animales registrados ({detalle})."
+
+def responder_produccion_mes(datos_chat, mensaje):
+    mes = date.today().strftime('%Y-%m')
+    produccion = datos_chat.obtener(('produccion', mes))
+    if produccion is None:
+        return MENSAJE_CARGANDO
+    texto = normalizar(mensaje)
+    pedidos = [clave for clave in produccion if clave in texto] or list(produccion)
+    if not produccion or not pedidos:
+        return f"No hay producción registrada en {mes}."
+    partes = [f"{produccion[c][0]}: {produccion[c][1]:g} ({produccion[c][2]} registros)" for c in pedidos]
+    return f"Producción de {mes}: " + '; '.join(partes) + "."
+
+def responder_eventos_animal(datos_chat, mensaje):
+    coincidencia = PATRON_ANIMAL.search(mensaje)
+    if not coincidencia:
+        return "Indica el ID del animal, por ejemplo: eventos del animal A001."
+    animal_id = coincidencia.group(1)
+    eventos = datos_chat.obtener(('eventos', animal_id))
+    if eventos is None:
+        return f"Estoy buscando el animal {animal_id}, vuelve a preguntar en unos segundos."
+    existe, cantidad, ultima = eventos
+    if not existe:
+        return f"No encontré el animal {animal_id}."
+    if cantidad == 0:
+        return f"El animal {animal_id} no tiene eventos sanitarios registrados."
+    return f"El animal {animal_id} tiene {cantidad} eventos sanitarios; el último fue el {ultima}."
+
+# Nombre usado en el campo "consulta" de respuestas.json -> función que arma la respuesta
+RESPUESTAS_CON_DATOS = {
+    'total_animales': responder_total_animales,
+    'produccion_mes': responder_produccion_mes,
+    'eventos_animal': responder_eventos_animal,
+}
+
+def crear_consultas(datos_chat):
+    """Adapta las respuestas con datos al formato que espera MotorRespuestas"""
+    def envolver(funcion):
+        def consultar(mensaje):
+            return funcion(datos_chat, mensaje)
+        return consultar
+    return {nombre: envolver(funcion) for nombre, funcion in RESPUESTAS_CON_DATOS.items()}
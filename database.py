@@ -1,113 +1,553 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+# Pragmas por defecto para las conexiones del pool
+PRAGMAS_POR_DEFECTO = {
+    'journal_mode': 'WAL',      # Lectores concurrentes con un escritor
+    'synchronous': 'NORMAL',    # Con WAL es seguro y evita un fsync por commit
+    'cache_size': -20000,       # Negativo = KiB (aprox. 20 MB de caché)
+    'temp_store': 'MEMORY',
+}
+
+# Tablas de resumen de producción mantenidas por triggers sobre la tabla produccion.
+# Cada entrada: (tabla, columnas de agrupación, expresión de cada columna a partir de la fila)
+ROLLUPS_PRODUCCION = [
+    ('produccion_diaria', ('animal_id', 'tipo', 'fecha'), ('{f}.animal_id', '{f}.tipo', '{f}.fecha')),
+    ('produccion_mensual', ('animal_id', 'tipo', 'mes'), ('{f}.animal_id', '{f}.tipo', 'substr({f}.fecha, 1, 7)')),
+    ('produccion_mensual_tipo', ('tipo', 'mes'), ('{f}.tipo', 'substr({f}.fecha, 1, 7)')),
+]
+
+def _sql_crear_rollup(tabla, claves):
+    columnas = ', '.join(f'{c} TEXT NOT NULL' for c in claves)
+    return f'''
+        CREATE TABLE IF NOT EXISTS {tabla} (
+            {columnas},
+            total REAL NOT NULL,
+            registros INTEGER NOT NULL,
+            PRIMARY KEY ({', '.join(claves)})
+        ) WITHOUT ROWID
+    '''
+
+def _sql_sumar(tabla, claves, expresiones, fila, signo):
+    # Suma (o resta) la fila NEW/OLD en la tabla de resumen
+    valores = ', '.join(e.format(f=fila) for e in expresiones)
+    if signo > 0:
+        return f'''
+            INSERT INTO {tabla} ({', '.join(claves)}, total, registros)
+            VALUES ({valores}, {fila}.cantidad, 1)
+            ON CONFLICT ({', '.join(claves)})
+            DO UPDATE SET total = total + excluded.total, registros = registros + 1;
+        '''
+    condicion = ' AND '.join(f'{c} = {e.format(f=fila)}' for c, e in zip(claves, expresiones))
+    return f'''
+            UPDATE {tabla} SET total = total - {fila}.cantidad, registros = registros - 1
+            WHERE {condicion};
+            DELETE FROM {tabla} WHERE {condicion} AND registros <= 0;
+        '''
+
+def _sql_triggers_rollup():
+    insertar = ''.join(_sql_sumar(t, c, e, 'NEW', 1) for t, c, e in ROLLUPS_PRODUCCION)
+    borrar = ''.join(_sql_sumar(t, c, e, 'OLD', -1) for t, c, e in ROLLUPS_PRODUCCION)
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS trg_produccion_insert AFTER INSERT ON produccion BEGIN {insertar} END',
+        f'CREATE TRIGGER IF NOT EXISTS trg_produccion_delete AFTER DELETE ON produccion BEGIN {borrar} END',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_produccion_update
+            AFTER UPDATE OF animal_id, tipo, cantidad, fecha ON produccion BEGIN {borrar} {insertar} END''',
+    ]
+
+def _sql_reconstruir_rollups():
+    sentencias = []
+    for tabla, claves, expresiones in ROLLUPS_PRODUCCION:
+        seleccion = ', '.join(e.format(f='p') for e in expresiones)
+        sentencias.append(f'DELETE FROM {tabla}')
+        sentencias.append(f'''
+            INSERT INTO {tabla} ({', '.join(claves)}, total, registros)
+            SELECT {seleccion}, SUM(p.cantidad), COUNT(*)
+            FROM produccion p
+            GROUP BY {seleccion}
+        ''')
+    return sentencias
+
+# Migraciones versionadas del esquema (se aplican en orden según PRAGMA user_version)
+MIGRACIONES = [
+    (1, "Índices secundarios para los reportes", [
+        'CREATE INDEX IF NOT EXISTS idx_produccion_animal_fecha ON produccion (animal_id, fecha, cantidad)',
+        'CREATE INDEX IF NOT EXISTS idx_produccion_tipo_fecha ON produccion (tipo, fecha, cantidad)',
+        'CREATE INDEX IF NOT EXISTS idx_eventos_veterinario ON eventos_sanitarios (veterinario_id)',
+        'CREATE INDEX IF NOT EXISTS idx_eventos_tipo_medicamento ON eventos_sanitarios (tipo, medicamento)',
+        'CREATE INDEX IF NOT EXISTS idx_eventos_animal_fecha ON eventos_sanitarios (animal_id, fecha)',
+    ]),
+    (2, "Tablas de resumen diario y mensual de producción",
+        [_sql_crear_rollup(t, c) for t, c, _ in ROLLUPS_PRODUCCION]
+        + ['CREATE INDEX IF NOT EXISTS idx_produccion_mensual_mes ON produccion_mensual (mes)']
+        + _sql_triggers_rollup()
+        + _sql_reconstruir_rollups()),
+    (3, "Índices para ordenar y paginar la lista de animales", [
+        'CREATE INDEX IF NOT EXISTS idx_animales_especie ON animales (especie, id)',
+        'CREATE INDEX IF NOT EXISTS idx_animales_peso ON animales (peso, id)',
+        'CREATE INDEX IF NOT EXISTS idx_animales_fecha_nac ON animales (fecha_nac, id)',
+    ]),
+    (4, "Transcripción del chat de soporte", [
+        '''CREATE TABLE IF NOT EXISTS mensajes_chat (
+            id INTEGER PRIMARY KEY,
+            momento TEXT NOT NULL,
+            nickname TEXT NOT NULL,
+            texto TEXT NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_mensajes_chat_nickname_momento ON mensajes_chat (nickname, momento)',
+    ]),
+    (5, "Sala de cada mensaje del chat", [
+        "ALTER TABLE mensajes_chat ADD COLUMN sala TEXT NOT NULL DEFAULT 'general'",
+        'CREATE INDEX IF NOT EXISTS idx_mensajes_chat_sala ON mensajes_chat (sala, id)',
+    ]),
+]
+
+# Columnas por las que se puede ordenar la lista paginada de animales
+COLUMNAS_ORDEN_ANIMALES = ('id', 'especie', 'peso', 'fecha_nac')
+
+# Contadores del tablero en un solo viaje a la base de datos
+CONSULTA_RESUMEN = '''
+    SELECT
+        (SELECT COUNT(*) FROM animales),
+        (SELECT COUNT(*) FROM veterinarios),
+        (SELECT COUNT(*) FROM eventos_sanitarios),
+        (SELECT SUM(registros) FROM produccion_mensual_tipo),
+        (SELECT SUM(total) FROM produccion_mensual_tipo)
+'''
+
+# Tamaño de lote por defecto para las cargas masivas
+TAMANO_LOTE = 5000
+
+def _lotes(filas, tamano):
+    # Agrupa un iterable (o generador) en listas de tamaño fijo sin materializarlo completo
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _validar_fecha(valor):
+    # Acepta date/datetime o texto AAAA-MM-DD y retorna el texto normalizado
+    if hasattr(valor, 'strftime'):
+        return valor.strftime('%Y-%m-%d')
+    texto = str(valor).strip()
+    datetime.strptime(texto, '%Y-%m-%d')
+    return texto
+
+def _campos(fila, columnas):
+    # Convierte un dict, una tupla o un objeto del modelo en una tupla ordenada por columnas
+    if isinstance(fila, dict):
+        return tuple(fila.get(c) for c in columnas)
+    if isinstance(fila, (tuple, list)):
+        if len(fila) < len(columnas):
+            faltantes = len(columnas) - len(fila)
+            fila = tuple(fila) + (None,) * faltantes
+        return tuple(fila[:len(columnas)])
+    return tuple(getattr(fila, c, None) for c in columnas)
+
+def _requerido(valor, nombre):
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        raise ValueError(f"Campo requerido vacío: {nombre}")
+    return valor.strip() if isinstance(valor, str) else valor
+
+def _normalizar_animal(fila):
+    id, especie, peso, fecha_nac = _campos(fila, ('id', 'especie', 'peso', 'fecha_nac'))
+    return (str(_requerido(id, 'id')), _requerido(especie, 'especie'),
+            float(_requerido(peso, 'peso')), _validar_fecha(_requerido(fecha_nac, 'fecha_nac')))
+
+def _normalizar_evento(fila):
+    animal_id, tipo, fecha, medicamento, veterinario_id = _campos(
+        fila, ('animal_id', 'tipo', 'fecha', 'medicamento', 'veterinario_id'))
+    if veterinario_id in ('', None):
+        veterinario_id = None
+    else:
+        veterinario_id = int(veterinario_id)
+    return (str(_requerido(animal_id, 'animal_id')), _requerido(tipo, 'tipo'),
+            _validar_fecha(_requerido(fecha, 'fecha')), _requerido(medicamento, 'medicamento'),
+            veterinario_id)
+
+def _normalizar_produccion(fila):
+    animal_id, tipo, cantidad, fecha = _campos(fila, ('animal_id', 'tipo', 'cantidad', 'fecha'))
+    return (str(_requerido(animal_id, 'animal_id')), _requerido(tipo, 'tipo'),
+            float(_requerido(cantidad, 'cantidad')), _validar_fecha(_requerido(fecha, 'fecha')))
+
+class PoolConexiones:
+    """Mantiene una conexión SQLite de larga duración por hilo"""
+    def __init__(self, db_name, pragmas=None, timeout=30):
+        self.db_name = db_name
+        self.pragmas = dict(PRAGMAS_POR_DEFECTO)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._conexiones = []
+        self._lock = threading.Lock()
+
+    def _crear_conexion(self):
+        # isolation_level=None: las transacciones se abren explícitamente en transaccion()
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, isolation_level=None)
+        for nombre, valor in self.pragmas.items():
+            if valor is not None:
+                conn.execute(f'PRAGMA {nombre} = {valor}')
+        return conn
+
+    def obtener(self):
+        """Retorna la conexión del hilo actual, creándola si no existe"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._crear_conexion()
+            self._local.conn = conn
+            self._local.profundidad = 0
+            with self._lock:
+                self._conexiones.append(conn)
+        return conn
+
+    @contextmanager
+    def transaccion(self):
+        """Abre una transacción; las transacciones anidadas se unen a la externa"""
+        conn = self.obtener()
+        if self._local.profundidad > 0:
+            self._local.profundidad += 1
+            try:
+                yield conn
+            finally:
+                self._local.profundidad -= 1
+            return
+
+        conn.execute('BEGIN')
+        self._local.profundidad = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self._local.profundidad = 0
+
+    def cerrar_del_hilo(self):
+        """Cierra la conexión del hilo actual (para hilos que terminan antes que el pool)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._conexiones:
+                self._conexiones.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def cerrar(self):
+        """Cierra todas las conexiones abiertas por el pool"""
+        with self._lock:
+            conexiones, self._conexiones = self._conexiones, []
+        for conn in conexiones:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
 class Database:
-    def __init__(self, db_name='ganadero.db'):
+    def __init__(self, db_name='ganadero.db', pragmas=None):
         self.db_name = db_name
+        self.pool = PoolConexiones(db_name, pragmas)
+        self._resumen = None                  # Caché de contadores del tablero
+        self._lock_resumen = threading.Lock()
+        self._generacion_resumen = 0          # Sube con cada invalidación
         self.init_db()
-    
+
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
-    
+        """Retorna la conexión compartida del hilo actual (no se debe cerrar)"""
+        return self.pool.obtener()
+
+    def cerrar_conexion_del_hilo(self):
+        """Cierra la conexión del hilo actual; la próxima consulta del hilo abre otra"""
+        self.pool.cerrar_del_hilo()
+
+    @contextmanager
+    def transaccion(self):
+        """Context manager: confirma al salir o revierte si ocurre un error"""
+        with self.pool.transaccion() as conn:
+            yield conn
+        # Toda escritura pasa por aquí, así que invalida los contadores en caché
+        self.invalidar_resumen()
+
+    def obtener_resumen(self):
+        """Retorna los contadores del tablero; se calculan en una sola consulta y se cachean"""
+        with self._lock_resumen:
+            if self._resumen is not None:
+                return dict(self._resumen)
+            generacion = self._generacion_resumen
+
+        fila = self.get_connection().execute(CONSULTA_RESUMEN).fetchone()
+        resumen = {
+            'animales': fila[0],
+            'veterinarios': fila[1],
+            'eventos': fila[2],
+            'produccion': fila[3] or 0,
+            'produccion_total': fila[4] or 0.0,
+        }
+        with self._lock_resumen:
+            # Si hubo una escritura durante la consulta el resultado puede estar
+            # viejo: se retorna pero no se guarda
+            if self._generacion_resumen == generacion:
+                self._resumen = resumen
+        return dict(resumen)
+
+    def invalidar_resumen(self):
+        """Descarta los contadores en caché; la próxima lectura los recalcula"""
+        with self._lock_resumen:
+            self._resumen = None
+            self._generacion_resumen += 1
+
+    def cerrar(self):
+        """Cierra las conexiones del pool"""
+        self.pool.cerrar()
+
+    def _insertar_bulk(self, sql, filas, normalizar, tamano_lote):
+        """Inserta filas con executemany, un commit por lote y reporte de errores por fila"""
+        reporte = {'insertados': 0, 'errores': []}
+        indice = 0
+
+        for lote in _lotes(filas, tamano_lote):
+            validas = []
+            for fila in lote:
+                try:
+                    validas.append((indice, normalizar(fila)))
+                except (ValueError, TypeError) as e:
+                    reporte['errores'].append((indice, fila, str(e)))
+                indice += 1
+
+            if not validas:
+                continue
+
+            with self.transaccion() as conn:
+                conn.execute('SAVEPOINT lote')
+                try:
+                    conn.executemany(sql, [valores for _, valores in validas])
+                    conn.execute('RELEASE lote')
+                    reporte['insertados'] += len(validas)
+                except sqlite3.IntegrityError:
+                    # Algún registro del lote falló: se repite fila por fila para aislarlo
+                    conn.execute('ROLLBACK TO lote')
+                    conn.execute('RELEASE lote')
+                    for i, valores in validas:
+                        try:
+                            conn.execute(sql, valores)
+                            reporte['insertados'] += 1
+                        except sqlite3.IntegrityError as e:
+                            reporte['errores'].append((i, valores, str(e)))
+
+        return reporte
+
     def init_db(self):
+        with self.transaccion() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS animales (
+                    id TEXT PRIMARY KEY,
+                    especie TEXT NOT NULL,
+                    peso REAL NOT NULL,
+                    fecha_nac DATE NOT NULL
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS veterinarios (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nombre TEXT NOT NULL,
+                    especialidad TEXT NOT NULL
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS eventos_sanitarios (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    animal_id TEXT NOT NULL,
+                    tipo TEXT NOT NULL,
+                    fecha DATE NOT NULL,
+                    medicamento TEXT NOT NULL,
+                    veterinario_id INTEGER,
+                    FOREIGN KEY (animal_id) REFERENCES animales (id)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS produccion (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    animal_id TEXT NOT NULL,
+                    tipo TEXT NOT NULL,
+                    cantidad REAL NOT NULL,
+                    fecha DATE NOT NULL,
+                    FOREIGN KEY (animal_id) REFERENCES animales (id)
+                )
+            ''')
+
+        self.migrar()
+
+    def version_esquema(self):
+        """Retorna la versión del esquema guardada en la base de datos"""
+        return self.get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+    def migrar(self):
+        """Aplica las migraciones pendientes, cada una en su propia transacción"""
+        for version, descripcion, sentencias in MIGRACIONES:
+            if version <= self.version_esquema():
+                continue
+            with self.transaccion() as conn:
+                for sentencia in sentencias:
+                    conn.execute(sentencia)
+                conn.execute(f'PRAGMA user_version = {version}')
+            # Actualiza las estadísticas para que el planificador elija los índices nuevos
+            self.get_connection().execute('PRAGMA optimize')
+
+    def reconstruir_rollups(self):
+        """Recalcula desde cero las tablas de resumen de producción"""
+        with self.transaccion() as conn:
+            for sentencia in _sql_reconstruir_rollups():
+                conn.execute(sentencia)
+
+    def verificar_rollups(self, tolerancia=1e-6):
+        """Compara las tablas de resumen con la tabla produccion; retorna las diferencias"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS animales (
-                id TEXT PRIMARY KEY,
-                especie TEXT NOT NULL,
-                peso REAL NOT NULL,
-                fecha_nac DATE NOT NULL
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS veterinarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                especialidad TEXT NOT NULL
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS eventos_sanitarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                animal_id TEXT NOT NULL,
-                tipo TEXT NOT NULL,
-                fecha DATE NOT NULL,
-                medicamento TEXT NOT NULL,
-                veterinario_id INTEGER,
-                FOREIGN KEY (animal_id) REFERENCES animales (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS produccion (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                animal_id TEXT NOT NULL,
-                tipo TEXT NOT NULL,
-                cantidad REAL NOT NULL,
-                fecha DATE NOT NULL,
-                FOREIGN KEY (animal_id) REFERENCES animales (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
+        diferencias = []
+        for tabla, claves, expresiones in ROLLUPS_PRODUCCION:
+            seleccion = ', '.join(e.format(f='p') for e in expresiones)
+            union = ' AND '.join(f'r.{c} = c.{c}' for c in claves)
+            alias = ', '.join(f'{e.format(f="p")} AS {c}' for c, e in zip(claves, expresiones))
+            filas = conn.execute(f'''
+                WITH calculado AS (
+                    SELECT {alias}, SUM(p.cantidad) AS total, COUNT(*) AS registros
+                    FROM produccion p
+                    GROUP BY {seleccion}
+                )
+                SELECT {', '.join('c.' + c for c in claves)}, c.total, r.total, c.registros, r.registros
+                FROM calculado c LEFT JOIN {tabla} r ON {union}
+                WHERE r.registros IS NULL OR r.registros != c.registros
+                    OR abs(r.total - c.total) > ?
+                UNION ALL
+                SELECT {', '.join('r.' + c for c in claves)}, NULL, r.total, 0, r.registros
+                FROM {tabla} r
+                WHERE NOT EXISTS (SELECT 1 FROM calculado c WHERE {union})
+            ''', (tolerancia,)).fetchall()
+            diferencias.extend((tabla,) + tuple(fila) for fila in filas)
+        return diferencias
+
     # CRUD Animales
     def agregar_animal(self, animal):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO animales VALUES (?, ?, ?, ?)', 
-                    (animal.id, animal.especie, animal.peso, animal.fecha_nac))
-        conn.commit()
-        conn.close()
-    
+        with self.transaccion() as conn:
+            conn.execute('INSERT INTO animales VALUES (?, ?, ?, ?)',
+                        (animal.id, animal.especie, animal.peso, animal.fecha_nac))
+
+    def agregar_animales_bulk(self, animales, tamano_lote=TAMANO_LOTE):
+        """Inserta animales (objetos, dicts o tuplas) desde cualquier iterable"""
+        return self._insertar_bulk('INSERT INTO animales VALUES (?, ?, ?, ?)',
+                                animales, _normalizar_animal, tamano_lote)
+
     def obtener_animales(self):
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM animales ORDER BY id')
-        animales = cursor.fetchall()
-        conn.close()
-        return animales
-    
+        return conn.execute('SELECT * FROM animales ORDER BY id').fetchall()
+
+    def obtener_animales_pagina(self, despues_de=None, limite=100, orden='id', descendente=False):
+        """Retorna una página de animales con paginación por clave (keyset).
+
+        despues_de es la última fila de la página anterior; la consulta continúa
+        desde ahí usando el índice (orden, id), sin OFFSET.
+        """
+        if orden not in COLUMNAS_ORDEN_ANIMALES:
+            raise ValueError(f"Columna de orden no válida: {orden}")
+
+        direccion = 'DESC' if descendente else 'ASC'
+        comparacion = '<' if descendente else '>'
+        indice = COLUMNAS_ORDEN_ANIMALES.index(orden)
+
+        if orden == 'id':
+            claves, orden_sql = 'id', f'id {direccion}'
+            valores = () if despues_de is None else (despues_de[0],)
+        else:
+            claves, orden_sql = f'({orden}, id)', f'{orden} {direccion}, id {direccion}'
+            valores = () if despues_de is None else (despues_de[indice], despues_de[0])
+
+        condicion = f'WHERE {claves} {comparacion} ({", ".join("?" * len(valores))})' if valores else ''
+        conn = self.get_connection()
+        return conn.execute(f'''
+            SELECT id, especie, peso, fecha_nac FROM animales
+            {condicion}
+            ORDER BY {orden_sql}
+            LIMIT ?
+        ''', valores + (limite,)).fetchall()
+
     # CRUD Veterinarios
     def agregar_veterinario(self, veterinario):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO veterinarios (nombre, especialidad) VALUES (?, ?)', 
-                    (veterinario.nombre, veterinario.especialidad))
-        conn.commit()
-        conn.close()
-    
+        with self.transaccion() as conn:
+            conn.execute('INSERT INTO veterinarios (nombre, especialidad) VALUES (?, ?)',
+                        (veterinario.nombre, veterinario.especialidad))
+
     def obtener_veterinarios(self):
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM veterinarios ORDER BY nombre')
-        veterinarios = cursor.fetchall()
-        conn.close()
-        return veterinarios
-    
+        return conn.execute('SELECT * FROM veterinarios ORDER BY nombre').fetchall()
+
     # CRUD Eventos
     def registrar_evento(self, animal_id, evento):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO eventos_sanitarios (animal_id, tipo, fecha, medicamento) 
-            VALUES (?, ?, ?, ?)
-        ''', (animal_id, evento.tipo, evento.fecha, evento.medicamento))
-        conn.commit()
-        conn.close()
-    
+        with self.transaccion() as conn:
+            conn.execute('''
+                INSERT INTO eventos_sanitarios (animal_id, tipo, fecha, medicamento)
+                VALUES (?, ?, ?, ?)
+            ''', (animal_id, evento.tipo, evento.fecha, evento.medicamento))
+
+    def registrar_eventos_bulk(self, eventos, tamano_lote=TAMANO_LOTE):
+        """Inserta eventos sanitarios (dicts o tuplas con animal_id) desde cualquier iterable"""
+        return self._insertar_bulk('''
+            INSERT INTO eventos_sanitarios (animal_id, tipo, fecha, medicamento, veterinario_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', eventos, _normalizar_evento, tamano_lote)
+
     # CRUD Producción
     def registrar_produccion(self, animal_id, produccion):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO produccion (animal_id, tipo, cantidad, fecha) 
+        with self.transaccion() as conn:
+            conn.execute('''
+                INSERT INTO produccion (animal_id, tipo, cantidad, fecha)
+                VALUES (?, ?, ?, ?)
+            ''', (animal_id, produccion.tipo, produccion.cantidad, produccion.fecha))
+
+    def registrar_produccion_bulk(self, registros, tamano_lote=TAMANO_LOTE):
+        """Inserta registros de producción (dicts o tuplas con animal_id) desde cualquier iterable"""
+        return self._insertar_bulk('''
+            INSERT INTO produccion (animal_id, tipo, cantidad, fecha)
             VALUES (?, ?, ?, ?)
-        ''', (animal_id, produccion.tipo, produccion.cantidad, produccion.fecha))
-        conn.commit()
-        conn.close()
\ No newline at end of file
+        ''', registros, _normalizar_produccion, tamano_lote)
+
+    # Transcripción del chat
+    def guardar_mensajes_chat(self, mensajes):
+        """Agrega un lote de (momento, nickname, texto, sala) en una sola transacción"""
+        with self.pool.transaccion() as conn:  # No cambia los contadores del tablero
+            conn.executemany('''
+                INSERT INTO mensajes_chat (momento, nickname, texto, sala) VALUES (?, ?, ?, ?)
+            ''', mensajes)
+
+    def ultimos_mensajes_chat(self, limite=50, sala='general'):
+        """Retorna los últimos mensajes (momento, nickname, texto) de una sala en orden cronológico"""
+        filas = self.get_connection().execute('''
+            SELECT momento, nickname, texto FROM mensajes_chat
+            WHERE sala = ? ORDER BY id DESC LIMIT ?
+        ''', (sala, limite)).fetchall()
+        filas.reverse()
+        return filas
+
+    def mensajes_chat_de(self, nickname, desde=None, limite=100):
+        """Mensajes de un usuario, opcionalmente desde un momento (texto ISO)"""
+        return self.get_connection().execute('''
+            SELECT momento, nickname, texto FROM mensajes_chat
+            WHERE nickname = ? AND momento >= ?
+            ORDER BY momento LIMIT ?
+        ''', (nickname, desde or '', limite)).fetchall()
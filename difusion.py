@@ -0,0 +1,181 @@
+# Difusión de mensajes con una cola de salida acotada por cliente
+#
+# Quien difunde solo encola (nunca escribe en sockets ajenos); un escritor por
+# cliente vacía su cola y junta los mensajes pendientes en una sola escritura.
+# Así un cliente lento no frena la entrega al resto.
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+TAMANO_COLA = 1000   # Mensajes pendientes por cliente antes de aplicar la política
+LOTE_MAXIMO = 64     # Mensajes que se juntan como máximo en una escritura
+
+# Políticas ante un cliente cuya cola se llena
+DESCONECTAR = 'desconectar'            # Se desconecta al cliente lento
+DESCARTAR_ANTIGUOS = 'descartar'       # Se descarta el mensaje más viejo de su cola
+
+def registrar_metricas_difusion(metricas, obtener_colas):
+    """Crea las métricas comunes de difusión; obtener_colas retorna las colas activas"""
+    metricas.indicador('cola_salida_profundidad_max',
+                    lambda: max((c.profundidad() for c in obtener_colas()), default=0),
+                    "Mayor cantidad de mensajes pendientes en una cola de cliente")
+    metricas.indicador('cola_salida_profundidad_total',
+                    lambda: sum(c.profundidad() for c in obtener_colas()),
+                    "Mensajes pendientes sumando todas las colas")
+    return {
+        'latencia': metricas.histograma('difusion_latencia_ms',
+                                        "Tiempo desde que se encola un mensaje hasta que se escribe"),
+        'descartados': metricas.contador('mensajes_descartados_total',
+                                        "Mensajes descartados por colas llenas"),
+        'lentos': metricas.contador('clientes_lentos_desconectados_total',
+                                    "Clientes desconectados por no leer a tiempo"),
+        'bytes': metricas.contador('bytes_enviados_total', "Bytes escritos a los clientes"),
+        'escrituras': metricas.contador('escrituras_total', "Escrituras (lotes) hacia los clientes"),
+        'enviados': metricas.tasa('mensajes_enviados_por_segundo',
+                                "Mensajes escritos a los clientes por segundo (últimos 10 s)"),
+    }
+
+class ColaSalida:
+    """Cola acotada con un hilo escritor para un socket bloqueante"""
+    def __init__(self, conexion, metricas, al_desbordar=None, tamano=TAMANO_COLA,
+                politica=DESCONECTAR):
+        self.conexion = conexion
+        self.metricas = metricas
+        self.al_desbordar = al_desbordar   # Se llama (sin bloquear) si el cliente es lento
+        self.tamano = tamano
+        self.politica = politica
+        self.pendientes = deque()
+        self.condicion = threading.Condition()
+        self.activa = True
+        self.hilo = threading.Thread(target=self._escribir, daemon=True)
+        self.hilo.start()
+
+    def profundidad(self):
+        return len(self.pendientes)
+
+    def encolar(self, trama, momento=None):
+        """Agrega una trama ya empaquetada; retorna False si la cola está llena"""
+        with self.condicion:
+            if not self.activa:
+                return False
+            if len(self.pendientes) >= self.tamano:
+                if self.politica == DESCARTAR_ANTIGUOS:
+                    self.pendientes.popleft()
+                    self.metricas['descartados'].incrementar()
+                else:
+                    self.activa = False
+                    self.condicion.notify()
+                    return self._desbordar()
+            self.pendientes.append((trama, momento or time.perf_counter()))
+            self.condicion.notify()
+        return True
+
+    def _desbordar(self):
+        self.metricas['lentos'].incrementar()
+        if self.al_desbordar:
+            # En otro hilo: quien difunde no debe esperar el cierre del socket
+            threading.Thread(target=self.al_desbordar, daemon=True).start()
+        return False
+
+    def _escribir(self):
+        while True:
+            with self.condicion:
+                while self.activa and not self.pendientes:
+                    self.condicion.wait()
+                if not self.activa and not self.pendientes:
+                    return
+                lote = [self.pendientes.popleft()
+                        for _ in range(min(LOTE_MAXIMO, len(self.pendientes)))]
+            datos = b''.join(trama for trama, _ in lote)
+            try:
+                self.conexion.enviar_bytes(datos)
+            except OSError:
+                self.cerrar()
+                return
+            ahora = time.perf_counter()
+            for _, momento in lote:
+                self.metricas['latencia'].observar((ahora - momento) * 1000)
+            self.metricas['bytes'].incrementar(len(datos))
+            self.metricas['escrituras'].incrementar()
+            self.metricas['enviados'].marcar(len(lote))
+
+    def cerrar(self):
+        """Detiene el escritor; lo que quedó pendiente se descarta"""
+        with self.condicion:
+            self.activa = False
+            self.pendientes.clear()
+            self.condicion.notify()
+
+class ColaSalidaAsync:
+    """Cola acotada con una tarea escritora para un StreamWriter de asyncio"""
+    def __init__(self, writer, metricas, al_desbordar=None, tamano=TAMANO_COLA,
+                politica=DESCONECTAR):
+        self.writer = writer
+        self.metricas = metricas
+        self.al_desbordar = al_desbordar
+        self.tamano = tamano
+        self.politica = politica
+        self.pendientes = deque()
+        self.hay_datos = asyncio.Event()
+        self.hay_espacio = asyncio.Event()
+        self.hay_espacio.set()
+        self.activa = True
+        self.tarea = asyncio.get_running_loop().create_task(self._escribir())
+
+    def profundidad(self):
+        return len(self.pendientes)
+
+    def encolar(self, trama, momento=None):
+        if not self.activa:
+            return False
+        if len(self.pendientes) >= self.tamano:
+            if self.politica == DESCARTAR_ANTIGUOS:
+                self.pendientes.popleft()
+                self.metricas['descartados'].incrementar()
+            else:
+                self.activa = False
+                self.metricas['lentos'].incrementar()
+                if self.al_desbordar:
+                    asyncio.get_running_loop().call_soon(self.al_desbordar)
+                return False
+        self.pendientes.append((trama, momento or time.perf_counter()))
+        self.hay_datos.set()
+        if len(self.pendientes) >= self.tamano // 2:
+            self.hay_espacio.clear()
+        return True
+
+    async def esperar_espacio(self):
+        """Contrapresión para quien escribe: espera a que la cola propia baje a la mitad"""
+        while self.activa and not self.hay_espacio.is_set():
+            await self.hay_espacio.wait()
+
+    async def _escribir(self):
+        try:
+            while self.activa or self.pendientes:
+                if not self.pendientes:
+                    self.hay_datos.clear()
+                    await self.hay_datos.wait()
+                    continue
+                lote = [self.pendientes.popleft()
+                        for _ in range(min(LOTE_MAXIMO, len(self.pendientes)))]
+                if len(self.pendientes) < self.tamano // 2:
+                    self.hay_espacio.set()
+                datos = b''.join(trama for trama, _ in lote)
+                self.writer.write(datos)
+                await self.writer.drain()
+                ahora = time.perf_counter()
+                for _, momento in lote:
+                    self.metricas['latencia'].observar((ahora - momento) * 1000)
+                self.metricas['bytes'].incrementar(len(datos))
+                self.metricas['escrituras'].incrementar()
+                self.metricas['enviados'].marcar(len(lote))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    def cerrar(self):
+        self.activa = False
+        self.pendientes.clear()
+        self.hay_espacio.set()
+        self.tarea.cancel()  # Puede estar esperando drain() de un cliente que ya no lee
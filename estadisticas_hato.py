@@ -0,0 +1,182 @@
+# Estadísticas de edad y peso de todo el hato, calculadas por columnas
+#
+# En lugar de llamar a Animal.get_edad() por cada animal (una date.today() y
+# varias comparaciones en Python por animal), los datos se pasan una vez a
+# arreglos (array) y las operaciones se aplican a la columna completa con
+# map() y funciones de operator, que corren en C. La fecha de referencia se
+# toma una sola vez. No usa NumPy para no agregar dependencias.
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import date
+from itertools import chain, filterfalse, repeat
+from math import isnan
+from operator import attrgetter, gt, sub
+
+SIN_EDAD = -2 ** 31   # Edad de un animal sin fecha de nacimiento (el mínimo de array('i'))
+
+# Límites (años y kg) de los grupos; el último grupo no tiene tope
+LIMITES_EDAD = (1, 3, 6, 10)
+LIMITES_PESO = (100, 200, 300, 400, 500, 600, 800)
+
+CONSULTA_HATO = '''
+    SELECT especie, peso,
+        CAST(substr(fecha_nac, 1, 4) AS INTEGER),
+        CAST(julianday(fecha_nac) - 1721424.5 AS INTEGER)
+    FROM animales
+'''
+
+class ColumnasHato:
+    """Especie, peso y fecha de nacimiento de cada animal en arreglos paralelos"""
+    def __init__(self):
+        self.especies = []              # Código -> nombre de la especie
+        self.especie = array('I')       # Código de especie de cada animal
+        self.peso = array('d')          # kg (NaN si no tiene)
+        self.anio = array('i')          # Año de nacimiento (0 si no tiene fecha)
+        self.fecha = array('i')         # date.toordinal() del nacimiento (0 si no tiene)
+
+    def __len__(self):
+        return len(self.especie)
+
+    def _codigos(self, especies):
+        codigos = {nombre: i for i, nombre in enumerate(self.especies)}
+        for nombre in set(especies) - codigos.keys():
+            codigos[nombre] = len(self.especies)
+            self.especies.append(nombre)
+        return array('I', map(codigos.__getitem__, especies))
+
+    @classmethod
+    def desde_animales(cls, animales):
+        """Desde objetos Animal (la lista de SistemaGanadero o el resultado de una Consulta)"""
+        columnas = cls()
+        animales = list(animales)
+        columnas.especie = columnas._codigos(list(map(attrgetter('especie'), animales)))
+        columnas.peso = _columna_peso(list(map(attrgetter('peso'), animales)))
+        fechas = list(map(attrgetter('fecha_nac'), animales))
+        sin_fecha = [i for i, fecha in enumerate(fechas) if fecha is None] if None in fechas else []
+        for i in sin_fecha:
+            fechas[i] = date.min
+        columnas.anio = array('i', map(attrgetter('year'), fechas))
+        columnas.fecha = array('i', map(date.toordinal, fechas))
+        for i in sin_fecha:
+            columnas.anio[i] = columnas.fecha[i] = 0
+        return columnas
+
+    @classmethod
+    def desde_db(cls, db):
+        """Desde la tabla animales; SQLite entrega el año y el ordinal de la fecha"""
+        columnas = cls()
+        filas = db.get_connection().execute(CONSULTA_HATO).fetchall()
+        columnas.especie = columnas._codigos([fila[0] for fila in filas])
+        columnas.peso = _columna_peso([fila[1] for fila in filas])
+        columnas.anio = array('i', (fila[2] or 0 for fila in filas))
+        columnas.fecha = array('i', (fila[3] or 0 for fila in filas))
+        return columnas
+
+def _columna_peso(pesos):
+    # NaN en lugar de None: array('d') no acepta None
+    if None in pesos:
+        return array('d', (float('nan') if peso is None else peso for peso in pesos))
+    return array('d', pesos)
+
+def columnas_hato(origen):
+    """Columnas desde un Database, un SistemaGanadero o cualquier iterable de Animal"""
+    if isinstance(origen, ColumnasHato):
+        return origen
+    if hasattr(origen, 'get_connection'):
+        return ColumnasHato.desde_db(origen)
+    return ColumnasHato.desde_animales(getattr(origen, 'animales', origen))
+
+def _ordinal_cumpleanios(anio, hoy):
+    # Ordinal del día y mes de hoy en ese año (el 29/2 pasa al 28/2 si el año no es bisiesto)
+    if not anio:
+        return 0
+    try:
+        return date(anio, hoy.month, hoy.day).toordinal()
+    except ValueError:
+        return date(anio, 3, 1).toordinal() - 1
+
+def calcular_edades(columnas, hoy=None):
+    """Edad en años cumplidos de cada animal (SIN_EDAD si no tiene fecha), a la misma fecha"""
+    hoy = hoy or date.today()
+    n = len(columnas)
+    # edad = año actual - año de nacimiento - (1 si nació después del día y mes de hoy).
+    # La fecha de corte se calcula una vez por año de nacimiento distinto, no por animal.
+    corte = {anio: _ordinal_cumpleanios(anio, hoy) for anio in set(columnas.anio)}
+    anios = map(sub, repeat(hoy.year, n), columnas.anio)
+    sin_cumplir = map(gt, columnas.fecha, map(corte.__getitem__, columnas.anio))
+    edades = array('i', map(sub, anios, sin_cumplir))
+    if 0 in columnas.anio:
+        for i in (i for i, anio in enumerate(columnas.anio) if not anio):
+            edades[i] = SIN_EDAD
+    return edades
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) de una lista ya ordenada, por el rango más cercano"""
+    if not ordenados:
+        return None
+    posicion = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[posicion]
+
+def _distribucion(ordenados, limites, unidad):
+    """Cantidad de valores en cada grupo; con la lista ordenada basta una búsqueda por límite"""
+    # Cada grupo incluye su límite inferior y no el superior: '1-3 años' es 1 o 2
+    cortes = [0] + [bisect_left(ordenados, limite) for limite in limites] + [len(ordenados)]
+    etiquetas = [f"{a}-{b} {unidad}" for a, b in zip((0,) + tuple(limites), limites)]
+    etiquetas.append(f"{limites[-1]}+ {unidad}")
+    return {etiqueta: fin - inicio for etiqueta, inicio, fin in zip(etiquetas, cortes, cortes[1:])}
+
+def _resumen(ordenados, limites, unidad):
+    """Cantidad, promedio, mínimo, percentiles, máximo y grupos de una lista ordenada"""
+    if not ordenados:
+        return {'cantidad': 0}
+    return {
+        'cantidad': len(ordenados),
+        'promedio': sum(ordenados) / len(ordenados),
+        'minimo': ordenados[0],
+        'p50': percentil(ordenados, 50),
+        'p90': percentil(ordenados, 90),
+        'p99': percentil(ordenados, 99),
+        'maximo': ordenados[-1],
+        'grupos': _distribucion(ordenados, limites, unidad),
+    }
+
+def estadisticas_hato(origen, hoy=None):
+    """Edad y peso por especie: promedio, percentiles y cantidad por grupo.
+
+    origen puede ser un Database, un SistemaGanadero, un iterable de Animal o
+    un ColumnasHato ya armado.
+    """
+    hoy = hoy or date.today()
+    columnas = columnas_hato(origen)
+    edades = calcular_edades(columnas, hoy)
+
+    # Una sola pasada reparte edades y pesos en listas por código de especie,
+    # en lugar de recorrer las columnas completas una vez por especie
+    edades_de = [[] for _ in columnas.especies]
+    pesos_de = [[] for _ in columnas.especies]
+    agregar_edad = [lista.append for lista in edades_de]
+    agregar_peso = [lista.append for lista in pesos_de]
+    for codigo, edad, peso in zip(columnas.especie, edades, columnas.peso):
+        agregar_edad[codigo](edad)
+        agregar_peso[codigo](peso)
+
+    por_especie = {}
+    for codigo, especie in enumerate(columnas.especies):
+        # Las edades son pocos valores enteros: se cuentan y la lista ordenada
+        # se arma repitiendo cada una, sin ordenar
+        conteo = Counter(edades_de[codigo])
+        conteo.pop(SIN_EDAD, None)
+        edades_especie = list(chain.from_iterable(repeat(edad, conteo[edad]) for edad in sorted(conteo)))
+        pesos_especie = sorted(filterfalse(isnan, pesos_de[codigo]))
+        por_especie[especie] = {
+            'cantidad': len(edades_de[codigo]),
+            'edad': _resumen(edades_especie, LIMITES_EDAD, 'años'),
+            'peso': _resumen(pesos_especie, LIMITES_PESO, 'kg'),
+        }
+    return {
+        'fecha_referencia': hoy.isoformat(),
+        'animales': len(columnas),
+        'por_especie': dict(sorted(por_especie.items())),
+    }
@@ -1,274 +1,210 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import sqlite3
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 from datetime import datetime
 import threading
 import socket
+import queue
 import time
 import pygame
 from laberinto import ejecutar_juego_laberinto
+from database import Database
+from reportes import GeneradorReportesSimple, VisorPaginado, escribir_reporte, lineas_reporte_general
+from trabajador import TrabajadorFondo, MonitorBloqueos
+from servidor_soporte import crear_servidor
+from respuestas import MotorRespuestas
+from consultas_chat import DatosChat, crear_consultas
+from transcripcion import RegistroTranscripcion
+from protocolo import ErrorProtocolo
+from cliente_reconectable import CONECTADO, RECONECTANDO, ClienteReconectable
 
-class Database:
-    def __init__(self, db_name='ganadero.db'):
-        self.db_name = db_name
-        self.init_db()
-    
-    def get_connection(self):
-        return sqlite3.connect(self.db_name)
-    
-    def init_db(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS animales (
-                id TEXT PRIMARY KEY,
-                especie TEXT NOT NULL,
-                peso REAL NOT NULL,
-                fecha_nac DATE NOT NULL
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS veterinarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                especialidad TEXT NOT NULL
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS eventos_sanitarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                animal_id TEXT NOT NULL,
-                tipo TEXT NOT NULL,
-                fecha DATE NOT NULL,
-                medicamento TEXT NOT NULL,
-                veterinario_id INTEGER,
-                FOREIGN KEY (animal_id) REFERENCES animales (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS produccion (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                animal_id TEXT NOT NULL,
-                tipo TEXT NOT NULL,
-                cantidad REAL NOT NULL,
-                fecha DATE NOT NULL,
-                FOREIGN KEY (animal_id) REFERENCES animales (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-
-class ServidorSoporte:
-    def __init__(self, host='localhost', port=5000):
-        self.host = host
-        self.port = port
-        self.clientes = {}
-        self.socket_servidor = None
-        self.activo = False
-    
-    def iniciar_servidor(self):
-        """Inicia el servidor de soporte en un hilo separado"""
-        try:
-            self.socket_servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket_servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.socket_servidor.bind((self.host, self.port))
-            self.socket_servidor.listen(5)
-            self.socket_servidor.settimeout(1)  # Timeout para poder verificar self.activo
-            self.activo = True
-            
-            print(f"Servidor de soporte iniciado en {self.host}:{self.port}")
-            
-            # Hilo para aceptar conexiones
-            threading.Thread(target=self.aceptar_conexiones, daemon=True).start()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error al iniciar servidor: {e}")
-            return False
-    
-    def aceptar_conexiones(self):
-        """Acepta conexiones entrantes de clientes"""
-        while self.activo:
-            try:
-                cliente_socket, direccion = self.socket_servidor.accept()
-                print(f"Nuevo cliente conectado: {direccion}")
-                
-                # Recibir nickname del cliente
-                cliente_socket.settimeout(1)
-                nickname = cliente_socket.recv(1024).decode('utf-8')
-                self.clientes[cliente_socket] = {
-                    'nickname': nickname,
-                    'direccion': direccion,
-                    'conectado': True
-                }
-                
-                # Enviar mensaje de bienvenida
-                mensaje_bienvenida = f"Bienvenido {nickname}! Te has conectado al soporte del Sistema Ganadero."
-                cliente_socket.send(mensaje_bienvenida.encode('utf-8'))
-                
-                # Hilo para manejar mensajes del cliente
-                threading.Thread(
-                    target=self.manejar_cliente, 
-                    args=(cliente_socket,), 
-                    daemon=True
-                ).start()
-                
-            except socket.timeout:
-                continue  # Timeout normal, continuar verificando self.activo
-            except Exception as e:
-                if self.activo:
-                    print(f"Error aceptando conexión: {e}")
-    
-    def manejar_cliente(self, cliente_socket):
-        """Maneja los mensajes de un cliente específico"""
-        cliente_info = self.clientes[cliente_socket]
-        nickname = cliente_info['nickname']
-        
-        while self.activo and cliente_info['conectado']:
-            try:
-                mensaje = cliente_socket.recv(1024).decode('utf-8')
-                
-                if not mensaje:
-                    break
-                
-                if mensaje.lower() == 'salir':
-                    break
-                
-                print(f"[{nickname}]: {mensaje}")
-                
-                # Respuesta automática del sistema
-                respuesta = self.generar_respuesta(mensaje, nickname)
-                cliente_socket.send(respuesta.encode('utf-8'))
-                    
-            except socket.timeout:
-                continue
-            except:
-                break
-        
-        # Desconectar cliente
-        self.desconectar_cliente(cliente_socket)
-    
-    def generar_respuesta(self, mensaje, nickname):
-        """Genera respuesta automática basada en el mensaje"""
-        mensaje_lower = mensaje.lower()
-        
-        if any(palabra in mensaje_lower for palabra in ['hola', 'buenas', 'saludos']):
-            return f"Soporte: ¡Hola {nickname}! ¿En qué puedo ayudarte con el Sistema Ganadero?"
-        elif any(palabra in mensaje_lower for palabra in ['error', 'problema', 'no funciona']):
-            return "Soporte: Lamentamos los inconvenientes. Por favor describe el problema en detalle."
-        elif any(palabra in mensaje_lower for palabra in ['gracias', 'agradezco']):
-            return f"Soporte: ¡De nada {nickname}! ¿Necesitas ayuda con algo más?"
-        elif any(palabra in mensaje_lower for palabra in ['animal', 'registrar', 'agregar']):
-            return "Soporte: Para registrar animales, ve a 'Agregar Animal' en el menú principal."
-        elif any(palabra in mensaje_lower for palabra in ['veterinario', 'doctor']):
-            return "Soporte: Puedes agregar veterinarios en 'Agregar Veterinario'."
-        elif any(palabra in mensaje_lower for palabra in ['producción', 'leche', 'carne']):
-            return "Soporte: El registro de producción está en 'Registrar Producción'."
-        else:
-            return "Soporte: He recibido tu mensaje. Un agente te atenderá pronto."
-    
-    def desconectar_cliente(self, cliente_socket):
-        """Desconecta un cliente y limpia recursos"""
-        if cliente_socket in self.clientes:
-            nickname = self.clientes[cliente_socket]['nickname']
-            self.clientes[cliente_socket]['conectado'] = False
-            
-            try:
-                cliente_socket.close()
-            except:
-                pass
-            
-            del self.clientes[cliente_socket]
-            print(f"Cliente desconectado: {nickname}")
-    
-    def detener_servidor(self):
-        """Detiene el servidor"""
-        print("Deteniendo servidor...")
-        self.activo = False
-        
-        for cliente_socket in list(self.clientes.keys()):
-            self.desconectar_cliente(cliente_socket)
-        
-        if self.socket_servidor:
-            try:
-                self.socket_servidor.close()
-            except:
-                pass
+# Modo del servidor de chat integrado: 'hilos' o 'async' (ver servidor_soporte.crear_servidor)
+MODO_SERVIDOR = 'hilos'
 
 class ClienteChat:
+    """Cliente del chat de la ventana; se reconecta solo si se cae la conexión"""
     def __init__(self, host='localhost', port=5000):
         self.host = host
         self.port = port
-        self.socket_cliente = None
+        self.cliente = None
         self.nickname = ""
-        self.conectado = False
+        self.conectado = False  # Sesión abierta (aunque esté reconectando)
         self.callback_mensaje = None
     
-    def conectar(self, nickname, callback_mensaje=None):
-        """Conecta al servidor de chat"""
-        try:
-            self.nickname = nickname
-            self.callback_mensaje = callback_mensaje
-            
-            self.socket_cliente = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket_cliente.settimeout(1)
-            self.socket_cliente.connect((self.host, self.port))
-            self.conectado = True
-            
-            # Enviar nickname
-            self.socket_cliente.send(nickname.encode('utf-8'))
-            
-            # Hilo para recibir mensajes
-            threading.Thread(target=self.recibir_mensajes, daemon=True).start()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error conectando: {e}")
-            return False
+    def conectar(self, nickname, root, al_resultado, callback_mensaje=None, esperar=5):
+        """Conecta al servidor de chat sin bloquear la interfaz.
+
+        al_resultado(True/False) se llama en el hilo de Tk (con root.after) al
+        conectarse, o con False si el servidor no responde en esperar segundos.
+        """
+        self.nickname = nickname
+        self.callback_mensaje = callback_mensaje
+        self.cliente = cliente = ClienteReconectable(self.host, self.port, nickname,
+                                                    self._recibir, self._cambio_estado)
+        cliente.iniciar()
+        limite = time.monotonic() + esperar
+        
+        def revisar():
+            if cliente.en_linea:
+                self.conectado = True
+                al_resultado(True)
+            elif not cliente.activo or time.monotonic() >= limite:
+                cliente.detener()
+                print("Error conectando: el servidor no responde")
+                al_resultado(False)
+            else:
+                root.after(100, revisar)
+        root.after(100, revisar)
     
-    def recibir_mensajes(self):
-        """Recibe mensajes del servidor"""
-        while self.conectado:
-            try:
-                mensaje = self.socket_cliente.recv(1024).decode('utf-8')
-                if mensaje and self.callback_mensaje:
-                    self.callback_mensaje(mensaje)
-            except socket.timeout:
-                continue
-            except:
-                break
-        
-        self.conectado = False
+    def _recibir(self, mensaje):
         if self.callback_mensaje:
-            self.callback_mensaje("Desconectado del servidor")
+            self.callback_mensaje(mensaje)
+    
+    def _cambio_estado(self, estado):
+        if not self.conectado or not self.callback_mensaje:
+            return
+        if estado == RECONECTANDO:
+            self.callback_mensaje("Sistema: Conexión perdida, reintentando...")
+        elif estado == CONECTADO:
+            self.callback_mensaje("Sistema: Reconectado al servidor")
     
     def enviar_mensaje(self, mensaje):
-        """Envía mensaje al servidor"""
-        if self.conectado and self.socket_cliente:
+        """Envía mensaje al servidor (sin conexión queda en cola hasta reconectar)"""
+        if self.conectado and self.cliente:
             try:
-                self.socket_cliente.send(mensaje.encode('utf-8'))
-                return True
-            except:
-                self.conectado = False
+                return self.cliente.enviar(mensaje)
+            except ErrorProtocolo:
                 return False
         return False
     
     def desconectar(self):
         """Desconecta del servidor"""
         self.conectado = False
-        if self.socket_cliente:
-            try:
-                self.socket_cliente.send("salir".encode('utf-8'))
-                self.socket_cliente.close()
-            except:
-                pass
+        if self.cliente:
+            self.cliente.detener()
+
+class ListaVirtualAnimales:
+    """Treeview de animales que trae de la base de datos solo las páginas que se ven"""
+    COLUMNAS = (
+        ('ID', 'id', 'ID'),
+        ('Especie', 'especie', 'Especie'),
+        ('Peso', 'peso', 'Peso (kg)'),
+        ('Fecha Nac.', 'fecha_nac', 'Fecha Nac.'),
+    )
+    
+    def __init__(self, tree, scrollbar, db, filas_por_pagina=200, trabajador=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.db = db
+        self.filas_por_pagina = filas_por_pagina
+        self.trabajador = trabajador
+        self.orden = 'id'
+        self.descendente = False
+        self.version = 0
+        
+        for columna, campo, titulo in self.COLUMNAS:
+            self.tree.heading(columna, text=titulo,
+                            command=lambda c=campo: self.ordenar_por(c))
+        self.tree.configure(yscrollcommand=self.al_desplazar)
+        self.reiniciar()
+    
+    def reiniciar(self):
+        """Vacía la lista y carga la primera página con el orden actual"""
+        self.tree.delete(*self.tree.get_children())
+        self.ultima_fila = None
+        self.agotado = False
+        self.cargando = True
+        self.version += 1
+        self.cargar_pagina()
+    
+    def cargar_pagina(self):
+        args = (self.ultima_fila, self.filas_por_pagina, self.orden, self.descendente)
+        version = self.version
+        mostrar = lambda filas: self.mostrar_pagina(filas, version)
+        if self.trabajador:
+            self.trabajador.ejecutar(self.db.obtener_animales_pagina, *args, al_terminar=mostrar,
+                                    al_error=lambda e: self.mostrar_error(e, version))
+        else:
+            mostrar(self.db.obtener_animales_pagina(*args))
+    
+    def mostrar_error(self, error, version):
+        # La página falló: se libera la carga para que el próximo desplazamiento la reintente
+        if version == self.version:
+            self.cargando = False
+        print(f"Error cargando animales: {error}")
+    
+    def mostrar_pagina(self, filas, version):
+        # Descarta páginas pedidas antes de un cambio de orden
+        if version != self.version or not self.tree.winfo_exists():
+            return
+        self.cargando = False
+        for fila in filas:
+            self.tree.insert('', 'end', values=fila)
+        
+        if len(filas) < self.filas_por_pagina:
+            self.agotado = True
+        if filas:
+            self.ultima_fila = filas[-1]
+    
+    def al_desplazar(self, inicio, fin):
+        self.scrollbar.set(inicio, fin)
+        if float(fin) >= 0.9 and not self.agotado and not self.cargando:
+            self.cargando = True
+            self.tree.after_idle(self.cargar_pagina)
+    
+    def ordenar_por(self, campo):
+        """Ordena en la base de datos; un segundo clic invierte el sentido"""
+        if campo == self.orden:
+            self.descendente = not self.descendente
+        else:
+            self.orden, self.descendente = campo, False
+        self.reiniciar()
+
+class VistaChat:
+    """Muestra los mensajes del chat en un Text desde cualquier hilo.
+
+    Los hilos de red solo encolan; el hilo de Tk vacía la cola cada
+    intervalo_ms y agrega toda la ráfaga con un solo insert. El área de
+    mensajes guarda como máximo lineas_maximas líneas.
+    """
+    def __init__(self, root, text_widget, tamano_cola=1000, lineas_maximas=2000, intervalo_ms=50):
+        self.root = root
+        self.text = text_widget
+        self.lineas_maximas = lineas_maximas
+        self.intervalo_ms = intervalo_ms
+        self.cola = queue.Queue(maxsize=tamano_cola)
+        self.omitidos = 0
+        self.root.after(self.intervalo_ms, self._vaciar)
+
+    def agregar(self, mensaje):
+        """Se puede llamar desde cualquier hilo; si la cola está llena el mensaje se omite"""
+        try:
+            self.cola.put_nowait(mensaje)
+        except queue.Full:
+            self.omitidos += 1
+
+    def _vaciar(self):
+        if not self.text.winfo_exists():
+            return  # Se cerró la ventana del chat
+        lineas = []
+        try:
+            while True:
+                lineas.append(self.cola.get_nowait())
+        except queue.Empty:
+            pass
+        if self.omitidos:
+            lineas.append(f"Sistema: {self.omitidos} mensajes omitidos por llegar demasiado rápido")
+            self.omitidos = 0
+
+        if lineas:
+            self.text.config(state='normal')
+            self.text.insert('end', '\n'.join(lineas) + '\n')
+            # Recorta el historial: 'end' cuenta la línea vacía final
+            sobrantes = int(self.text.index('end-1c').split('.')[0]) - 1 - self.lineas_maximas
+            if sobrantes > 0:
+                self.text.delete('1.0', f'{sobrantes + 1}.0')
+            self.text.see('end')
+            self.text.config(state='disabled')
+        self.root.after(self.intervalo_ms, self._vaciar)
 
 class InterfazSimple:
     def __init__(self, root):
@@ -276,14 +212,28 @@ class InterfazSimple:
         self.root.title("Sistema Ganadero")
         self.root.geometry("500x500")
         
-        # Iniciar servidor automáticamente
-        self.servidor = ServidorSoporte()
+        self.db = Database()
+        
+        # El bot del chat responde con datos de la base (cacheados por un hilo de fondo)
+        self.datos_chat = DatosChat(self.db)
+        motor = MotorRespuestas.desde_archivo(consultas=crear_consultas(self.datos_chat))
+        self.transcripcion = RegistroTranscripcion(self.db)
+        
+        # Iniciar servidor automáticamente (sin consola: la ventana ya muestra el propio mensaje)
+        self.servidor = crear_servidor(MODO_SERVIDOR, consola=False, eco_remitente=False,
+                                    responder_siempre=True, motor_respuestas=motor,
+                                    transcripcion=self.transcripcion)
+        self.servidor.metricas.agregar(self.datos_chat.duracion)
         self.servidor.iniciar_servidor()
         
         # Cliente de chat
         self.cliente_chat = None
         
-        self.db = Database()
+        # Todo el trabajo con la base de datos corre fuera del hilo de Tk
+        self.trabajador = TrabajadorFondo(self.root)
+        # Las exportaciones largas van en su propio hilo para no frenar al resto de las consultas
+        self.trabajador_exportacion = TrabajadorFondo(self.root, al_salir=self.db.cerrar_conexion_del_hilo)
+        self.monitor_bloqueos = MonitorBloqueos(self.root)
         self.crear_interfaz()
     
     def crear_interfaz(self):
@@ -344,27 +294,15 @@ class InterfazSimple:
                 command=self.jugar_laberinto, width=20).pack(pady=5)
         
     def actualizar_resumen(self, frame):
+        self.trabajador.ejecutar(self.db.obtener_resumen,
+                                al_terminar=lambda resumen: self.mostrar_resumen(frame, resumen))
+    
+    def mostrar_resumen(self, frame, resumen):
         for widget in frame.winfo_children():
             widget.destroy()
         
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM animales')
-        total_animales = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM eventos_sanitarios')
-        total_eventos = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM produccion')
-        total_produccion = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM veterinarios')
-        total_veterinarios = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        info_text = f"Animales: {total_animales} | Veterinarios: {total_veterinarios} | Eventos: {total_eventos} | Producción: {total_produccion}"
+        info_text = (f"Animales: {resumen['animales']} | Veterinarios: {resumen['veterinarios']} | "
+                    f"Eventos: {resumen['eventos']} | Producción: {resumen['produccion']}")
         ttk.Label(frame, text=info_text, font=('Arial', 10)).pack()
     
     def salir(self):
@@ -372,6 +310,12 @@ class InterfazSimple:
         if self.cliente_chat:
             self.cliente_chat.desconectar()
         self.servidor.detener_servidor()
+        self.datos_chat.detener()
+        self.transcripcion.detener()
+        self.trabajador.detener()
+        self.trabajador_exportacion.detener()
+        print(self.monitor_bloqueos.reporte())
+        self.db.cerrar()
         self.root.quit()
         self.root.destroy()
     
@@ -408,22 +352,32 @@ class InterfazSimple:
                 if not id or not especie:
                     raise ValueError("Completa todos los campos")
                 
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute('INSERT INTO animales VALUES (?, ?, ?, ?)', 
-                            (id, especie, peso, fecha))
-                conn.commit()
-                conn.close()
-                
-                messagebox.showinfo("Éxito", "Animal agregado")
-                ventana.destroy()
-                self.actualizar_resumen_desde_principal()
-                
             except Exception as e:
                 messagebox.showerror("Error", f"Datos incorrectos: {e}")
+                return
+            
+            def insertar():
+                with self.db.transaccion() as conn:
+                    conn.execute('INSERT INTO animales VALUES (?, ?, ?, ?)', 
+                                (id, especie, peso, fecha))
+            
+            self.guardar_en_fondo(ventana, insertar, "Animal agregado")
         
         ttk.Button(ventana, text="Guardar", command=guardar).pack(pady=10)
     
+    def guardar_en_fondo(self, ventana, funcion, mensaje_exito):
+        """Ejecuta la escritura en el trabajador y avisa al usuario cuando termina"""
+        def exito(_):
+            messagebox.showinfo("Éxito", mensaje_exito)
+            if ventana.winfo_exists():
+                ventana.destroy()
+            self.actualizar_resumen_desde_principal()
+        
+        def error(e):
+            messagebox.showerror("Error", f"Datos incorrectos: {e}")
+        
+        self.trabajador.ejecutar(funcion, al_terminar=exito, al_error=error)
+    
     def actualizar_resumen_desde_principal(self):
         for widget in self.root.winfo_children():
             if isinstance(widget, ttk.Frame):
@@ -453,24 +407,23 @@ class InterfazSimple:
                 if not nombre or not especialidad:
                     raise ValueError("Completa todos los campos")
                 
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute('INSERT INTO veterinarios (nombre, especialidad) VALUES (?, ?)', 
-                            (nombre, especialidad))
-                conn.commit()
-                conn.close()
-                
-                messagebox.showinfo("Éxito", "Veterinario agregado")
-                ventana.destroy()
-                self.actualizar_resumen_desde_principal()
-                
             except Exception as e:
                 messagebox.showerror("Error", f"Datos incorrectos: {e}")
+                return
+            
+            def insertar():
+                with self.db.transaccion() as conn:
+                    conn.execute('INSERT INTO veterinarios (nombre, especialidad) VALUES (?, ?)', 
+                                (nombre, especialidad))
+            
+            self.guardar_en_fondo(ventana, insertar, "Veterinario agregado")
         
         ttk.Button(ventana, text="Guardar", command=guardar).pack(pady=10)
     
     def registrar_evento(self):
-        animales = self.obtener_animales()
+        self.trabajador.ejecutar(self.obtener_animales, al_terminar=self.abrir_registrar_evento)
+    
+    def abrir_registrar_evento(self, animales):
         if not animales:
             messagebox.showwarning("Advertencia", "Primero agrega animales")
             return
@@ -508,26 +461,25 @@ class InterfazSimple:
                 
                 datetime.strptime(fecha, '%Y-%m-%d')
                 
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO eventos_sanitarios (animal_id, tipo, fecha, medicamento) 
-                    VALUES (?, ?, ?, ?)
-                ''', (animal_id, tipo, fecha, medicamento))
-                conn.commit()
-                conn.close()
-                
-                messagebox.showinfo("Éxito", "Evento registrado")
-                ventana.destroy()
-                self.actualizar_resumen_desde_principal()
-                
             except Exception as e:
                 messagebox.showerror("Error", f"Datos incorrectos: {e}")
+                return
+            
+            def insertar():
+                with self.db.transaccion() as conn:
+                    conn.execute('''
+                        INSERT INTO eventos_sanitarios (animal_id, tipo, fecha, medicamento) 
+                        VALUES (?, ?, ?, ?)
+                    ''', (animal_id, tipo, fecha, medicamento))
+            
+            self.guardar_en_fondo(ventana, insertar, "Evento registrado")
         
         ttk.Button(ventana, text="Guardar", command=guardar).pack(pady=10)
     
     def registrar_produccion(self):
-        animales = self.obtener_animales()
+        self.trabajador.ejecutar(self.obtener_animales, al_terminar=self.abrir_registrar_produccion)
+    
+    def abrir_registrar_produccion(self, animales):
         if not animales:
             messagebox.showwarning("Advertencia", "Primero agrega animales")
             return
@@ -565,21 +517,18 @@ class InterfazSimple:
                 
                 datetime.strptime(fecha, '%Y-%m-%d')
                 
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO produccion (animal_id, tipo, cantidad, fecha) 
-                    VALUES (?, ?, ?, ?)
-                ''', (animal_id, tipo, cantidad, fecha))
-                conn.commit()
-                conn.close()
-                
-                messagebox.showinfo("Éxito", "Producción registrada")
-                ventana.destroy()
-                self.actualizar_resumen_desde_principal()
-                
             except Exception as e:
                 messagebox.showerror("Error", f"Datos incorrectos: {e}")
+                return
+            
+            def insertar():
+                with self.db.transaccion() as conn:
+                    conn.execute('''
+                        INSERT INTO produccion (animal_id, tipo, cantidad, fecha) 
+                        VALUES (?, ?, ?, ?)
+                    ''', (animal_id, tipo, cantidad, fecha))
+            
+            self.guardar_en_fondo(ventana, insertar, "Producción registrada")
         
         ttk.Button(ventana, text="Guardar", command=guardar).pack(pady=10)
     
@@ -588,7 +537,6 @@ class InterfazSimple:
         cursor = conn.cursor()
         cursor.execute('SELECT id, especie FROM animales ORDER BY id')
         animales = [f"{a[0]} - {a[1]}" for a in cursor.fetchall()]
-        conn.close()
         return animales
     
     def ver_animales(self):
@@ -601,28 +549,18 @@ class InterfazSimple:
         
         tree = ttk.Treeview(frame, columns=('ID', 'Especie', 'Peso', 'Fecha Nac.'), show='headings', height=10)
         
-        tree.heading('ID', text='ID')
-        tree.heading('Especie', text='Especie')
-        tree.heading('Peso', text='Peso (kg)')
-        tree.heading('Fecha Nac.', text='Fecha Nac.')
-        
         tree.column('ID', width=80)
         tree.column('Especie', width=100)
         tree.column('Peso', width=80)
         tree.column('Fecha Nac.', width=100)
         
         scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
         
         tree.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
         
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM animales ORDER BY id')
-        for animal in cursor.fetchall():
-            tree.insert('', 'end', values=animal)
-        conn.close()
+        # Solo se cargan las filas visibles; el resto llega al desplazarse
+        ventana.lista = ListaVirtualAnimales(tree, scrollbar, self.db, trabajador=self.trabajador)
         
         ttk.Button(ventana, text="Cerrar", command=ventana.destroy).pack(pady=10)
     
@@ -631,58 +569,65 @@ class InterfazSimple:
         ventana.title("Reportes")
         ventana.geometry("400x320")
         
+        # Controles para exportar el detalle completo con progreso y cancelación
+        frame_exportar = ttk.Frame(ventana)
+        frame_exportar.pack(side='bottom', fill='x', padx=10)
+        lbl_progreso = ttk.Label(frame_exportar, text="")
+        btn_cancelar = ttk.Button(frame_exportar, text="Cancelar", state='disabled')
+        ttk.Button(frame_exportar, text="Exportar detalle", 
+                command=lambda: self.exportar_detalle(lbl_progreso, btn_cancelar)).pack(side='left', padx=5)
+        btn_cancelar.pack(side='left', padx=5)
+        lbl_progreso.pack(side='left', padx=5)
+        
+        ttk.Button(ventana, text="Cerrar", command=ventana.destroy).pack(side='bottom', pady=10)
+        
         text_area = tk.Text(ventana, wrap='word', width=50, height=15)
         scrollbar = ttk.Scrollbar(ventana, orient='vertical', command=text_area.yview)
-        text_area.configure(yscrollcommand=scrollbar.set)
         
         text_area.pack(side='left', fill='both', expand=True, padx=10, pady=10)
         scrollbar.pack(side='right', fill='y')
         
-        reporte = self.generar_reporte_simple()
-        text_area.insert('1.0', reporte)
-        text_area.config(state='disabled')
-        
-        ttk.Button(ventana, text="Cerrar", command=ventana.destroy).pack(pady=10)
+        # El reporte se lee del cursor en el trabajador y se inserta por páginas al desplazarse
+        ventana.visor = VisorPaginado(text_area, scrollbar, self.generar_reporte_simple(),
+                                    trabajador=self.trabajador)
     
-    def generar_reporte_simple(self):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        reporte = "=== REPORTE GANADERO ===\n\n"
+    def exportar_detalle(self, lbl_progreso, btn_cancelar):
+        """Exporta el detalle de producción a un archivo en segundo plano"""
+        ruta = filedialog.asksaveasfilename(defaultextension=".txt",
+                                            filetypes=[("Texto", "*.txt")])
+        if not ruta:
+            return
         
-        cursor.execute('SELECT COUNT(*) FROM animales')
-        total_animales = cursor.fetchone()[0]
-        reporte += f"Total animales: {total_animales}\n"
+        generador = GeneradorReportesSimple(self.db)
         
-        cursor.execute('SELECT COUNT(*) FROM veterinarios')
-        total_veterinarios = cursor.fetchone()[0]
-        reporte += f"Total veterinarios: {total_veterinarios}\n"
+        def actualizar(texto):
+            if lbl_progreso.winfo_exists():
+                lbl_progreso.config(text=texto)
         
-        cursor.execute('SELECT COUNT(*) FROM eventos_sanitarios')
-        total_eventos = cursor.fetchone()[0]
-        reporte += f"Total eventos: {total_eventos}\n"
+        def terminar(total):
+            actualizar(f"Exportadas {total} líneas")
+            if btn_cancelar.winfo_exists():
+                btn_cancelar.config(state='disabled')
         
-        cursor.execute('SELECT COUNT(*), SUM(cantidad) FROM produccion')
-        total_prod, suma_prod = cursor.fetchone()
-        reporte += f"Registros producción: {total_prod}\n"
-        reporte += f"Producción total: {suma_prod or 0:.2f} unidades\n\n"
+        def fallar(e):
+            actualizar("Error al exportar")
+            messagebox.showerror("Error", f"No se pudo exportar: {e}")
         
-        cursor.execute('SELECT tipo, SUM(cantidad) FROM produccion GROUP BY tipo')
-        prod_tipo = cursor.fetchall()
-        if prod_tipo:
-            reporte += "PRODUCCIÓN POR TIPO:\n"
-            for tipo, total in prod_tipo:
-                reporte += f"  {tipo}: {total:.2f}\n"
+        tarea = self.trabajador_exportacion.ejecutar(escribir_reporte, generador.lineas_detalle_produccion(), ruta,
+                                                    con_tarea=True, al_terminar=terminar, al_error=fallar,
+                                                    al_progreso=lambda n: actualizar(f"{n} líneas..."))
         
-        cursor.execute('SELECT nombre, especialidad FROM veterinarios')
-        veterinarios = cursor.fetchall()
-        if veterinarios:
-            reporte += "\nVETERINARIOS:\n"
-            for nombre, especialidad in veterinarios:
-                reporte += f"  {nombre} - {especialidad}\n"
+        def cancelar():
+            tarea.cancelar()
+            actualizar("Exportación cancelada")
+            btn_cancelar.config(state='disabled')
         
-        conn.close()
-        return reporte
+        btn_cancelar.config(state='normal', command=cancelar)
+        actualizar("Exportando...")
+    
+    def generar_reporte_simple(self):
+        """Retorna un generador con las líneas del reporte general"""
+        return lineas_reporte_general(self.db)
     
     def abrir_chat_soporte(self):
         """Abre la ventana de chat de soporte REAL"""
@@ -707,6 +652,7 @@ class InterfazSimple:
         
         self.text_mensajes = scrolledtext.ScrolledText(frame_mensajes, height=15, wrap='word', state='disabled')
         self.text_mensajes.pack(fill='both', expand=True)
+        self.vista_chat = VistaChat(ventana_chat, self.text_mensajes)
         
         # Entrada de mensaje
         frame_entrada = ttk.Frame(main_frame)
@@ -736,11 +682,8 @@ class InterfazSimple:
         self.conectar_al_chat()
     
     def agregar_mensaje_chat(self, mensaje):
-        """Agrega un mensaje al área de chat"""
-        self.text_mensajes.config(state='normal')
-        self.text_mensajes.insert('end', mensaje + '\n')
-        self.text_mensajes.see('end')
-        self.text_mensajes.config(state='disabled')
+        """Agrega un mensaje al área de chat (seguro desde el hilo del cliente)"""
+        self.vista_chat.agregar(mensaje)
     
     def conectar_al_chat(self):
         """Conecta al servidor de chat"""
@@ -748,13 +691,18 @@ class InterfazSimple:
         if not nickname:
             nickname = "Usuario"
         
+        def resultado(conectado):
+            if not self.lbl_estado_chat.winfo_exists():
+                return  # Se cerró la ventana del chat mientras tanto
+            if conectado:
+                self.lbl_estado_chat.config(text="Conectado al servidor", foreground="green")
+                self.agregar_mensaje_chat(f"Sistema: Conectado como '{nickname}'")
+            else:
+                self.lbl_estado_chat.config(text="No se pudo conectar", foreground="red")
+                self.agregar_mensaje_chat("Sistema: Error al conectar con el servidor")
+        
         self.cliente_chat = ClienteChat()
-        if self.cliente_chat.conectar(nickname, self.agregar_mensaje_chat):
-            self.lbl_estado_chat.config(text="Conectado al servidor", foreground="green")
-            self.agregar_mensaje_chat(f"Sistema: Conectado como '{nickname}'")
-        else:
-            self.lbl_estado_chat.config(text="No se pudo conectar", foreground="red")
-            self.agregar_mensaje_chat("Sistema: Error al conectar con el servidor")
+        self.cliente_chat.conectar(nickname, self.root, resultado, self.agregar_mensaje_chat)
     
     def enviar_mensaje_chat(self):
         """Envía un mensaje a través del chat"""
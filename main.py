@@ -7,6 +7,7 @@ from modelos.produccion import Produccion
 from modelos.veterinario import Veterinario
 from modelos.sistemaGanadero import SistemaGanadero
 from datetime import date
+from estadisticas_hato import SIN_EDAD, calcular_edades, columnas_hato, estadisticas_hato
 
 def main():
     print("====================================")
@@ -57,27 +58,24 @@ def agregar_animal(sistema):
         anio, mes, dia = map(int, fecha_str.split('-'))
         fecha_nac = date(anio, mes, dia)
         
-        animal = Animal()
-        animal.id = id
-        animal.especie = especie
-        animal.peso = peso
-        animal.fecha_nac = fecha_nac
-        
-        sistema.agregar_animal(animal)
-        print("¡Animal agregado correctamente!")
+        animal = Animal(id, especie, peso, fecha_nac)
         
     except ValueError:
         print("Formato de fecha incorrecto. Use aaaa-mm-dd")
+        return
+    
+    try:
+        sistema.agregar_animal(animal)
+        print("¡Animal agregado correctamente!")
+    except ValueError as e:
+        print(f"Error: {e}")
 
 def agregar_veterinario(sistema):
     print("\n--- AGREGAR VETERINARIO ---")
     nombre = input("Nombre: ")
     especialidad = input("Especialidad: ")
     
-    vet = Veterinario()
-    vet.nombre = nombre
-    vet.especialidad = especialidad
-    vet.eventos = []
+    vet = Veterinario(nombre, especialidad, eventos=[])
     
     sistema.agregar_veterinario(vet)
     print("¡Veterinario agregado correctamente!")
@@ -109,10 +107,7 @@ def registrar_evento(sistema):
             anio, mes, dia = map(int, fecha_str.split('-'))
             fecha_evento = date(anio, mes, dia)
             
-            evento = EventoSanitario()
-            evento.tipo = tipo
-            evento.fecha = fecha_evento
-            evento.medicamento = medicamento
+            evento = EventoSanitario(tipo, fecha_evento, medicamento)
             
             sistema.registrar_evento(animal.id, evento)
             print("¡Evento registrado correctamente!")
@@ -149,10 +144,7 @@ def registrar_produccion(sistema):
             anio, mes, dia = map(int, fecha_str.split('-'))
             fecha_prod = date(anio, mes, dia)
             
-            produccion = Produccion()
-            produccion.tipo = tipo
-            produccion.cantidad = cantidad
-            produccion.fecha = fecha_prod
+            produccion = Produccion(tipo, cantidad, fecha_prod)
             
             sistema.registrar_produccion(animal.id, produccion)
             print("¡Producción registrada correctamente!")
@@ -174,10 +166,23 @@ def consultar_datos(sistema):
     print(f"Total de veterinarios: {len(sistema.veterinarios)}")
     print(f"Total de registros: {len(sistema.registros)}")
     
+    # Las edades se calculan juntas, con una sola fecha de referencia
+    columnas = columnas_hato(sistema)
+    edades = calcular_edades(columnas)
     print("\nAnimales registrados:")
-    for animal in sistema.animales:
-        edad = animal.get_edad() if animal.fecha_nac else "N/A"
+    for animal, edad in zip(sistema.animales, edades):
+        edad = "N/A" if edad == SIN_EDAD else edad
         print(f"- {animal.id} ({animal.especie}), {animal.peso}kg, Edad: {edad}")
+    
+    print("\nResumen por especie:")
+    for especie, datos in estadisticas_hato(columnas)['por_especie'].items():
+        edad, peso = datos['edad'], datos['peso']
+        texto_edad = f"edad promedio {edad['promedio']:.1f} años" if edad['cantidad'] else "sin edades"
+        if peso['cantidad']:
+            texto_peso = f"peso promedio {peso['promedio']:.1f}kg (mediana {peso['p50']}kg)"
+        else:
+            texto_peso = "sin pesos"
+        print(f"- {especie}: {datos['cantidad']} animales, {texto_edad}, {texto_peso}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Tareas de mantenimiento de la base de datos
+# Uso: python mantenimiento.py <reconstruir-rollups|verificar-rollups> [ganadero.db]
+
+import sys
+from database import Database
+
+def reconstruir_rollups(db):
+    db.reconstruir_rollups()
+    print("Tablas de resumen de producción reconstruidas")
+    return 0
+
+def verificar_rollups(db):
+    diferencias = db.verificar_rollups()
+    if not diferencias:
+        print("Tablas de resumen de producción correctas")
+        return 0
+
+    print(f"Se encontraron {len(diferencias)} diferencias:")
+    for diferencia in diferencias[:20]:
+        print(f"  - {diferencia}")
+    print("Ejecute 'python mantenimiento.py reconstruir-rollups' para corregirlas")
+    return 1
+
+COMANDOS = {
+    'reconstruir-rollups': reconstruir_rollups,
+    'verificar-rollups': verificar_rollups,
+}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMANDOS:
+        print(f"Uso: python mantenimiento.py <{'|'.join(COMANDOS)}> [base_de_datos]")
+        return 1
+
+    db = Database(sys.argv[2] if len(sys.argv) > 2 else 'ganadero.db')
+    try:
+        return COMANDOS[sys.argv[1]](db)
+    finally:
+        db.cerrar()
+
+if __name__ == "__main__":
+    sys.exit(main())
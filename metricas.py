@@ -0,0 +1,184 @@
+# Métricas simples en memoria para el servidor de soporte
+
+import bisect
+import threading
+import time
+from collections import deque
+
+# Límites (en milisegundos) de los histogramas de latencia
+LIMITES_LATENCIA_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Para operaciones en memoria que tardan microsegundos (motor de respuestas)
+LIMITES_RAPIDOS_MS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class Contador:
+    """Valor que solo aumenta (mensajes, bytes, conexiones...)"""
+    def __init__(self, nombre, ayuda=""):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def incrementar(self, cantidad=1):
+        with self._lock:
+            self.valor += cantidad
+
+    def instantanea(self):
+        return self.valor
+
+class Indicador:
+    """Valor que se calcula al momento de leerlo (clientes conectados, profundidad de colas...)
+
+    Con etiqueta, funcion retorna {valor de la etiqueta: número}; por ejemplo
+    la profundidad de la cola de cada cliente.
+    """
+    def __init__(self, nombre, funcion, ayuda="", etiqueta=None):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        self.etiqueta = etiqueta
+
+    def instantanea(self):
+        try:
+            return self.funcion()
+        except Exception:
+            return None
+
+class Tasa:
+    """Eventos por segundo en los últimos segundos (conexiones aceptadas, mensajes...)"""
+    def __init__(self, nombre, ayuda="", ventana=10):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.ventana = ventana
+        self.segundos = deque()  # (segundo, cantidad), uno por segundo con eventos
+        self._lock = threading.Lock()
+
+    def marcar(self, cantidad=1):
+        segundo = int(time.monotonic())
+        with self._lock:
+            if self.segundos and self.segundos[-1][0] == segundo:
+                self.segundos[-1][1] += cantidad
+            else:
+                self.segundos.append([segundo, cantidad])
+            self._olvidar(segundo)
+
+    def _olvidar(self, segundo):
+        while self.segundos and self.segundos[0][0] <= segundo - self.ventana:
+            self.segundos.popleft()
+
+    def instantanea(self):
+        with self._lock:
+            self._olvidar(int(time.monotonic()))
+            return sum(cantidad for _, cantidad in self.segundos) / self.ventana
+
+class Histograma:
+    """Distribución de valores agrupada en intervalos fijos"""
+    def __init__(self, nombre, ayuda="", limites=LIMITES_LATENCIA_MS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = tuple(limites)
+        self.cuentas = [0] * (len(self.limites) + 1)  # El último intervalo es +Inf
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        with self._lock:
+            self.cuentas[bisect.bisect_left(self.limites, valor)] += 1
+            self.total += 1
+            self.suma += valor
+            if valor > self.maximo:
+                self.maximo = valor
+
+    def estado(self):
+        """Copia consistente de (cuentas por intervalo, total, suma)"""
+        with self._lock:
+            return list(self.cuentas), self.total, self.suma
+
+    def percentil(self, p):
+        """Aproxima el percentil p (0-100) con el límite superior del intervalo que lo contiene"""
+        if not self.total:
+            return 0.0
+        objetivo = self.total * p / 100
+        acumulado = 0
+        for i, cuenta in enumerate(self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return min(self.limites[i], self.maximo) if i < len(self.limites) else self.maximo
+        return self.maximo
+
+    def instantanea(self):
+        return {
+            'total': self.total,
+            'promedio': self.suma / self.total if self.total else 0.0,
+            'p50': self.percentil(50),
+            'p95': self.percentil(95),
+            'p99': self.percentil(99),
+            'maximo': self.maximo,
+        }
+
+class RegistroMetricas:
+    """Agrupa las métricas de un servidor por nombre"""
+    def __init__(self):
+        self.metricas = {}
+
+    def agregar(self, metrica):
+        """Registra una métrica creada en otro lado (por ejemplo, la de un componente compartido)"""
+        self.metricas.setdefault(metrica.nombre, metrica)
+        return self.metricas[metrica.nombre]
+
+    def contador(self, nombre, ayuda=""):
+        return self.agregar(Contador(nombre, ayuda))
+
+    def indicador(self, nombre, funcion, ayuda="", etiqueta=None):
+        return self.agregar(Indicador(nombre, funcion, ayuda, etiqueta))
+
+    def tasa(self, nombre, ayuda="", ventana=10):
+        return self.agregar(Tasa(nombre, ayuda, ventana))
+
+    def histograma(self, nombre, ayuda="", limites=LIMITES_LATENCIA_MS):
+        return self.agregar(Histograma(nombre, ayuda, limites))
+
+    def instantanea(self):
+        """Retorna {nombre: valor} con el estado actual de todas las métricas"""
+        return {nombre: metrica.instantanea() for nombre, metrica in self.metricas.items()}
+
+def _numero(valor):
+    if valor is None:
+        return 'NaN'
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(int(valor))
+
+def _valor_etiqueta(texto):
+    return str(texto).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def formato_prometheus(registro, prefijo='ganadero_'):
+    """Texto de todas las métricas en el formato de exposición de Prometheus"""
+    lineas = []
+    for metrica in list(registro.metricas.values()):
+        nombre = prefijo + metrica.nombre
+        if isinstance(metrica, Contador):
+            tipo = 'counter'
+        elif isinstance(metrica, Histograma):
+            tipo = 'histogram'
+        else:
+            tipo = 'gauge'
+        if metrica.ayuda:
+            lineas.append(f"# HELP {nombre} {metrica.ayuda.replace(chr(10), ' ')}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+
+        if isinstance(metrica, Histograma):
+            cuentas, total, suma = metrica.estado()
+            acumulado = 0
+            for limite, cuenta in zip(metrica.limites + (float('inf'),), cuentas):
+                acumulado += cuenta
+                lineas.append(f'{nombre}_bucket{{le="{_numero(limite)}"}} {acumulado}')
+            lineas.append(f"{nombre}_sum {_numero(suma)}")
+            lineas.append(f"{nombre}_count {total}")
+        elif isinstance(metrica, Indicador) and metrica.etiqueta:
+            for clave, valor in sorted((metrica.instantanea() or {}).items()):
+                lineas.append(f'{nombre}{{{metrica.etiqueta}="{_valor_etiqueta(clave)}"}} {_numero(valor)}')
+        else:
+            lineas.append(f"{nombre} {_numero(metrica.instantanea())}")
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,181 @@
+
+
+from array import array
+from datetime import date
+from heapq import merge
+from modelos.eventoSanitario import EventoSanitario
+from modelos.produccion import Produccion
+from modelos.registro import Registro
+
+PRODUCCION = 0
+EVENTO = 1
+SIN_TEXTO = 0   # Código de un texto vacío o ausente (tipo o medicamento)
+
+class AlmacenRegistros:
+    # Historial de registros guardado por columnas en arreglos compactos.
+    #
+    # Cada registro ocupa unos 25 bytes (índice del animal, fecha como ordinal,
+    # códigos de tipo y medicamento, cantidad y clase) en lugar de tres objetos
+    # y una fecha, más 8 de los índices por tipo y por animal que usa buscar(). Los textos repetidos ('leche', 'vacunación') se guardan una
+    # sola vez y cada registro lleva solo su código.
+    #
+    # Se usa como la lista de antes: len(), for, [i] y append(registro). Lo que
+    # se lee son vistas (objetos Registro nuevos): modificarlas no cambia el
+    # almacén.
+    def __init__(self):
+        self.animal = array('i')       # Posición del animal en self._animales
+        self.fecha = array('i')        # date.toordinal(), 0 si no tiene fecha
+        self.tipo = array('I')         # Código del tipo de producción o de evento
+        self.medicamento = array('I')  # Código del medicamento (solo eventos)
+        self.cantidad = array('d')     # Cantidad producida (NaN en eventos)
+        self.clase = array('b')        # PRODUCCION o EVENTO
+        self._animales = []            # Animales referenciados, cada uno una vez
+        self._posicion_animal = {}     # id del animal -> posición en self._animales
+        self._textos = ['']            # Código -> texto
+        self._codigos = {'': SIN_TEXTO}  # Texto -> código
+        # Índices para buscar() sin recorrer todo: posiciones de registros en orden creciente
+        self._por_tipo = {}            # (clase, código de tipo) -> array de posiciones
+        self._por_id = {}              # id del animal -> array de posiciones
+
+    def codigo(self, texto):
+        # Retorna el código de un texto, agregándolo a la tabla si es nuevo
+        if texto is None:
+            return SIN_TEXTO
+        codigo = self._codigos.get(texto)
+        if codigo is None:
+            codigo = self._codigos[texto] = len(self._textos)
+            self._textos.append(texto)
+        return codigo
+
+    def texto(self, codigo):
+        # Retorna el texto de un código (None para SIN_TEXTO)
+        return self._textos[codigo] if codigo else None
+
+    def buscar_codigo(self, texto):
+        # Código de un texto ya guardado, o None si ningún registro lo usa
+        return self._codigos.get(texto)
+
+    def _indice_animal(self, animal):
+        posicion = self._posicion_animal.get(animal.id)
+        if posicion is None or self._animales[posicion] is not animal:
+            # Animal nuevo, o uno que reemplazó a otro eliminado con el mismo ID
+            posicion = self._posicion_animal[animal.id] = len(self._animales)
+            self._animales.append(animal)
+        return posicion
+
+    def _agregar(self, animal, clase, tipo, fecha, cantidad, medicamento):
+        # Primero se convierte y valida todo; recién después se tocan las columnas,
+        # así un registro rechazado no deja columnas de distinto largo
+        if isinstance(fecha, str):
+            fecha = date.fromisoformat(fecha)
+        elif fecha is not None and not isinstance(fecha, date):
+            raise TypeError(f"Fecha no válida: {fecha!r}")
+        ordinal = fecha.toordinal() if fecha else 0
+        cantidad = float('nan') if cantidad is None else float(cantidad)
+        for texto in (tipo, medicamento):
+            if texto is not None and not isinstance(texto, str):
+                raise TypeError(f"Texto no válido: {texto!r}")
+        posicion = len(self.clase)
+        codigo_tipo = self.codigo(tipo)
+        self.animal.append(self._indice_animal(animal))
+        self.fecha.append(ordinal)
+        self.tipo.append(codigo_tipo)
+        self.medicamento.append(self.codigo(medicamento))
+        self.cantidad.append(cantidad)
+        self.clase.append(clase)
+        self._por_tipo.setdefault((clase, codigo_tipo), array('i')).append(posicion)
+        self._por_id.setdefault(animal.id, array('i')).append(posicion)
+
+    def agregar_produccion(self, animal, produccion):
+        # Guarda un registro de producción sin crear objetos Registro
+        self._agregar(animal, PRODUCCION, produccion.tipo, produccion.fecha, produccion.cantidad, None)
+
+    def agregar_evento(self, animal, evento):
+        # Guarda un registro de evento sanitario sin crear objetos Registro
+        self._agregar(animal, EVENTO, evento.tipo, evento.fecha, None, evento.medicamento)
+
+    def append(self, registro):
+        # Compatibilidad con el historial como lista de Registro
+        if registro.produccion is not None:
+            self.agregar_produccion(registro.animal, registro.produccion)
+        else:
+            self.agregar_evento(registro.animal, registro.evento)
+
+    def __len__(self):
+        return len(self.clase)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        animal = self._animales[self.animal[i]]
+        ordinal = self.fecha[i]
+        fecha = date.fromordinal(ordinal) if ordinal else None
+        if self.clase[i] == PRODUCCION:
+            return Registro(animal, produccion=Produccion(self.texto(self.tipo[i]), self.cantidad[i], fecha))
+        return Registro(animal, evento=EventoSanitario(self.texto(self.tipo[i]), fecha,
+                                                        self.texto(self.medicamento[i])))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _candidatos(self, clase, tipo, animal_id):
+        # Posiciones por revisar (en orden creciente), desde el índice más selectivo
+        if animal_id is not None:
+            return self._por_id.get(animal_id, ())
+        if tipo is not None:
+            clases = (clase,) if clase is not None else (PRODUCCION, EVENTO)
+            listas = [self._por_tipo[(c, tipo)] for c in clases if (c, tipo) in self._por_tipo]
+            return listas[0] if len(listas) == 1 else merge(*listas)
+        return range(len(self.clase))
+
+    def buscar(self, clase=None, tipo=None, medicamento=None, desde=None, hasta=None, filtro_animal=None,
+               animal_id=None):
+        # Genera las posiciones de los registros que cumplen todo lo indicado,
+        # comparando las columnas sin crear objetos. desde/hasta son date;
+        # filtro_animal(animal) se evalúa una sola vez por animal. Con animal_id
+        # o tipo solo se revisan los registros de ese animal o tipo (índices).
+        tipo = None if tipo is None else self._codigos.get(tipo, -1)
+        medicamento = None if medicamento is None else self._codigos.get(medicamento, -1)
+        if tipo == -1 or medicamento == -1:
+            return  # Ningún registro tiene ese texto
+        desde = desde.toordinal() if desde else None
+        hasta = hasta.toordinal() if hasta else None
+        aceptados = {}  # Posición del animal -> resultado de filtro_animal
+        for i in self._candidatos(clase, tipo, animal_id):
+            if clase is not None and self.clase[i] != clase:
+                continue
+            if tipo is not None and self.tipo[i] != tipo:
+                continue
+            if medicamento is not None and self.medicamento[i] != medicamento:
+                continue
+            fecha = self.fecha[i]
+            if (desde is not None and fecha < desde) or (hasta is not None and (not fecha or fecha > hasta)):
+                continue
+            if filtro_animal is not None:
+                posicion = self.animal[i]
+                acepta = aceptados.get(posicion)
+                if acepta is None:
+                    acepta = aceptados[posicion] = filtro_animal(self._animales[posicion])
+                if not acepta:
+                    continue
+            yield i
+
+    def animal_de(self, i):
+        # Animal del registro i, sin armar la vista completa
+        return self._animales[self.animal[i]]
+
+    def memoria(self):
+        # Bytes usados por columna y en total (los animales se cuentan aparte: son del sistema)
+        columnas = {nombre: len(columna) * columna.itemsize
+                    for nombre, columna in (('animal', self.animal), ('fecha', self.fecha),
+                                            ('tipo', self.tipo), ('medicamento', self.medicamento),
+                                            ('cantidad', self.cantidad), ('clase', self.clase))}
+        columnas['textos'] = sum(len(texto.encode('utf-8')) for texto in self._textos)
+        columnas['indices'] = sum(len(posiciones) * posiciones.itemsize
+                                  for indice in (self._por_tipo, self._por_id) for posiciones in indice.values())
+        columnas['total'] = sum(columnas.values())
+        columnas['por_registro'] = columnas['total'] / len(self) if len(self) else 0.0
+        return columnas
@@ -1,13 +1,28 @@
 
 
 from datetime import date
+from modelos.modelo import Modelo, a_texto_fecha
 
-class Animal:
-    def __init__(self):
-        self.id = None           # Identificador único del animal
-        self.especie = None      # Especie del animal (ej: bovino, porcino)
-        self.peso = None         # Peso actual del animal en kg
-        self.fecha_nac = None    # Fecha de nacimiento del animal
+class Animal(Modelo):
+    __slots__ = campos = ('id', 'especie', 'peso', 'fecha_nac')
+
+    def __init__(self, id=None, especie=None, peso=None, fecha_nac=None):
+        self.id = id                 # Identificador único del animal
+        self.especie = especie       # Especie del animal (ej: bovino, porcino)
+        self.peso = peso             # Peso actual del animal en kg
+        self.fecha_nac = fecha_nac   # Fecha de nacimiento del animal
+
+    @classmethod
+    def from_row(cls, fila):
+        # Crea el animal desde una fila (id, especie, peso, fecha_nac) de la tabla animales
+        id, especie, peso, fecha_nac = fila
+        if fecha_nac.__class__ is str:   # Sin llamar a otra función: se usa para millones de filas
+            fecha_nac = date.fromisoformat(fecha_nac)
+        return cls(id, especie, peso, fecha_nac)
+
+    def to_row(self):
+        # Retorna la fila (id, especie, peso, fecha_nac) para la tabla animales
+        return (self.id, self.especie, self.peso, a_texto_fecha(self.fecha_nac))
 
     def get_edad(self):
         # Calcula y retorna la edad del animal en años
@@ -1,17 +1,223 @@
 
 
+from datetime import date
+from heapq import nsmallest
+from itertools import islice
+from operator import attrgetter
+from modelos.almacenRegistros import EVENTO
+from modelos.animal import Animal
+from modelos.eventoSanitario import EventoSanitario
+from modelos.modelo import a_texto_fecha
+from modelos.registro import Registro
+
+# Criterios que acepta Consulta (las fechas pueden ser date o texto AAAA-MM-DD)
+CRITERIOS_ANIMAL = ('animal_id', 'especie', 'peso_min', 'peso_max', 'nacido_desde', 'nacido_hasta')
+CRITERIOS_EVENTO = ('tipo', 'medicamento', 'desde', 'hasta')
+
+# Columna y comparación de cada criterio en SQL
+SQL_CRITERIOS = {
+    'animal_id': 'a.id = ?',
+    'especie': 'a.especie = ?',
+    'peso_min': 'a.peso >= ?',
+    'peso_max': 'a.peso <= ?',
+    'nacido_desde': 'a.fecha_nac >= ?',
+    'nacido_hasta': 'a.fecha_nac <= ?',
+    'tipo': 'e.tipo = ?',
+    'medicamento': 'e.medicamento = ?',
+    'desde': 'e.fecha >= ?',
+    'hasta': 'e.fecha <= ?',
+}
+FECHAS = ('nacido_desde', 'nacido_hasta', 'desde', 'hasta')
+
 class Consulta:
-    def __init__(self):
-        self.criterios = None  # Diccionario con los filtros de búsqueda
-    
+    # Arma búsquedas de animales y eventos a partir de self.criterios.
+    #
+    # El origen puede ser la base de datos (Database): los criterios se
+    # traducen a SQL con parámetros. O el sistema en memoria (SistemaGanadero):
+    # se traducen a funciones que usan sus índices. En ambos casos los
+    # resultados se entregan de a uno (iteradores), con limite y desplazamiento,
+    # y en el mismo orden: animales por ID y eventos por fecha y luego por orden
+    # de registro. Así una misma página da lo mismo con cualquier origen.
+    #
+    #   Consulta(db).filtrar(especie='bovino', peso_min=300).limitar(20).buscar_animal()
+    def __init__(self, origen=None, criterios=None, limite=None, desplazamiento=0):
+        self.origen = origen
+        self.criterios = {}  # Diccionario con los filtros de búsqueda
+        self.limite = limite
+        self.desplazamiento = desplazamiento
+        for nombre, valor in (criterios or {}).items():
+            self._agregar_criterio(nombre, valor)
+
+    def _agregar_criterio(self, nombre, valor):
+        if nombre not in SQL_CRITERIOS:
+            raise ValueError(f"Criterio desconocido: {nombre}")
+        if valor is None:
+            self.criterios.pop(nombre, None)
+        elif nombre in FECHAS and isinstance(valor, str):
+            self.criterios[nombre] = date.fromisoformat(valor)
+        else:
+            self.criterios[nombre] = valor
+
+    def filtrar(self, **criterios):
+        # Retorna una consulta nueva con estos criterios agregados (None quita uno)
+        consulta = Consulta(self.origen, self.criterios, self.limite, self.desplazamiento)
+        for nombre, valor in criterios.items():
+            consulta._agregar_criterio(nombre, valor)
+        return consulta
+
+    def limitar(self, limite, desplazamiento=0):
+        # Retorna una consulta nueva que entrega como máximo limite resultados
+        return Consulta(self.origen, self.criterios, limite, desplazamiento)
+
+    def _en_memoria(self):
+        if self.origen is None:
+            raise ValueError("La consulta no tiene origen: use Consulta(db) o Consulta(sistema)")
+        return not hasattr(self.origen, 'get_connection')
+
+    def _recortar(self, resultados):
+        fin = None if self.limite is None else self.desplazamiento + self.limite
+        return islice(resultados, self.desplazamiento, fin)
+
+    def _ordenar(self, resultados, clave):
+        # Con límite solo se conservan los primeros desplazamiento + limite
+        # (heap de ese tamaño), no todo el resultado ordenado
+        if self.limite is None:
+            return sorted(resultados, key=clave)
+        return nsmallest(self.desplazamiento + self.limite, resultados, key=clave)
+
+    # --- SQL ---
+
+    def _condiciones_sql(self, nombres):
+        condiciones, parametros = [], []
+        for nombre in nombres:
+            if nombre in self.criterios:
+                condiciones.append(SQL_CRITERIOS[nombre])
+                valor = self.criterios[nombre]
+                parametros.append(a_texto_fecha(valor) if nombre in FECHAS else valor)
+        return condiciones, parametros
+
+    def _limite_sql(self):
+        if self.limite is None and not self.desplazamiento:
+            return '', []
+        return ' LIMIT ? OFFSET ?', [-1 if self.limite is None else self.limite, self.desplazamiento]
+
+    def sql_animales(self):
+        # Retorna (sql, parámetros) de la búsqueda de animales. Si hay
+        # criterios de eventos, solo entran animales con algún evento que los cumpla.
+        condiciones, parametros = self._condiciones_sql(CRITERIOS_ANIMAL)
+        eventos, parametros_eventos = self._condiciones_sql(CRITERIOS_EVENTO)
+        if eventos:
+            condiciones.append('EXISTS (SELECT 1 FROM eventos_sanitarios e WHERE e.animal_id = a.id AND '
+                            + ' AND '.join(eventos) + ')')
+            parametros += parametros_eventos
+        donde = ' WHERE ' + ' AND '.join(condiciones) if condiciones else ''
+        limite, parametros_limite = self._limite_sql()
+        sql = f'SELECT a.id, a.especie, a.peso, a.fecha_nac FROM animales a{donde} ORDER BY a.id{limite}'
+        return sql, parametros + parametros_limite
+
+    def sql_eventos(self):
+        # Retorna (sql, parámetros) de la búsqueda de eventos con los datos de su animal
+        condiciones, parametros = self._condiciones_sql(CRITERIOS_ANIMAL + CRITERIOS_EVENTO)
+        donde = ' WHERE ' + ' AND '.join(condiciones) if condiciones else ''
+        limite, parametros_limite = self._limite_sql()
+        sql = ('SELECT a.id, a.especie, a.peso, a.fecha_nac, e.tipo, e.fecha, e.medicamento '
+            f'FROM eventos_sanitarios e JOIN animales a ON a.id = e.animal_id{donde} '
+            f'ORDER BY e.fecha, e.id{limite}')
+        return sql, parametros + parametros_limite
+
+    # --- Memoria ---
+
+    def predicado_animal(self):
+        # Compila los criterios de animal en una sola función animal -> bool
+        c = self.criterios
+        pruebas = []
+        if 'especie' in c:
+            pruebas.append(lambda a, v=c['especie']: a.especie == v)
+        if 'peso_min' in c:
+            pruebas.append(lambda a, v=c['peso_min']: a.peso is not None and a.peso >= v)
+        if 'peso_max' in c:
+            pruebas.append(lambda a, v=c['peso_max']: a.peso is not None and a.peso <= v)
+        if 'nacido_desde' in c:
+            pruebas.append(lambda a, v=c['nacido_desde']: a.fecha_nac is not None and a.fecha_nac >= v)
+        if 'nacido_hasta' in c:
+            pruebas.append(lambda a, v=c['nacido_hasta']: a.fecha_nac is not None and a.fecha_nac <= v)
+        if not pruebas:
+            return lambda a: True
+        if len(pruebas) == 1:
+            return pruebas[0]
+        return lambda a: all(prueba(a) for prueba in pruebas)
+
+    def _candidatos(self):
+        # Animales por revisar, usando el índice más selectivo del sistema
+        sistema = self.origen
+        if 'animal_id' in self.criterios:
+            animal = sistema.buscar_animal(self.criterios['animal_id'])
+            return [animal] if animal else []
+        if 'especie' in self.criterios:
+            return sistema.animales_por_especie(self.criterios['especie'])
+        return list(sistema.animales)  # Copia: la lista cambia de orden al eliminar
+
+    def _posiciones_eventos(self, filtro_animal):
+        c = self.criterios
+        return self.origen.registros.buscar(EVENTO, c.get('tipo'), c.get('medicamento'),
+                                            c.get('desde'), c.get('hasta'), filtro_animal,
+                                            c.get('animal_id'))
+
+    def _animales_en_memoria(self):
+        # Ordenados por ID, como ORDER BY a.id
+        predicado = self.predicado_animal()
+        if not any(nombre in self.criterios for nombre in CRITERIOS_EVENTO):
+            return self._ordenar(filter(predicado, self._candidatos()), attrgetter('id'))
+        # Con criterios de eventos: los animales que tienen alguno
+        registros = self.origen.registros
+        con_evento = {registros.animal_de(i).id for i in self._posiciones_eventos(None)}
+        return self._ordenar((a for a in self._candidatos() if a.id in con_evento and predicado(a)),
+                            attrgetter('id'))
+
+    # --- Resultados ---
+
     def buscar_animal(self):
-        # Busca animales según los criterios establecidos
-        pass
-    
+        # Busca animales según los criterios establecidos (iterador de Animal)
+        if self._en_memoria():
+            return self._recortar(self._animales_en_memoria())
+        sql, parametros = self.sql_animales()
+        cursor = self.origen.get_connection().execute(sql, parametros)
+        return map(Animal.from_row, cursor)
+
     def filtrar_eventos(self):
-        # Filtra eventos sanitarios basados en criterios
-        pass
-    
+        # Filtra eventos sanitarios basados en criterios (iterador de Registro con animal y evento)
+        if self._en_memoria():
+            registros = self.origen.registros
+            # Por fecha y luego por orden de registro, como ORDER BY e.fecha, e.id
+            # (los registros sin fecha van primero, como NULL en SQLite)
+            posiciones = self._ordenar(self._posiciones_eventos(self.predicado_animal()),
+                                       lambda i: (registros.fecha[i], i))
+            return (registros[i] for i in self._recortar(posiciones))
+        sql, parametros = self.sql_eventos()
+        cursor = self.origen.get_connection().execute(sql, parametros)
+        return (Registro(Animal.from_row(fila[:4]), evento=EventoSanitario.from_row(fila[4:]))
+                for fila in cursor)
+
     def generar_reporte(self):
-        # Genera un reporte con estadísticas del sistema
-        pass
+        # Genera un reporte con estadísticas de los animales y eventos que cumplen los criterios
+        sin_limite = self.limitar(None)
+        por_especie = {}
+        for animal in sin_limite.buscar_animal():
+            cantidad, peso_total, con_peso = por_especie.get(animal.especie, (0, 0.0, 0))
+            if animal.peso is not None:
+                peso_total += animal.peso
+                con_peso += 1
+            por_especie[animal.especie] = (cantidad + 1, peso_total, con_peso)
+        eventos_por_tipo = {}
+        for registro in sin_limite.filtrar_eventos():
+            tipo = registro.evento.tipo
+            eventos_por_tipo[tipo] = eventos_por_tipo.get(tipo, 0) + 1
+        return {
+            'criterios': dict(self.criterios),
+            'animales': sum(cantidad for cantidad, _, _ in por_especie.values()),
+            'por_especie': {especie: {'cantidad': cantidad,
+                                    'peso_promedio': peso_total / con_peso if con_peso else None}
+                            for especie, (cantidad, peso_total, con_peso) in sorted(por_especie.items())},
+            'eventos': sum(eventos_por_tipo.values()),
+            'eventos_por_tipo': dict(sorted(eventos_por_tipo.items())),
+        }
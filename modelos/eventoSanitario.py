@@ -1,7 +1,23 @@
 
 
-class EventoSanitario:
-    def __init__(self):
-        self.tipo = None          # Tipo de evento (vacunación, desparasitación, etc.)
-        self.fecha = None         # Fecha cuando se realizó el evento
-        self.medicamento = None   # Medicamento utilizado en el tratamiento
+from datetime import date
+from modelos.modelo import Modelo, a_texto_fecha
+
+class EventoSanitario(Modelo):
+    __slots__ = campos = ('tipo', 'fecha', 'medicamento')
+
+    def __init__(self, tipo=None, fecha=None, medicamento=None):
+        self.tipo = tipo                # Tipo de evento (vacunación, desparasitación, etc.)
+        self.fecha = fecha              # Fecha cuando se realizó el evento
+        self.medicamento = medicamento  # Medicamento utilizado en el tratamiento
+
+    @classmethod
+    def from_row(cls, fila):
+        # Crea el evento desde las columnas (tipo, fecha, medicamento) de eventos_sanitarios
+        tipo, fecha, medicamento = fila
+        if fecha.__class__ is str:
+            fecha = date.fromisoformat(fecha)
+        return cls(tipo, fecha, medicamento)
+
+    def to_row(self):
+        return (self.tipo, a_texto_fecha(self.fecha), self.medicamento)
@@ -0,0 +1,82 @@
+
+
+import gc
+from datetime import date
+
+def a_texto_fecha(valor):
+    # Convierte una date al texto AAAA-MM-DD que se guarda en SQLite
+    return valor.isoformat() if isinstance(valor, date) else valor
+
+class Modelo:
+    # Base de los modelos: los atributos van en __slots__ (sin __dict__ por
+    # instancia) y se muestran por sus campos.
+    # Cada modelo define: __slots__ = campos = ('campo1', 'campo2', ...)
+    __slots__ = ()
+    campos = ()
+    _inmutables = {}
+
+    def __repr__(self):
+        campos = ', '.join(f"{nombre}={getattr(self, nombre, None)!r}" for nombre in self.campos)
+        return f"{type(self).__name__}({campos})"
+
+    @classmethod
+    def from_rows(cls, filas):
+        # Crea un modelo por fila (con from_row). El recolector de ciclos se
+        # pausa mientras tanto: revisaría millones de objetos recién creados
+        # que no forman ciclos.
+        activo = gc.isenabled()
+        gc.disable()
+        try:
+            return list(map(cls.from_row, filas))
+        finally:
+            if activo:
+                gc.enable()
+
+    def valores(self):
+        return tuple(getattr(self, nombre, None) for nombre in self.campos)
+
+    def to_dict(self):
+        return {nombre: getattr(self, nombre, None) for nombre in self.campos}
+
+    @classmethod
+    def inmutable(cls):
+        # Retorna la versión congelada de la clase: los campos se fijan en el
+        # constructor y luego no se pueden cambiar. Sus instancias se comparan
+        # por valor y sirven como claves de diccionario.
+        clase = Modelo._inmutables.get(cls)
+        if clase is None:
+            iniciar = cls.__init__
+            asignar = object.__setattr__
+
+            def __init__(self, *args, **kwargs):
+                # El constructor de la clase base arma una copia mutable y sus
+                # campos se pasan a esta instancia sin pasar por __setattr__
+                base = cls.__new__(cls)
+                iniciar(base, *args, **kwargs)
+                for nombre in cls.campos:
+                    asignar(self, nombre, getattr(base, nombre))
+
+            def __setattr__(self, nombre, valor):
+                raise AttributeError(f"{type(self).__name__} es inmutable: no se puede cambiar {nombre}")
+
+            def __delattr__(self, nombre):
+                raise AttributeError(f"{type(self).__name__} es inmutable: no se puede borrar {nombre}")
+
+            def __eq__(self, otro):
+                if not isinstance(otro, Modelo) or otro.campos != self.campos:
+                    return NotImplemented
+                return self.valores() == otro.valores()
+
+            def __hash__(self):
+                return hash(self.valores())
+
+            clase = type(f"{cls.__name__}Inmutable", (cls,), {
+                '__slots__': (),
+                '__init__': __init__,
+                '__setattr__': __setattr__,
+                '__delattr__': __delattr__,
+                '__eq__': __eq__,
+                '__hash__': __hash__,
+            })
+            Modelo._inmutables[cls] = clase
+        return clase
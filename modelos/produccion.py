@@ -1,7 +1,23 @@
 
 
-class Produccion:
-    def __init__(self):
-        self.tipo = None      # Tipo de producción (leche, carne, etc.)
-        self.cantidad = None  # Cantidad producida (litros, kg, etc.)
-        self.fecha = None     # Fecha de la producción
+from datetime import date
+from modelos.modelo import Modelo, a_texto_fecha
+
+class Produccion(Modelo):
+    __slots__ = campos = ('tipo', 'cantidad', 'fecha')
+
+    def __init__(self, tipo=None, cantidad=None, fecha=None):
+        self.tipo = tipo          # Tipo de producción (leche, carne, etc.)
+        self.cantidad = cantidad  # Cantidad producida (litros, kg, etc.)
+        self.fecha = fecha        # Fecha de la producción
+
+    @classmethod
+    def from_row(cls, fila):
+        # Crea la producción desde las columnas (tipo, cantidad, fecha) de la tabla produccion
+        tipo, cantidad, fecha = fila
+        if fecha.__class__ is str:
+            fecha = date.fromisoformat(fecha)
+        return cls(tipo, cantidad, fecha)
+
+    def to_row(self):
+        return (self.tipo, self.cantidad, a_texto_fecha(self.fecha))
@@ -1,7 +1,11 @@
 
 
-class Registro:
-    def __init__(self):
-        self.animal = None      # Animal asociado al registro
-        self.evento = None      # Evento sanitario (opcional)
-        self.produccion = None  # Datos de producción (opcional)
+from modelos.modelo import Modelo
+
+class Registro(Modelo):
+    __slots__ = campos = ('animal', 'evento', 'produccion')
+
+    def __init__(self, animal=None, evento=None, produccion=None):
+        self.animal = animal          # Animal asociado al registro
+        self.evento = evento          # Evento sanitario (opcional)
+        self.produccion = produccion  # Datos de producción (opcional)
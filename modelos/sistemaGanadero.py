@@ -1,16 +1,53 @@
 
 
-from modelos.registro import Registro
+from modelos.almacenRegistros import AlmacenRegistros
 
 class SistemaGanadero:
     def __init__(self):
         self.animales = []      # Lista de todos los animales del sistema
         self.veterinarios = []  # Lista de veterinarios registrados
-        self.registros = []     # Historial de todos los registros
+        self.registros = AlmacenRegistros()  # Historial de todos los registros (por columnas)
+        # Índices para no recorrer la lista de animales en cada búsqueda
+        self._posiciones = {}   # id del animal -> posición en self.animales
+        self._por_especie = {}  # especie -> {id del animal: animal}
+        self._especie_de = {}   # id del animal -> especie con que se indexó (puede cambiar después)
     
     def agregar_animal(self, animal):
-        # Agrega un nuevo animal al sistema ganadero
+        # Agrega un nuevo animal al sistema ganadero; el ID no puede repetirse
+        if animal.id in self._posiciones:
+            raise ValueError(f"Ya existe un animal con ID {animal.id}")
+        self._posiciones[animal.id] = len(self.animales)
         self.animales.append(animal)
+        self._por_especie.setdefault(animal.especie, {})[animal.id] = animal
+        self._especie_de[animal.id] = animal.especie
+    
+    def buscar_animal(self, animal_id):
+        # Retorna el animal con ese ID, o None si no está registrado
+        posicion = self._posiciones.get(animal_id)
+        return None if posicion is None else self.animales[posicion]
+    
+    def animales_por_especie(self, especie):
+        # Retorna los animales de una especie en el orden en que se agregaron
+        return list(self._por_especie.get(especie, {}).values())
+    
+    def eliminar_animal(self, animal_id):
+        # Quita un animal sin recorrer la lista: el último ocupa su lugar.
+        # Sus registros se conservan en el historial.
+        posicion = self._posiciones.pop(animal_id, None)
+        if posicion is None:
+            return None
+        animal = self.animales[posicion]
+        ultimo = self.animales.pop()
+        if ultimo is not animal:
+            self.animales[posicion] = ultimo
+            self._posiciones[ultimo.id] = posicion
+        # Se usa la especie con que se agregó: animal.especie pudo cambiar después
+        especie = self._especie_de.pop(animal_id)
+        de_especie = self._por_especie[especie]
+        del de_especie[animal_id]
+        if not de_especie:
+            del self._por_especie[especie]
+        return animal
     
     def agregar_veterinario(self, veterinario):
         # Agrega un veterinario al sistema
@@ -18,26 +55,21 @@ class SistemaGanadero:
     
     def registrar_evento(self, animal_id, evento):
         # Registra un evento sanitario para un animal
-        animal = next((a for a in self.animales if a.id == animal_id), None)
+        animal = self.buscar_animal(animal_id)
         if animal:
-            registro = Registro()
-            registro.animal = animal
-            registro.evento = evento
-            self.registros.append(registro)
+            self.registros.agregar_evento(animal, evento)
     
     def registrar_produccion(self, animal_id, produccion):
         # Registra datos de producción de un animal
-        animal = next((a for a in self.animales if a.id == animal_id), None)
+        animal = self.buscar_animal(animal_id)
         if animal:
-            registro = Registro()
-            registro.animal = animal
-            registro.produccion = produccion
-            self.registros.append(registro)
+            self.registros.agregar_produccion(animal, produccion)
     
     def consultar_datos(self):
         # Consulta y retorna datos del sistema
         return {
             'animales': len(self.animales),
             'veterinarios': len(self.veterinarios),
-            'registros': len(self.registros)
-        }
\ No newline at end of file
+            'registros': len(self.registros),
+            'por_especie': {especie: len(animales) for especie, animales in self._por_especie.items()}
+        }
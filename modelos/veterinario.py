@@ -1,10 +1,23 @@
 
 
-class Veterinario:
-    def __init__(self):
-        self.nombre = None        # Nombre completo del veterinario
-        self.especialidad = None  # Área de especialización
-        self.eventos = None       # Lista de eventos realizados
+from modelos.modelo import Modelo
+
+class Veterinario(Modelo):
+    __slots__ = campos = ('id', 'nombre', 'especialidad', 'eventos')
+    
+    def __init__(self, nombre=None, especialidad=None, eventos=None, id=None):
+        self.id = id                      # ID en la tabla veterinarios (None si no se guardó)
+        self.nombre = nombre              # Nombre completo del veterinario
+        self.especialidad = especialidad  # Área de especialización
+        self.eventos = eventos            # Lista de eventos realizados
+    
+    @classmethod
+    def from_row(cls, fila):
+        # Crea el veterinario desde una fila (id, nombre, especialidad) de la tabla veterinarios
+        return cls(fila[1], fila[2], [], fila[0])
+    
+    def to_row(self):
+        return (self.id, self.nombre, self.especialidad)
     
     def agregar_evento(self):
         # Agrega un nuevo evento a la lista del veterinario
@@ -0,0 +1,110 @@
+# Protocolo del chat de soporte
+#
+# Cada mensaje viaja como una trama: 4 bytes con el largo (big-endian) seguidos
+# del texto en UTF-8. Así varios mensajes pueden ir en un mismo envío y un
+# mensaje largo puede llegar en varios recv() sin mezclarse ni cortarse.
+#
+# Al conectarse, el cliente envía como primera trama el saludo
+# "GANADERO/<versión> <nickname>" en lugar del nickname solo.
+
+import asyncio
+import struct
+import threading
+from collections import deque
+
+VERSION_PROTOCOLO = 1
+PREFIJO_SALUDO = "GANADERO/"
+TAMANO_MAXIMO = 64 * 1024   # Largo máximo de una trama en bytes
+ENCABEZADO = struct.Struct('!I')
+
+class ErrorProtocolo(Exception):
+    """Trama inválida o saludo con versión no soportada"""
+
+def empaquetar(mensaje):
+    """Convierte un texto en una trama lista para enviar"""
+    datos = mensaje.encode('utf-8')
+    if len(datos) > TAMANO_MAXIMO:
+        raise ErrorProtocolo(f"Mensaje demasiado largo ({len(datos)} bytes)")
+    return ENCABEZADO.pack(len(datos)) + datos
+
+def empaquetar_varios(mensajes):
+    """Une varias tramas en un solo bloque de bytes (un solo envío)"""
+    return b''.join(empaquetar(m) for m in mensajes)
+
+def crear_saludo(nickname):
+    return f"{PREFIJO_SALUDO}{VERSION_PROTOCOLO} {nickname}"
+
+def interpretar_saludo(texto):
+    """Valida el saludo del cliente y retorna el nickname"""
+    if texto is None or not texto.startswith(PREFIJO_SALUDO):
+        raise ErrorProtocolo("Saludo inválido")
+    version, _, nickname = texto[len(PREFIJO_SALUDO):].partition(' ')
+    if version != str(VERSION_PROTOCOLO):
+        raise ErrorProtocolo(f"Versión de protocolo no soportada: {version}")
+    nickname = nickname.strip()
+    if not nickname:
+        raise ErrorProtocolo("Nickname vacío")
+    return nickname
+
+class LectorMensajes:
+    """Decodificador incremental: recibe bytes sueltos y entrega mensajes completos"""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def alimentar(self, datos):
+        self.buffer += datos
+        mensajes = []
+        while len(self.buffer) >= ENCABEZADO.size:
+            (largo,) = ENCABEZADO.unpack_from(self.buffer)
+            if largo > TAMANO_MAXIMO:
+                raise ErrorProtocolo(f"Trama demasiado larga ({largo} bytes)")
+            fin = ENCABEZADO.size + largo
+            if len(self.buffer) < fin:
+                break
+            mensajes.append(self.buffer[ENCABEZADO.size:fin].decode('utf-8'))
+            del self.buffer[:fin]
+        return mensajes
+
+class ConexionMensajes:
+    """Envuelve un socket bloqueante con envío por tramas y lectura con buffer"""
+    def __init__(self, sock, tamano_lectura=65536):
+        self.sock = sock
+        self.tamano_lectura = tamano_lectura
+        self.lector = LectorMensajes()
+        self.pendientes = deque()
+        self._lock_envio = threading.Lock()  # Evita que dos hilos mezclen sus tramas
+
+    def enviar(self, mensaje):
+        self.enviar_bytes(empaquetar(mensaje))
+
+    def enviar_varios(self, mensajes):
+        self.enviar_bytes(empaquetar_varios(mensajes))
+
+    def enviar_bytes(self, datos):
+        with self._lock_envio:
+            self.sock.sendall(datos)
+
+    def recibir(self):
+        """Retorna el siguiente mensaje completo, o None si el otro extremo cerró"""
+        while not self.pendientes:
+            datos = self.sock.recv(self.tamano_lectura)
+            if not datos:
+                return None
+            self.pendientes.extend(self.lector.alimentar(datos))
+        return self.pendientes.popleft()
+
+    def hay_pendientes(self):
+        """True si ya hay mensajes decodificados esperando (sin tocar el socket)"""
+        return bool(self.pendientes)
+
+async def leer_mensaje(reader):
+    """Lee una trama de un StreamReader de asyncio; None si la conexión se cerró"""
+    try:
+        encabezado = await reader.readexactly(ENCABEZADO.size)
+        (largo,) = ENCABEZADO.unpack(encabezado)
+        if largo > TAMANO_MAXIMO:
+            raise ErrorProtocolo(f"Trama demasiado larga ({largo} bytes)")
+        datos = await reader.readexactly(largo)
+    except asyncio.IncompleteReadError:
+        return None
+    return datos.decode('utf-8')
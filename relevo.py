@@ -0,0 +1,171 @@
+# Relevo local entre procesos del servidor de soporte
+#
+# Para atender más clientes se pueden lanzar varios servidores en distintos
+# puertos. Cada uno se conecta al relevo (TCP en loopback) como un cliente más
+# del protocolo, con el nickname "servidor-<host:puerto>", y le envía en tramas
+# JSON los mensajes de cada sala y cuántos miembros tiene en cada una. El
+# relevo reenvía cada trama a los demás servidores, que la entregan solo a sus
+# miembros de esa sala: las salas quedan iguales en todos los procesos.
+#
+# Tramas:
+#   {"tipo": "mensaje", "origen": ..., "sala": ..., "texto": ..., "chat": [momento, nickname, texto] | null}
+#   {"tipo": "miembros", "origen": ..., "conteos": {sala: cantidad}}
+#   {"tipo": "salida", "origen": ...}     (la genera el relevo cuando un servidor se desconecta)
+#
+# Cada servidor conectado tiene su cola de salida acotada (difusion.py): si un
+# servidor deja de leer y su cola se llena, el relevo lo desconecta sin frenar
+# al resto. Al reconectarse vuelve a recibir los miembros de los demás.
+
+import argparse
+import asyncio
+import json
+from cliente_reconectable import CONECTADO, RECONECTANDO, ClienteReconectable
+from difusion import ColaSalidaAsync, registrar_metricas_difusion
+from metricas import RegistroMetricas
+from protocolo import ErrorProtocolo, empaquetar, interpretar_saludo, leer_mensaje
+
+PUERTO_RELEVO = 5900
+TAMANO_COLA_RELEVO = 10000   # Tramas pendientes por servidor (lleva el tráfico de todas sus salas)
+
+def direccion_relevo(texto):
+    """Interpreta 'PUERTO' o 'HOST:PUERTO' (el host por defecto es localhost)"""
+    host, _, puerto = str(texto).rpartition(':')
+    return (host or 'localhost', int(puerto))
+
+class RelevoSalas:
+    """Reenvía las tramas de cada servidor a todos los demás"""
+    def __init__(self, host='localhost', port=PUERTO_RELEVO, tamano_cola=TAMANO_COLA_RELEVO):
+        self.host = host
+        self.port = port
+        self.tamano_cola = tamano_cola
+        self.servidores = {}    # origen -> ColaSalidaAsync
+        self.miembros = {}      # origen -> última trama de miembros (para quien se conecta después)
+        self.reenviadas = 0
+        self.metricas = RegistroMetricas()
+        self.metricas_difusion = registrar_metricas_difusion(
+            self.metricas, lambda: list(self.servidores.values()))
+
+    async def ejecutar(self):
+        servidor = await asyncio.start_server(self.atender, self.host, self.port, reuse_address=True)
+        print(f"Relevo de salas escuchando en {self.host}:{self.port}")
+        async with servidor:
+            await servidor.serve_forever()
+
+    def _enviar_a_otros(self, origen, trama):
+        # Solo encola: nunca espera a que otro servidor lea
+        for otro, cola in list(self.servidores.items()):
+            if otro != origen and cola.encolar(trama):
+                self.reenviadas += 1
+
+    def _desconectar_lento(self, origen, writer):
+        print(f"Servidor lento desconectado del relevo: {origen}")
+        writer.transport.abort()  # atender() termina y avisa la salida a los demás
+
+    async def atender(self, reader, writer):
+        try:
+            origen = interpretar_saludo(await asyncio.wait_for(leer_mensaje(reader), 5))
+        except (ErrorProtocolo, UnicodeDecodeError, ConnectionError, asyncio.TimeoutError):
+            writer.close()
+            return
+
+        anterior = self.servidores.get(origen)
+        if anterior:
+            anterior.writer.transport.abort()  # El mismo servidor reconectó antes de que se notara el corte
+        cola = ColaSalidaAsync(writer, self.metricas_difusion,
+                            al_desbordar=lambda: self._desconectar_lento(origen, writer),
+                            tamano=self.tamano_cola)
+        self.servidores[origen] = cola
+        print(f"Servidor conectado al relevo: {origen}")
+        for otro, texto in list(self.miembros.items()):
+            if otro != origen:
+                cola.encolar(empaquetar(texto))
+
+        try:
+            while True:
+                texto = await leer_mensaje(reader)
+                if texto is None:
+                    break
+                try:
+                    datos = json.loads(texto)
+                except ValueError:
+                    continue
+                if datos.get('tipo') == 'miembros':
+                    self.miembros[origen] = texto
+                self._enviar_a_otros(origen, empaquetar(texto))
+                # Con tramas ya en el buffer la lectura no cede el loop: se cede
+                # para que corran las tareas que escriben a los demás servidores
+                await asyncio.sleep(0)
+        except (ConnectionError, ErrorProtocolo, UnicodeDecodeError):
+            pass
+        finally:
+            cola.cerrar()
+            if self.servidores.get(origen) is cola:
+                del self.servidores[origen]
+                self.miembros.pop(origen, None)
+                self._enviar_a_otros(origen, empaquetar(json.dumps({'tipo': 'salida', 'origen': origen})))
+                print(f"Servidor desconectado del relevo: {origen}")
+            writer.transport.abort()
+
+class ClienteRelevo:
+    """Conexión de un servidor de soporte con el relevo; se reconecta sola si se corta"""
+    def __init__(self, direccion, origen, al_mensaje, salas):
+        self.origen = origen
+        self.al_mensaje = al_mensaje    # al_mensaje(sala, texto, chat), desde el hilo del cliente
+        self.salas = salas              # RegistroSalas donde se anotan los miembros de los demás
+        self._conteos = {}
+        host, port = direccion
+        self.cliente = ClienteReconectable(host, port, f"servidor-{origen}", self._recibir,
+                                        self._cambio_estado, tamano_buffer=10000)
+
+    def iniciar(self):
+        self.cliente.iniciar()
+
+    def publicar(self, sala, texto, chat=None):
+        """Envía un mensaje de sala a los demás procesos; sin relevo solo se entrega localmente"""
+        if not self.cliente.en_linea:
+            return  # No se guardan para después: llegarían fuera de orden y tarde
+        try:
+            self.cliente.enviar(json.dumps({'tipo': 'mensaje', 'origen': self.origen,
+                                            'sala': sala, 'texto': texto, 'chat': chat}))
+        except ErrorProtocolo as e:
+            print(f"Mensaje no enviado al relevo: {e}")
+
+    def publicar_miembros(self, conteos):
+        self._conteos = conteos
+        self.cliente.enviar(json.dumps({'tipo': 'miembros', 'origen': self.origen, 'conteos': conteos}))
+
+    def detener(self):
+        self.cliente.detener(despedida=None)
+
+    def _cambio_estado(self, estado):
+        if estado == CONECTADO:
+            # El relevo pudo reiniciarse y olvidar cuántos miembros tenemos
+            self.publicar_miembros(self._conteos)
+        elif estado == RECONECTANDO:
+            self.salas.remotos.clear()  # Los conteos de los demás se reciben de nuevo al reconectar
+
+    def _recibir(self, texto):
+        try:
+            datos = json.loads(texto)
+        except ValueError:
+            return
+        tipo = datos.get('tipo')
+        if tipo == 'mensaje':
+            self.al_mensaje(datos['sala'], datos['texto'], datos.get('chat'))
+        elif tipo == 'miembros':
+            self.salas.remotos[datos['origen']] = datos['conteos']
+        elif tipo == 'salida':
+            self.salas.remotos.pop(datos['origen'], None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Relevo de salas entre procesos del servidor de soporte")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--puerto', type=int, default=PUERTO_RELEVO)
+    args = parser.parse_args()
+    try:
+        asyncio.run(RelevoSalas(args.host, args.puerto).ejecutar())
+    except KeyboardInterrupt:
+        print("\nRelevo detenido")
+
+if __name__ == "__main__":
+    main()
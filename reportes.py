@@ -3,100 +3,225 @@ from datetime import datetime
 import tkinter as tk
 from tkinter import ttk
 from database import Database
+from trabajador import TrabajadorFondo
+
+# Consultas de los reportes (auditoria_consultas.py verifica sus planes de ejecución)
+# Las consultas de producción leen las tablas de resumen (ver ROLLUPS_PRODUCCION en
+# database.py), así su costo depende de la cantidad de meses y no de las lecturas.
+CONSULTA_PRODUCCION_POR_TIPO = '''
+    SELECT tipo, SUM(total), SUM(registros) 
+    FROM produccion_mensual_tipo 
+    GROUP BY tipo
+'''
+
+CONSULTA_PRODUCCION_MENSUAL = '''
+    SELECT mes, SUM(total)
+    FROM produccion_mensual_tipo 
+    GROUP BY mes 
+    ORDER BY mes
+'''
+
+CONSULTA_TOP_ANIMALES = '''
+    SELECT a.id, a.especie, SUM(m.total) as total
+    FROM produccion_mensual m
+    JOIN animales a ON m.animal_id = a.id
+    GROUP BY a.id 
+    ORDER BY total DESC 
+    LIMIT 5
+'''
+
+CONSULTA_EVENTOS_POR_TIPO = '''
+    SELECT tipo, COUNT(*), GROUP_CONCAT(DISTINCT medicamento)
+    FROM eventos_sanitarios 
+    GROUP BY tipo
+'''
+
+CONSULTA_VETERINARIOS_ACTIVOS = '''
+    SELECT v.nombre, COUNT(e.id) as total_eventos
+    FROM eventos_sanitarios e
+    JOIN veterinarios v ON e.veterinario_id = v.id
+    GROUP BY v.id 
+    ORDER BY total_eventos DESC
+'''
+
+CONSULTA_DETALLE_PRODUCCION = '''
+    SELECT animal_id, fecha, tipo, cantidad
+    FROM produccion
+    ORDER BY animal_id, fecha
+'''
+
+CONSULTAS_REPORTES = {
+    'produccion_por_tipo': CONSULTA_PRODUCCION_POR_TIPO,
+    'produccion_mensual': CONSULTA_PRODUCCION_MENSUAL,
+    'top_animales': CONSULTA_TOP_ANIMALES,
+    'eventos_por_tipo': CONSULTA_EVENTOS_POR_TIPO,
+    'veterinarios_activos': CONSULTA_VETERINARIOS_ACTIVOS,
+    'detalle_produccion': CONSULTA_DETALLE_PRODUCCION,
+}
+
+# Líneas que se insertan en el widget de texto por cada página
+LINEAS_POR_PAGINA = 500
+
+def seccion(titulo, filas, formato):
+    """Genera el título de una sección y una línea por fila, leyendo el cursor de a poco"""
+    yield f"{titulo}\n"
+    for fila in filas:
+        yield formato(*fila)
+
+def escribir_reporte(lineas, destino, tarea=None):
+    """Escribe las líneas en un archivo (ruta) o en cualquier objeto con write().
+
+    Si se pasa una Tarea (ver trabajador.py) informa el progreso y permite cancelar.
+    """
+    if isinstance(destino, str):
+        with open(destino, 'w', encoding='utf-8') as archivo:
+            return escribir_reporte(lineas, archivo, tarea)
+    total = 0
+    for linea in lineas:
+        destino.write(linea)
+        total += 1
+        if tarea and total % 5000 == 0:
+            tarea.verificar_cancelacion()
+            tarea.informar_progreso(total)
+    return total
+
+def lineas_reporte_general(db):
+    """Reporte general del sistema, línea por línea"""
+    resumen = db.obtener_resumen()
+    conn = db.get_connection()
+
+    yield "=== REPORTE GANADERO ===\n\n"
+    yield f"Total animales: {resumen['animales']}\n"
+    yield f"Total veterinarios: {resumen['veterinarios']}\n"
+    yield f"Total eventos: {resumen['eventos']}\n"
+    yield f"Registros producción: {resumen['produccion']}\n"
+    yield f"Producción total: {resumen['produccion_total']:.2f} unidades\n\n"
+
+    if resumen['produccion']:
+        yield from seccion("PRODUCCIÓN POR TIPO:",
+                        conn.execute('SELECT tipo, SUM(total) FROM produccion_mensual_tipo GROUP BY tipo'),
+                        lambda tipo, total: f"  {tipo}: {total:.2f}\n")
+
+    if resumen['veterinarios']:
+        yield "\n"
+        yield from seccion("VETERINARIOS:",
+                        conn.execute('SELECT nombre, especialidad FROM veterinarios'),
+                        lambda nombre, especialidad: f"  {nombre} - {especialidad}\n")
+
+class VisorPaginado:
+    """Muestra un reporte en un widget Text cargando una página más al llegar al final.
+
+    Con un TrabajadorFondo las páginas se leen en el hilo de fondo y solo la
+    inserción en el widget ocurre en el hilo principal.
+    """
+    def __init__(self, text_widget, scrollbar, lineas, lineas_por_pagina=LINEAS_POR_PAGINA,
+                trabajador=None):
+        self.text_widget = text_widget
+        self.scrollbar = scrollbar
+        self.lineas = iter(lineas)
+        self.lineas_por_pagina = lineas_por_pagina
+        self.trabajador = trabajador
+        self.agotado = False
+        self.cargando = True
+        self.text_widget.configure(yscrollcommand=self.al_desplazar)
+        self.cargar_pagina()
+
+    def leer_pagina(self):
+        """Toma las siguientes líneas del generador; retorna (texto, agotado)"""
+        pagina = []
+        for linea in self.lineas:
+            pagina.append(linea)
+            if len(pagina) >= self.lineas_por_pagina:
+                return ''.join(pagina), False
+        return ''.join(pagina), True
+
+    def cargar_pagina(self):
+        if self.trabajador:
+            self.trabajador.ejecutar(self.leer_pagina, al_terminar=self.mostrar_pagina,
+                                    al_error=self.mostrar_error)
+        else:
+            self.mostrar_pagina(self.leer_pagina())
+
+    def mostrar_pagina(self, resultado):
+        """Inserta la página con una sola operación sobre el widget"""
+        texto, self.agotado = resultado
+        self.cargando = False
+        if texto and self.text_widget.winfo_exists():
+            self.text_widget.config(state='normal')
+            self.text_widget.insert('end', texto)
+            self.text_widget.config(state='disabled')
+
+    def mostrar_error(self, error):
+        self.mostrar_pagina((f"\nError generando el reporte: {error}\n", True))
+
+    def al_desplazar(self, inicio, fin):
+        self.scrollbar.set(inicio, fin)
+        if float(fin) >= 0.95 and not self.agotado and not self.cargando:
+            self.cargando = True
+            self.text_widget.after_idle(self.cargar_pagina)
 
 class GeneradorReportesSimple:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None, trabajador=None):
+        self.db = db or Database()
+        self.trabajador = trabajador  # TrabajadorFondo que lee las páginas de los reportes
     
-    def generar_reporte_produccion_texto(self):
-        """Genera reporte de producción en formato texto (sin gráficos)"""
+    def lineas_reporte_produccion(self):
+        """Genera el reporte de producción línea por línea (sin gráficos)"""
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        # Reporte básico de producción
-        reporte = "=== REPORTE DE PRODUCCIÓN ===\n\n"
+        yield "=== REPORTE DE PRODUCCIÓN ===\n\n"
         
         # Total producción por tipo
-        cursor.execute('''
-            SELECT tipo, SUM(cantidad), COUNT(*) 
-            FROM produccion 
-            GROUP BY tipo
-        ''')
-        produccion_por_tipo = cursor.fetchall()
-        
-        reporte += "PRODUCCIÓN POR TIPO:\n"
-        for tipo, total, conteo in produccion_por_tipo:
-            reporte += f"- {tipo}: {total:.2f} unidades ({conteo} registros)\n"
+        yield from seccion("PRODUCCIÓN POR TIPO:", conn.execute(CONSULTA_PRODUCCION_POR_TIPO),
+                        lambda tipo, total, conteo: f"- {tipo}: {total:.2f} unidades ({conteo} registros)\n")
         
         # Producción mensual
-        cursor.execute('''
-            SELECT strftime('%Y-%m', fecha) as mes, SUM(cantidad)
-            FROM produccion 
-            GROUP BY mes 
-            ORDER BY mes
-        ''')
-        produccion_mensual = cursor.fetchall()
-        
-        reporte += "\nPRODUCCIÓN MENSUAL:\n"
-        for mes, total in produccion_mensual:
-            reporte += f"- {mes}: {total:.2f} unidades\n"
+        yield "\n"
+        yield from seccion("PRODUCCIÓN MENSUAL:", conn.execute(CONSULTA_PRODUCCION_MENSUAL),
+                        lambda mes, total: f"- {mes}: {total:.2f} unidades\n")
         
         # Top animales productivos
-        cursor.execute('''
-            SELECT a.id, a.especie, SUM(p.cantidad) as total
-            FROM produccion p
-            JOIN animales a ON p.animal_id = a.id
-            GROUP BY a.id 
-            ORDER BY total DESC 
-            LIMIT 5
-        ''')
-        top_animales = cursor.fetchall()
-        
-        reporte += "\nTOP 5 ANIMALES MÁS PRODUCTIVOS:\n"
-        for i, (id_animal, especie, total) in enumerate(top_animales, 1):
-            reporte += f"{i}. {id_animal} ({especie}): {total:.2f} unidades\n"
-        
-        conn.close()
-        return reporte
+        yield "\nTOP 5 ANIMALES MÁS PRODUCTIVOS:\n"
+        for i, (id_animal, especie, total) in enumerate(conn.execute(CONSULTA_TOP_ANIMALES), 1):
+            yield f"{i}. {id_animal} ({especie}): {total:.2f} unidades\n"
     
-    def generar_reporte_sanitario_texto(self):
-        """Genera reporte sanitario en formato texto"""
+    def lineas_reporte_sanitario(self):
+        """Genera el reporte sanitario línea por línea"""
         conn = self.db.get_connection()
-        cursor = conn.cursor()
         
-        reporte = "=== REPORTE SANITARIO ===\n\n"
+        yield "=== REPORTE SANITARIO ===\n\n"
         
         # Eventos por tipo
-        cursor.execute('''
-            SELECT tipo, COUNT(*), GROUP_CONCAT(DISTINCT medicamento)
-            FROM eventos_sanitarios 
-            GROUP BY tipo
-        ''')
-        eventos_por_tipo = cursor.fetchall()
-        
-        reporte += "EVENTOS SANITARIOS POR TIPO:\n"
-        for tipo, conteo, medicamentos in eventos_por_tipo:
-            reporte += f"- {tipo}: {conteo} eventos (Medicamentos: {medicamentos})\n"
+        yield from seccion("EVENTOS SANITARIOS POR TIPO:", conn.execute(CONSULTA_EVENTOS_POR_TIPO),
+                        lambda tipo, conteo, medicamentos: f"- {tipo}: {conteo} eventos (Medicamentos: {medicamentos})\n")
         
         # Veterinarios más activos
-        cursor.execute('''
-            SELECT v.nombre, COUNT(e.id) as total_eventos
-            FROM eventos_sanitarios e
-            JOIN veterinarios v ON e.veterinario_id = v.id
-            GROUP BY v.id 
-            ORDER BY total_eventos DESC
-        ''')
-        veterinarios_activos = cursor.fetchall()
-        
-        reporte += "\nVETERINARIOS MÁS ACTIVOS:\n"
-        for nombre, total in veterinarios_activos:
-            reporte += f"- {nombre}: {total} eventos\n"
-        
-        conn.close()
-        return reporte
+        yield "\n"
+        yield from seccion("VETERINARIOS MÁS ACTIVOS:", conn.execute(CONSULTA_VETERINARIOS_ACTIVOS),
+                        lambda nombre, total: f"- {nombre}: {total} eventos\n")
+    
+    def lineas_detalle_produccion(self):
+        """Lista cada lectura de producción; pensado para exportar a archivo o ver por páginas"""
+        conn = self.db.get_connection()
+        
+        yield "=== DETALLE DE PRODUCCIÓN ===\n\n"
+        yield from seccion("ANIMAL | FECHA | TIPO | CANTIDAD", conn.execute(CONSULTA_DETALLE_PRODUCCION),
+                        lambda animal_id, fecha, tipo, cantidad: f"{animal_id} | {fecha} | {tipo} | {cantidad:.2f}\n")
+    
+    def generar_reporte_produccion_texto(self):
+        """Genera reporte de producción en formato texto (sin gráficos)"""
+        return ''.join(self.lineas_reporte_produccion())
+    
+    def generar_reporte_sanitario_texto(self):
+        """Genera reporte sanitario en formato texto"""
+        return ''.join(self.lineas_reporte_sanitario())
+
+    def exportar_reporte(self, lineas, ruta):
+        """Escribe un reporte directamente a un archivo sin armarlo en memoria"""
+        return escribir_reporte(lineas, ruta)
 
     def mostrar_reporte_en_ventana(self, titulo, contenido):
-        """Muestra el reporte en una ventana de texto"""
+        """Muestra el reporte en una ventana de texto (texto completo o líneas por páginas)"""
         ventana = tk.Toplevel()
         ventana.title(titulo)
         ventana.geometry("600x400")
@@ -106,10 +231,16 @@ class GeneradorReportesSimple:
         
         text_widget = tk.Text(frame, wrap='word')
         scrollbar = ttk.Scrollbar(frame, orient='vertical', command=text_widget.yview)
-        text_widget.configure(yscrollcommand=scrollbar.set)
         
-        text_widget.insert('1.0', contenido)
-        text_widget.config(state='disabled') 
+        if isinstance(contenido, str):
+            contenido = [contenido]
+        # Las páginas se leen de la base en un hilo de fondo, no en el de Tk
+        trabajador = self.trabajador
+        if trabajador is None:
+            # Trabajador propio de la ventana: se detiene al cerrarla y cierra su conexión
+            trabajador = TrabajadorFondo(ventana, al_salir=self.db.cerrar_conexion_del_hilo)
+            ventana.bind('<Destroy>', lambda e: trabajador.detener() if e.widget is ventana else None)
+        ventana.visor = VisorPaginado(text_widget, scrollbar, contenido, trabajador=trabajador)
         
         text_widget.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
@@ -142,40 +273,21 @@ class InterfazGanaderaSimple:
         self.frame_reporte.pack(fill='both', expand=True, padx=10, pady=10)
     
     def mostrar_reporte_produccion(self):
-        contenido = self.reportes.generar_reporte_produccion_texto()
+        contenido = self.reportes.lineas_reporte_produccion()
         self.reportes.mostrar_reporte_en_ventana("Reporte de Producción", contenido)
     
     def mostrar_reporte_sanitario(self):
-        contenido = self.reportes.generar_reporte_sanitario_texto()
+        contenido = self.reportes.lineas_reporte_sanitario()
         self.reportes.mostrar_reporte_en_ventana("Reporte Sanitario", contenido)
     
     def mostrar_estadisticas_generales(self):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        resumen = self.reportes.db.obtener_resumen()
         
         # Estadísticas generales
         estadisticas = "=== ESTADÍSTICAS GENERALES ===\n\n"
-        
-        # Contar animales
-        cursor.execute('SELECT COUNT(*) FROM animales')
-        total_animales = cursor.fetchone()[0]
-        estadisticas += f"Total de animales: {total_animales}\n"
-        
-        # Contar eventos
-        cursor.execute('SELECT COUNT(*) FROM eventos_sanitarios')
-        total_eventos = cursor.fetchone()[0]
-        estadisticas += f"Total de eventos sanitarios: {total_eventos}\n"
-        
-        # Contar producción
-        cursor.execute('SELECT COUNT(*) FROM produccion')
-        total_produccion = cursor.fetchone()[0]
-        estadisticas += f"Total de registros de producción: {total_produccion}\n"
-        
-        # Producción total
-        cursor.execute('SELECT SUM(cantidad) FROM produccion')
-        suma_produccion = cursor.fetchone()[0] or 0
-        estadisticas += f"Producción total: {suma_produccion:.2f} unidades\n"
-        
-        conn.close()
+        estadisticas += f"Total de animales: {resumen['animales']}\n"
+        estadisticas += f"Total de eventos sanitarios: {resumen['eventos']}\n"
+        estadisticas += f"Total de registros de producción: {resumen['produccion']}\n"
+        estadisticas += f"Producción total: {resumen['produccion_total']:.2f} unidades\n"
         
         self.reportes.mostrar_reporte_en_ventana("Estadísticas Generales", estadisticas)
\ No newline at end of file
@@ -0,0 +1,118 @@
+# Motor de respuestas automáticas del chat de soporte
+#
+# Las reglas (palabras clave -> respuesta, en orden de prioridad) se leen de
+# respuestas.json. Todas las palabras se compilan en una sola expresión
+# regular construida como un árbol de prefijos, así cada mensaje se recorre
+# una sola vez sin importar cuántas reglas haya. Mayúsculas y tildes no
+# importan: "Producción", "produccion" y "PRODUCCION" son lo mismo.
+
+import json
+import os
+import re
+import unicodedata
+
+RUTA_REGLAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'respuestas.json')
+PREFIJO_SISTEMA = "[Sistema] "
+
+def normalizar(texto):
+    """Minúsculas y sin tildes (la ñ queda como n)"""
+    texto = texto.casefold()
+    if texto.isascii():
+        return texto
+    return ''.join(c for c in unicodedata.normalize('NFD', texto) if not unicodedata.combining(c))
+
+def _arbol_prefijos(palabras):
+    arbol = {}
+    for palabra in palabras:
+        nodo = arbol
+        for caracter in palabra:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[''] = True  # Fin de palabra
+    return arbol
+
+def _patron_arbol(nodo):
+    """Convierte un nodo del árbol en regex; prefiere siempre la coincidencia más larga"""
+    termina = '' in nodo
+    hijos = [(c, h) for c, h in sorted(nodo.items()) if c]
+    if not hijos:
+        return ''
+
+    hojas = [re.escape(c) for c, h in hijos if len(h) == 1 and '' in h]
+    ramas = [re.escape(c) + _patron_arbol(h) for c, h in hijos if not (len(h) == 1 and '' in h)]
+    if len(hojas) == 1:
+        ramas.append(hojas[0])
+    elif hojas:
+        ramas.append('[' + ''.join(hojas) + ']')
+
+    patron = ramas[0] if len(ramas) == 1 else '(?:' + '|'.join(ramas) + ')'
+    if termina:
+        # Opcional y codicioso: primero intenta seguir hacia una palabra más larga
+        patron = '(?:' + patron + ')?'
+    return patron
+
+class ReglaRespuesta:
+    """Palabras clave y la plantilla de respuesta que activan"""
+    def __init__(self, palabras, respuesta, consulta=None):
+        self.palabras = [normalizar(p) for p in palabras if p.strip()]
+        self.respuesta = respuesta
+        self.consulta = consulta  # Nombre de una respuesta con datos (ver consultas_chat.py)
+
+class MotorRespuestas:
+    """Elige la respuesta automática de un mensaje en una sola pasada"""
+    def __init__(self, reglas, por_defecto=None, consultas=None):
+        self.reglas = list(reglas)
+        self.por_defecto = por_defecto
+        self.consultas = consultas or {}  # nombre -> función(mensaje) que retorna el texto
+        self._compilar()
+
+    @classmethod
+    def desde_archivo(cls, ruta=RUTA_REGLAS, consultas=None):
+        with open(ruta, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+        reglas = [ReglaRespuesta(r['palabras'], r['respuesta'], r.get('consulta'))
+                for r in datos['reglas']]
+        return cls(reglas, datos.get('por_defecto'), consultas)
+
+    def _compilar(self):
+        # Prioridad de cada palabra = índice de la primera regla que la contiene
+        prioridad = {}
+        for indice, regla in enumerate(self.reglas):
+            for palabra in regla.palabras:
+                prioridad.setdefault(palabra, indice)
+
+        # En cada posición la regex reporta solo la palabra más larga; las demás
+        # que empiezan ahí son prefijos suyos, así que su prioridad se hereda.
+        self._prioridad = {}
+        for palabra, indice in prioridad.items():
+            self._prioridad[palabra] = min(
+                [indice] + [prioridad[palabra[:i]] for i in range(1, len(palabra)) if palabra[:i] in prioridad])
+
+        # La búsqueda anticipada deja encontrar palabras que se solapan
+        self._patron = re.compile('(?=(' + _patron_arbol(_arbol_prefijos(prioridad)) + '))') if prioridad else None
+
+    def buscar_regla(self, mensaje):
+        """Retorna la regla de mayor prioridad que aparece en el mensaje, o None"""
+        if self._patron is None:
+            return None
+        mejor = None
+        for coincidencia in self._patron.finditer(normalizar(mensaje)):
+            indice = self._prioridad[coincidencia.group(1)]
+            if mejor is None or indice < mejor:
+                mejor = indice
+                if mejor == 0:
+                    break
+        return None if mejor is None else self.reglas[mejor]
+
+    def responder(self, mensaje, nickname, responder_siempre=False):
+        """Genera la respuesta automática para un mensaje, o None si no corresponde responder"""
+        regla = self.buscar_regla(mensaje)
+        if regla:
+            # Sin fuente de datos configurada se usa la respuesta fija de la regla
+            if regla.consulta in self.consultas:
+                texto = self.consultas[regla.consulta](mensaje)
+                if texto:
+                    return PREFIJO_SISTEMA + texto
+            return PREFIJO_SISTEMA + regla.respuesta.format(nickname=nickname)
+        if responder_siempre and self.por_defecto:
+            return PREFIJO_SISTEMA + self.por_defecto
+        return None
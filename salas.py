@@ -0,0 +1,155 @@
+# Salas del chat de soporte (por campo o por tema: sanitario, producción...)
+#
+# Cada cliente está en una sola sala a la vez; al conectarse entra a
+# 'general'. Los mensajes y avisos se difunden solo a los miembros de la sala,
+# así el costo de cada difusión depende del tamaño de la sala y no del total
+# de conectados.
+
+import re
+import threading
+from datetime import datetime
+from respuestas import normalizar
+
+SALA_GENERAL = 'general'
+PATRON_SALA = re.compile(r'^[a-z0-9_-]{1,32}$')
+AYUDA_SALAS = "Comandos: /unir <sala>, /dejar (vuelve a general), /salas, /sala"
+
+def nombre_sala(texto):
+    """Normaliza el nombre de una sala ('Producción' -> 'produccion'); ValueError si no es válido"""
+    nombre = normalizar(texto.strip()).replace(' ', '-')
+    if not PATRON_SALA.match(nombre):
+        raise ValueError("Nombre de sala inválido: use letras, números, '-' o '_' (máximo 32)")
+    return nombre
+
+def interpretar_comando(mensaje):
+    """Retorna (comando, argumento) si el mensaje es un comando '/...', o None"""
+    if not mensaje.startswith('/'):
+        return None
+    comando, _, argumento = mensaje[1:].partition(' ')
+    return comando.lower(), argumento.strip()
+
+def registrar_metricas_salas(metricas, salas):
+    """Métricas de salas comunes a ambos modos del servidor; retorna el contador del relevo"""
+    metricas.indicador('salas_activas', lambda: len(salas.salas), "Salas con miembros en este proceso")
+    return metricas.contador('mensajes_relevo_total', "Mensajes recibidos de otros procesos por el relevo")
+
+class RegistroSalas:
+    """Miembros de cada sala; cada conjunto se reemplaza al cambiar (copia al escribir)"""
+    def __init__(self):
+        self.salas = {}     # sala -> {clave del cliente: info}
+        self.remotos = {}   # otro proceso -> {sala: cantidad de miembros}
+        self._lock = threading.Lock()
+
+    def unir(self, sala, clave, info):
+        with self._lock:
+            miembros = dict(self.salas.get(sala, {}))
+            miembros[clave] = info
+            self.salas[sala] = miembros
+
+    def dejar(self, sala, clave):
+        with self._lock:
+            miembros = dict(self.salas.get(sala, {}))
+            miembros.pop(clave, None)
+            if miembros:
+                self.salas[sala] = miembros
+            else:
+                self.salas.pop(sala, None)
+
+    def miembros(self, sala):
+        """Miembros locales de la sala; se puede recorrer sin lock"""
+        return self.salas.get(sala, {})
+
+    def conteos(self):
+        """Miembros por sala en este proceso"""
+        return {sala: len(miembros) for sala, miembros in list(self.salas.items())}
+
+    def conteos_totales(self):
+        """Miembros por sala sumando los demás procesos conectados al relevo"""
+        totales = self.conteos()
+        for conteos in list(self.remotos.values()):
+            for sala, cantidad in conteos.items():
+                totales[sala] = totales.get(sala, 0) + cantidad
+        return totales
+
+class SalasServidor:
+    """Comandos de salas compartidos por ServidorSoporte y ServidorSoporteAsync.
+
+    La clase que lo usa debe tener self.salas (RegistroSalas), self.relevo
+    (ClienteRelevo o None), self.transcripcion, self.mensajes_repetidos,
+    self.mensajes_relevo, broadcast(mensaje, cliente_excluido, sala) y
+    enviar_a_cliente(clave, mensaje).
+    """
+    def entrar_a_sala(self, clave, info, sala):
+        info['sala'] = sala
+        self.salas.unir(sala, clave, info)
+        self.publicar_miembros()
+
+    def salir_de_sala(self, clave, info):
+        self.salas.dejar(info['sala'], clave)
+        self.publicar_miembros()
+
+    def cambiar_sala(self, clave, info, sala):
+        anterior = info['sala']
+        if sala == anterior:
+            self.enviar_a_cliente(clave, f"[Sistema] Ya estás en la sala {sala}")
+            return
+        self.salir_de_sala(clave, info)
+        self.difundir_en_sala(f"{info['nickname']} salió de la sala", anterior, clave)
+        self.entrar_a_sala(clave, info, sala)
+        self.enviar_a_cliente(clave, f"[Sistema] Ahora estás en la sala {sala}")
+        self.difundir_en_sala(f"{info['nickname']} entró a la sala", sala, clave)
+        self.enviar_historial(info, sala)
+
+    def enviar_historial(self, info, sala):
+        """Encola al cliente los últimos mensajes de la sala, sin esperar a la base de datos"""
+        if self.transcripcion and self.mensajes_repetidos:
+            self.transcripcion.pedir_historial(self.mensajes_repetidos, sala,
+                                            lambda tramas: self.entregar_historial(info, sala, tramas))
+
+    def entregar_historial(self, info, sala, tramas):
+        # Puede llamarse desde el hilo de la transcripción (sala leída de la base)
+        if tramas and info['conectado'] and info['sala'] == sala:
+            info['cola'].encolar(tramas)
+
+    def difundir_en_sala(self, mensaje, sala, cliente_excluido=None, chat=None):
+        """Difunde a la sala en este proceso y, si hay relevo, en los demás.
+
+        chat es (momento, nickname, texto) cuando es un mensaje de un usuario,
+        para que los demás procesos lo agreguen a su historial.
+        """
+        self.broadcast(mensaje, cliente_excluido, sala)
+        if self.relevo:
+            self.relevo.publicar(sala, mensaje, chat)
+
+    def publicar_miembros(self):
+        if self.relevo:
+            self.relevo.publicar_miembros(self.salas.conteos())
+
+    def procesar_comando(self, clave, info, comando, argumento):
+        """Atiende /unir, /dejar, /salas y /sala; retorna False si el comando no existe"""
+        if comando == 'unir':
+            try:
+                self.cambiar_sala(clave, info, nombre_sala(argumento))
+            except ValueError as e:
+                self.enviar_a_cliente(clave, f"[Sistema] {e}")
+        elif comando == 'dejar':
+            self.cambiar_sala(clave, info, SALA_GENERAL)
+        elif comando == 'salas':
+            conteos = sorted(self.salas.conteos_totales().items())
+            lista = ', '.join(f"{sala} ({cantidad})" for sala, cantidad in conteos)
+            self.enviar_a_cliente(clave, f"[Sistema] Salas: {lista or 'ninguna'}")
+        elif comando == 'sala':
+            self.enviar_a_cliente(clave, f"[Sistema] Estás en la sala {info['sala']}")
+        else:
+            self.enviar_a_cliente(clave, f"[Sistema] Comando desconocido. {AYUDA_SALAS}")
+            return False
+        return True
+
+    def recibir_de_relevo(self, sala, mensaje, chat=None):
+        """Mensaje de otro proceso: se entrega solo a los miembros locales de la sala"""
+        self.mensajes_relevo.incrementar()
+        self.broadcast(mensaje, None, sala)
+        if chat and self.transcripcion:
+            # Ya lo guardó el proceso de origen; aquí solo entra al historial en memoria
+            momento, nickname, texto = chat
+            self.transcripcion.agregar(nickname, texto, datetime.fromisoformat(momento), sala, guardar=False)
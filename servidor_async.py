@@ -0,0 +1,310 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from admin import ServidorAdmin
+from difusion import DESCONECTAR, ColaSalidaAsync, TAMANO_COLA, registrar_metricas_difusion
+from metricas import RegistroMetricas
+from protocolo import ErrorProtocolo, empaquetar, interpretar_saludo, leer_mensaje
+from relevo import ClienteRelevo
+from salas import SALA_GENERAL, RegistroSalas, SalasServidor, interpretar_comando, registrar_metricas_salas
+from servidor_soporte import (MOTOR_RESPUESTAS, mensaje_bienvenida, registrar_metricas_aceptacion,
+                            registrar_metricas_clientes, resumen_cliente)
+
+class ServidorSoporteAsync(SalasServidor):
+    """Servidor de soporte basado en asyncio: un solo hilo atiende todas las conexiones.
+
+    Mantiene la misma interfaz que ServidorSoporte (iniciar_servidor, clientes,
+    activo, detener_servidor) para poder elegir el modo desde main().
+    """
+    def __init__(self, host='localhost', port=5000, consola=True, eco_remitente=True,
+                responder_siempre=False, backlog=1024, tamano_cola=TAMANO_COLA,
+                politica_lentos=DESCONECTAR, motor_respuestas=None, transcripcion=None,
+                mensajes_repetidos=20, tiempo_saludo=5, relevo=None, puerto_admin=None):
+        self.host = host
+        self.port = port
+        self.clientes = {}          # writer -> info del cliente
+        self.activo = False
+        self.consola = consola
+        self.eco_remitente = eco_remitente
+        self.responder_siempre = responder_siempre
+        self.backlog = backlog
+        self.tamano_cola = tamano_cola
+        self.politica_lentos = politica_lentos
+        self.motor_respuestas = motor_respuestas or MOTOR_RESPUESTAS
+        self.transcripcion = transcripcion
+        self.mensajes_repetidos = mensajes_repetidos
+        self.tiempo_saludo = tiempo_saludo
+        self.direccion_relevo = relevo
+        self.relevo = None
+        self.puerto_admin = puerto_admin
+        self.admin = None
+        self.salas = RegistroSalas()
+        self.loop = None
+        self.servidor = None
+        self._hilo = None
+
+        self.metricas = RegistroMetricas()
+        self.metricas.indicador('clientes_conectados', lambda: len(self.clientes),
+                                "Clientes con el saludo completado")
+        self.metricas_difusion = registrar_metricas_difusion(
+            self.metricas, lambda: [info['cola'] for info in list(self.clientes.values())])
+        self.mensajes_recibidos = self.metricas.contador('mensajes_recibidos_total',
+                                                        "Mensajes recibidos de los clientes")
+        self.difusiones = self.metricas.contador('difusiones_total', "Mensajes difundidos")
+        self.metricas_aceptacion = registrar_metricas_aceptacion(self.metricas)
+        self.saludos_pendientes = 0
+        self.metricas.indicador('saludos_pendientes', lambda: self.saludos_pendientes,
+                                "Conexiones aceptadas que aún no saludan")
+        self.mensajes_relevo = registrar_metricas_salas(self.metricas, self.salas)
+        self.metricas_clientes = registrar_metricas_clientes(self.metricas,
+                                                            lambda: list(self.clientes.values()))
+        if transcripcion:
+            self.metricas.agregar(transcripcion.duracion)
+
+    def iniciar_servidor(self):
+        """Inicia el bucle de eventos en un hilo aparte; retorna True si se pudo abrir el puerto"""
+        listo = threading.Event()
+        error = []
+
+        def ejecutar():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self._abrir())
+            except Exception as e:
+                error.append(e)
+                listo.set()
+                return
+            listo.set()
+            self.loop.run_forever()
+            self.loop.close()
+
+        self._hilo = threading.Thread(target=ejecutar, daemon=True)
+        self._hilo.start()
+        listo.wait()
+
+        if error:
+            print(f"Error al iniciar servidor: {error[0]}")
+            return False
+
+        self.activo = True
+        if self.direccion_relevo:
+            self.relevo = ClienteRelevo(self.direccion_relevo, f"{self.host}:{self.port}",
+                                        self._desde_relevo, self.salas)
+            self.relevo.iniciar()
+        if self.puerto_admin:
+            self.admin = ServidorAdmin(self, port=self.puerto_admin)
+            self.admin.iniciar()
+        print(f" Servidor de soporte (asyncio) iniciado en {self.host}:{self.port}")
+        print(" Esperando conexiones de clientes...")
+
+        if self.consola:
+            threading.Thread(target=self.control_servidor, daemon=True).start()
+        return True
+
+    async def _abrir(self):
+        self.servidor = await asyncio.start_server(
+            self.manejar_cliente, self.host, self.port,
+            reuse_address=True, backlog=self.backlog)
+
+    async def manejar_cliente(self, reader, writer):
+        """Atiende a un cliente: nickname, bienvenida, mensajes y desconexión"""
+        direccion = writer.get_extra_info('peername')
+        inicio = time.monotonic()
+        self.metricas_aceptacion['aceptadas'].incrementar()
+        self.metricas_aceptacion['tasa'].marcar()
+        self.saludos_pendientes += 1
+        try:
+            nickname = interpretar_saludo(
+                await asyncio.wait_for(leer_mensaje(reader), self.tiempo_saludo))
+        except (ErrorProtocolo, UnicodeDecodeError) as e:
+            print(f"Saludo rechazado de {direccion}: {e}")
+            self.metricas_aceptacion['rechazados'].incrementar()
+            writer.write(empaquetar(f"[Sistema] Error: {e}"))
+            writer.close()
+            return
+        except asyncio.TimeoutError:
+            self.metricas_aceptacion['vencidos'].incrementar()
+            writer.write(empaquetar("[Sistema] Tiempo de saludo agotado"))
+            writer.close()
+            return
+        except (ConnectionError, asyncio.CancelledError):
+            # CancelledError: _cerrar cancela a quien no saludó; se termina sin
+            # propagarla para que start_server no la reporte como error
+            writer.close()
+            return
+        finally:
+            self.saludos_pendientes -= 1
+        self.metricas_aceptacion['latencia'].observar((time.monotonic() - inicio) * 1000)
+
+        cola = ColaSalidaAsync(writer, self.metricas_difusion,
+                            al_desbordar=lambda: self.desconectar_lento(writer),
+                            tamano=self.tamano_cola, politica=self.politica_lentos)
+        info = {
+            'nickname': nickname,
+            'direccion': direccion,
+            'conectado': True,
+            'cola': cola,
+            'sala': SALA_GENERAL
+        }
+        self.clientes[writer] = info
+        print(f"Nuevo cliente conectado: {direccion}")
+
+        cola.encolar(empaquetar(mensaje_bienvenida(nickname)))
+        self.enviar_historial(info, SALA_GENERAL)
+        self.entrar_a_sala(writer, info, SALA_GENERAL)
+        self.difundir_en_sala(f"{nickname} se ha unido al chat de soporte", SALA_GENERAL, writer)
+
+        try:
+            while self.activo:
+                mensaje = await leer_mensaje(reader)
+                if mensaje is None or mensaje.lower() == 'salir':
+                    break
+
+                print(f"[{nickname}]: {mensaje}")
+                self.mensajes_recibidos.incrementar()
+                self.metricas_clientes['recibidos'].marcar()
+                self.metricas_clientes['bytes'].incrementar(len(mensaje.encode('utf-8')))
+
+                comando = interpretar_comando(mensaje)
+                if comando:
+                    self.procesar_comando(writer, info, *comando)
+                    await cola.esperar_espacio()
+                    continue
+
+                sala = info['sala']
+                ahora = datetime.now()
+                chat = (ahora.isoformat(sep=' ', timespec='milliseconds'), nickname, mensaje)
+                self.difundir_en_sala(f"[{ahora.strftime('%H:%M:%S')}] {nickname}: {mensaje}", sala,
+                                    None if self.eco_remitente else writer, chat)
+                if self.transcripcion:
+                    self.transcripcion.agregar(nickname, mensaje, ahora, sala)
+
+                inicio = time.perf_counter()
+                respuesta = self.motor_respuestas.responder(mensaje, nickname, self.responder_siempre)
+                self.metricas_clientes['respuesta'].observar((time.perf_counter() - inicio) * 1000)
+                if respuesta:
+                    cola.encolar(empaquetar(respuesta))
+
+                # Contrapresión: no se lee más de quien tiene su propia cola a medio llenar
+                await cola.esperar_espacio()
+        except (ConnectionError, ErrorProtocolo, UnicodeDecodeError) as e:
+            print(f"Error con cliente {nickname}: {e}")
+        except asyncio.CancelledError:
+            pass  # Cancelada por _cerrar al detener el servidor
+        finally:
+            self.desconectar_cliente(writer)
+
+    def broadcast(self, mensaje, cliente_excluido=None, sala=None):
+        """Encola un mensaje para los clientes de una sala (o todos) sin esperar a ninguno"""
+        trama = empaquetar(mensaje)
+        momento = time.perf_counter()
+        self.difusiones.incrementar()
+        destinatarios = self.clientes if sala is None else self.salas.miembros(sala)
+        for writer, info in list(destinatarios.items()):
+            if writer is not cliente_excluido:
+                info['cola'].encolar(trama, momento)
+
+    def enviar_a_cliente(self, writer, mensaje):
+        info = self.clientes.get(writer)
+        if info:
+            info['cola'].encolar(empaquetar(mensaje))
+
+    def resumen_clientes(self):
+        return [resumen_cliente(info) for info in list(self.clientes.values())]
+
+    def expulsar(self, nickname):
+        """Desconecta a los clientes con ese nickname (desde cualquier hilo); retorna cuántos eran"""
+        writers = [w for w, info in list(self.clientes.items()) if info['nickname'] == nickname]
+        for writer in writers:
+            self.loop.call_soon_threadsafe(self.desconectar_cliente, writer)
+        return len(writers)
+
+    def entregar_historial(self, info, sala, tramas):
+        # Si la sala se leyó de la base, llega desde el hilo de la transcripción
+        if threading.current_thread() is self._hilo:
+            SalasServidor.entregar_historial(self, info, sala, tramas)
+        elif self.loop and self.activo:
+            self.loop.call_soon_threadsafe(SalasServidor.entregar_historial, self, info, sala, tramas)
+
+    def _desde_relevo(self, sala, mensaje, chat):
+        # Llega desde el hilo del relevo; las colas solo se tocan desde el bucle de eventos
+        if self.loop and self.activo:
+            self.loop.call_soon_threadsafe(self.recibir_de_relevo, sala, mensaje, chat)
+
+    def desconectar_lento(self, writer):
+        """Desconecta a un cliente cuya cola de salida se llenó"""
+        info = self.clientes.get(writer)
+        if info:
+            print(f"Cliente lento desconectado: {info['nickname']}")
+        self.desconectar_cliente(writer)
+
+    def desconectar_cliente(self, writer):
+        """Desconecta un cliente y avisa al resto"""
+        info = self.clientes.pop(writer, None)
+        if info is None:
+            return
+        info['conectado'] = False
+        info['cola'].cerrar()
+        # abort() y no close(): close() espera vaciar el buffer y un cliente lento no lo lee nunca
+        writer.transport.abort()
+        self.salir_de_sala(writer, info)
+        print(f"Cliente desconectado: {info['nickname']}")
+        self.difundir_en_sala(f"{info['nickname']} ha abandonado el chat", info['sala'])
+
+    def control_servidor(self):
+        """Permite controlar el servidor desde la consola"""
+        while self.activo:
+            try:
+                comando = input("").lower()
+            except EOFError:
+                break
+            if comando == 'salir':
+                self.detener_servidor()
+                break
+            elif comando == 'clientes':
+                clientes = self.resumen_clientes()
+                print(f"Clientes conectados: {len(clientes)}")
+                for cliente in clientes:
+                    print(f"  - {cliente['nickname']} ({cliente['direccion']}) sala {cliente['sala']}, "
+                        f"cola {cliente['cola']}")
+            elif comando == 'metricas':
+                for nombre, valor in self.metricas.instantanea().items():
+                    print(f"  {nombre}: {valor}")
+            elif comando == 'salas':
+                for sala, cantidad in sorted(self.salas.conteos_totales().items()):
+                    print(f"  {sala}: {cantidad} miembros ({len(self.salas.miembros(sala))} en este proceso)")
+            elif comando == 'help':
+                print("Comandos disponibles: salir, clientes, salas, metricas, help")
+
+    async def _cerrar(self):
+        self.servidor.close()
+        for writer in list(self.clientes):
+            self.desconectar_cliente(writer)
+        # Al cerrar los writers cada corrutina de cliente recibe fin de datos y termina sola.
+        # Las que siguen pendientes (p. ej. esperando el saludo, hasta tiempo_saludo)
+        # se cancelan y se esperan para que ninguna tarea quede viva al parar el loop.
+        tareas = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if tareas:
+            _, pendientes = await asyncio.wait(tareas, timeout=2)
+            for tarea in pendientes:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+        await self.servidor.wait_closed()
+        self.loop.stop()
+
+    def detener_servidor(self):
+        """Detiene el servidor y desconecta todos los clientes"""
+        if not self.activo:
+            return
+        print("Deteniendo servidor...")
+        self.activo = False
+        if self.relevo:
+            self.relevo.detener()
+        if self.admin:
+            self.admin.detener()
+        asyncio.run_coroutine_threadsafe(self._cerrar(), self.loop)
+        if self._hilo is not threading.current_thread():
+            self._hilo.join(timeout=5)
+        print("Servidor detenido correctamente")
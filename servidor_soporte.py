@@ -1,15 +1,121 @@
+import argparse
+import os
+import selectors
 import socket
 import threading
 import time
 from datetime import datetime
+from difusion import DESCONECTAR, ColaSalida, TAMANO_COLA, registrar_metricas_difusion
+from admin import ServidorAdmin
+from metricas import LIMITES_RAPIDOS_MS, RegistroMetricas
+from protocolo import ConexionMensajes, ErrorProtocolo, LectorMensajes, empaquetar, interpretar_saludo
+from relevo import ClienteRelevo, direccion_relevo
+from respuestas import MotorRespuestas
+from salas import SALA_GENERAL, RegistroSalas, SalasServidor, interpretar_comando, registrar_metricas_salas
 
-class ServidorSoporte:
-    def __init__(self, host='localhost', port=5000):
+# Las reglas de respuesta automática están en respuestas.json
+MOTOR_RESPUESTAS = MotorRespuestas.desde_archivo()
+
+def generar_respuesta(mensaje, nickname, responder_siempre=False):
+    """Genera la respuesta automática para un mensaje, o None si no corresponde responder"""
+    return MOTOR_RESPUESTAS.responder(mensaje, nickname, responder_siempre)
+
+def mensaje_bienvenida(nickname):
+    return f"Bienvenido {nickname}! Te has conectado al soporte del Sistema Ganadero. Escribe 'salir' para desconectarte."
+
+def registrar_metricas_aceptacion(metricas):
+    """Métricas de conexiones y saludos, comunes a ambos modos del servidor"""
+    return {
+        'aceptadas': metricas.contador('conexiones_aceptadas_total', "Conexiones aceptadas"),
+        'tasa': metricas.tasa('conexiones_por_segundo', "Conexiones aceptadas por segundo (últimos 10 s)"),
+        'latencia': metricas.histograma('saludo_latencia_ms', "Tiempo desde aceptar la conexión hasta el saludo"),
+        'rechazados': metricas.contador('saludos_rechazados_total', "Saludos inválidos o de otra versión"),
+        'vencidos': metricas.contador('saludos_vencidos_total', "Conexiones cerradas por no saludar a tiempo"),
+    }
+
+def etiqueta_cliente(info):
+    """Identifica a un cliente en las métricas: el nickname puede repetirse, la dirección no"""
+    direccion = info['direccion']
+    return f"{info['nickname']}@{direccion[0]}:{direccion[1]}" if direccion else info['nickname']
+
+def registrar_metricas_clientes(metricas, obtener_clientes):
+    """Métricas de mensajes y del proceso, comunes a ambos modos; obtener_clientes retorna las info"""
+    metricas.indicador('cola_salida_cliente',
+                    lambda: {etiqueta_cliente(info): info['cola'].profundidad() for info in obtener_clientes()},
+                    "Mensajes pendientes en la cola de cada cliente", etiqueta='cliente')
+    metricas.indicador('hilos_activos', threading.active_count, "Hilos vivos en el proceso")
+    return {
+        'recibidos': metricas.tasa('mensajes_recibidos_por_segundo',
+                                "Mensajes recibidos por segundo (últimos 10 s)"),
+        'bytes': metricas.contador('bytes_recibidos_total', "Bytes de mensajes recibidos de los clientes"),
+        'respuesta': metricas.histograma('motor_respuestas_ms', "Tiempo del motor de respuestas por mensaje",
+                                        LIMITES_RAPIDOS_MS),
+    }
+
+def resumen_cliente(info):
+    """Datos de un cliente para la consola o el endpoint de administración"""
+    direccion = info['direccion']
+    return {
+        'nickname': info['nickname'],
+        'direccion': f"{direccion[0]}:{direccion[1]}" if direccion else None,
+        'sala': info['sala'],
+        'cola': info['cola'].profundidad(),
+    }
+
+class SaludoPendiente:
+    """Conexión aceptada que todavía no envió su saludo"""
+    def __init__(self, direccion, tiempo_saludo):
+        self.direccion = direccion
+        self.lector = LectorMensajes()
+        self.inicio = time.monotonic()
+        self.limite = self.inicio + tiempo_saludo
+
+class ServidorSoporte(SalasServidor):
+    """Servidor de soporte con un hilo por cliente; los mensajes se difunden por sala"""
+    def __init__(self, host='localhost', port=5000, consola=True, eco_remitente=True,
+                responder_siempre=False, tamano_cola=TAMANO_COLA, politica_lentos=DESCONECTAR,
+                motor_respuestas=None, transcripcion=None, mensajes_repetidos=20,
+                backlog=1024, tiempo_saludo=5, relevo=None, puerto_admin=None):
         self.host = host
         self.port = port
+        # Copia al escribir: quien difunde recorre la versión actual sin tomar el lock
         self.clientes = {}
+        self._lock_clientes = threading.Lock()
         self.socket_servidor = None
+        self.selector = None
         self.activo = False
+        self.consola = consola                      # Leer comandos desde stdin
+        self.eco_remitente = eco_remitente          # Reenviar el mensaje también a quien lo escribió
+        self.responder_siempre = responder_siempre  # Responder aunque no haya palabra clave
+        self.tamano_cola = tamano_cola              # Mensajes pendientes por cliente
+        self.politica_lentos = politica_lentos      # 'desconectar' o 'descartar' al llenarse la cola
+        self.motor_respuestas = motor_respuestas or MOTOR_RESPUESTAS
+        self.transcripcion = transcripcion          # RegistroTranscripcion opcional
+        self.mensajes_repetidos = mensajes_repetidos  # Historial que recibe quien se conecta
+        self.backlog = backlog                      # Conexiones en espera que admite el sistema
+        self.tiempo_saludo = tiempo_saludo          # Segundos para enviar el saludo
+        self.direccion_relevo = relevo              # (host, puerto) del relevo entre procesos
+        self.relevo = None
+        self.puerto_admin = puerto_admin            # Puerto HTTP local para /metrics y /admin
+        self.admin = None
+        self.salas = RegistroSalas()
+
+        self.metricas = RegistroMetricas()
+        self.metricas.indicador('clientes_conectados', lambda: len(self.clientes),
+                                "Clientes con el saludo completado")
+        self.metricas_difusion = registrar_metricas_difusion(
+            self.metricas, lambda: [info['cola'] for info in self.clientes.values()])
+        self.mensajes_recibidos = self.metricas.contador('mensajes_recibidos_total',
+                                                        "Mensajes recibidos de los clientes")
+        self.difusiones = self.metricas.contador('difusiones_total', "Mensajes difundidos")
+        self.metricas_aceptacion = registrar_metricas_aceptacion(self.metricas)
+        self._saludos = {}  # socket -> SaludoPendiente (solo lo usa el hilo que acepta)
+        self.metricas.indicador('saludos_pendientes', lambda: len(self._saludos),
+                                "Conexiones aceptadas que aún no saludan")
+        self.mensajes_relevo = registrar_metricas_salas(self.metricas, self.salas)
+        self.metricas_clientes = registrar_metricas_clientes(self.metricas, lambda: self.clientes.values())
+        if transcripcion:
+            self.metricas.agregar(transcripcion.duracion)
     
     def iniciar_servidor(self):
         """Inicia el servidor de soporte"""
@@ -17,8 +123,10 @@ class ServidorSoporte:
             self.socket_servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket_servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.socket_servidor.bind((self.host, self.port))
-            self.socket_servidor.listen(5)
+            self.socket_servidor.listen(self.backlog)
             self.activo = True
+            self.iniciar_relevo()
+            self.iniciar_admin()
             
             print(f" Servidor de soporte iniciado en {self.host}:{self.port}")
             print(" Esperando conexiones de clientes...")
@@ -27,7 +135,8 @@ class ServidorSoporte:
             threading.Thread(target=self.aceptar_conexiones, daemon=True).start()
             
             # Hilo para comandos del servidor
-            threading.Thread(target=self.control_servidor, daemon=True).start()
+            if self.consola:
+                threading.Thread(target=self.control_servidor, daemon=True).start()
             
             return True
             
@@ -36,67 +145,178 @@ class ServidorSoporte:
             return False
     
     def aceptar_conexiones(self):
-        """Acepta conexiones entrantes de clientes"""
+        """Acepta conexiones y atiende los saludos de todas a la vez con un selector.
+
+        Un cliente que se conecta y no saluda ya no frena a los demás: cada
+        saludo tiene un plazo (tiempo_saludo) y vencido se cierra la conexión.
+        """
+        self.selector = selectors.DefaultSelector()
+        self.socket_servidor.setblocking(False)
+        self.selector.register(self.socket_servidor, selectors.EVENT_READ)
+        saludos = self._saludos
+
         while self.activo:
+            plazo = min((p.limite for p in saludos.values()), default=None)
+            espera = 0.5 if plazo is None else max(0, min(0.5, plazo - time.monotonic()))
+            try:
+                eventos = self.selector.select(espera)
+            except OSError:
+                break  # Se cerró el socket del servidor
+
+            for clave, _ in eventos:
+                try:
+                    if clave.fileobj is self.socket_servidor:
+                        self._aceptar_pendientes(saludos)
+                    else:
+                        self._leer_saludo(clave.fileobj, saludos)
+                except Exception as e:
+                    if self.activo:
+                        print(f"Error aceptando conexión: {e}")
+
+            ahora = time.monotonic()
+            for cliente_socket in [s for s, p in saludos.items() if p.limite <= ahora]:
+                self.metricas_aceptacion['vencidos'].incrementar()
+                self._rechazar_saludo(cliente_socket, saludos, "Tiempo de saludo agotado")
+
+        for cliente_socket in list(saludos):
+            cliente_socket.close()
+        self.selector.close()
+
+    def _aceptar_pendientes(self, saludos):
+        # Acepta toda la ráfaga de conexiones en cola, no solo una por evento
+        while True:
             try:
                 cliente_socket, direccion = self.socket_servidor.accept()
-                print(f"Nuevo cliente conectado: {direccion}")
-                
-                # Recibir nickname del cliente
-                nickname = cliente_socket.recv(1024).decode('utf-8')
-                self.clientes[cliente_socket] = {
-                    'nickname': nickname,
-                    'direccion': direccion,
-                    'conectado': True
-                }
-                
-                # Enviar mensaje de bienvenida
-                mensaje_bienvenida = f"Bienvenido {nickname}! Te has conectado al soporte del Sistema Ganadero. Escribe 'salir' para desconectarte."
-                cliente_socket.send(mensaje_bienvenida.encode('utf-8'))
-                
-                # Notificar a otros clientes
-                self.broadcast(f"{nickname} se ha unido al chat de soporte", cliente_socket)
-                
-                # Hilo para manejar mensajes del cliente
-                threading.Thread(
-                    target=self.manejar_cliente, 
-                    args=(cliente_socket,), 
-                    daemon=True
-                ).start()
-                
-            except Exception as e:
-                if self.activo:
-                    print(f"Error aceptando conexión: {e}")
+            except (BlockingIOError, InterruptedError):
+                return
+            print(f"Nuevo cliente conectado: {direccion}")
+            self.metricas_aceptacion['aceptadas'].incrementar()
+            self.metricas_aceptacion['tasa'].marcar()
+            cliente_socket.setblocking(False)
+            saludos[cliente_socket] = SaludoPendiente(direccion, self.tiempo_saludo)
+            self.selector.register(cliente_socket, selectors.EVENT_READ)
+
+    def _leer_saludo(self, cliente_socket, saludos):
+        pendiente = saludos[cliente_socket]
+        try:
+            datos = cliente_socket.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            datos = b''
+        if not datos:
+            self.selector.unregister(cliente_socket)
+            del saludos[cliente_socket]
+            cliente_socket.close()
+            return
+
+        # Recibir el saludo del cliente (versión del protocolo y nickname)
+        try:
+            mensajes = pendiente.lector.alimentar(datos)
+            if not mensajes:
+                return  # Saludo incompleto: se sigue esperando hasta el plazo
+            nickname = interpretar_saludo(mensajes[0])
+        except (ErrorProtocolo, UnicodeDecodeError) as e:
+            print(f"Saludo rechazado de {pendiente.direccion}: {e}")
+            self.metricas_aceptacion['rechazados'].incrementar()
+            self._rechazar_saludo(cliente_socket, saludos, f"Error: {e}")
+            return
+
+        self.selector.unregister(cliente_socket)
+        del saludos[cliente_socket]
+        self.metricas_aceptacion['latencia'].observar((time.monotonic() - pendiente.inicio) * 1000)
+
+        # El resto del intercambio usa el socket bloqueante en el hilo del cliente;
+        # lo que el cliente ya envió detrás del saludo no se pierde.
+        cliente_socket.setblocking(True)
+        conexion = ConexionMensajes(cliente_socket)
+        conexion.lector = pendiente.lector
+        conexion.pendientes.extend(mensajes[1:])
+        self.registrar_cliente(cliente_socket, pendiente.direccion, conexion, nickname)
+
+    def _rechazar_saludo(self, cliente_socket, saludos, motivo):
+        self.selector.unregister(cliente_socket)
+        del saludos[cliente_socket]
+        try:
+            cliente_socket.send(empaquetar(f"[Sistema] {motivo}"))
+        except OSError:
+            pass
+        cliente_socket.close()
+
+    def registrar_cliente(self, cliente_socket, direccion, conexion, nickname):
+        """Da de alta a un cliente que ya saludó y arranca su hilo de lectura"""
+        cola = ColaSalida(conexion, self.metricas_difusion,
+                        al_desbordar=lambda: self.desconectar_lento(cliente_socket),
+                        tamano=self.tamano_cola, politica=self.politica_lentos)
+        # Enviar mensaje de bienvenida
+        cola.encolar(empaquetar(mensaje_bienvenida(nickname)))
+        info = {
+            'nickname': nickname,
+            'direccion': direccion,
+            'conectado': True,
+            'conexion': conexion,
+            'cola': cola,
+            'sala': SALA_GENERAL
+        }
+        self.enviar_historial(info, SALA_GENERAL)
+        with self._lock_clientes:
+            clientes = dict(self.clientes)
+            clientes[cliente_socket] = info
+            self.clientes = clientes
+        self.entrar_a_sala(cliente_socket, info, SALA_GENERAL)
+        
+        # Notificar a los demás de su sala
+        self.difundir_en_sala(f"{nickname} se ha unido al chat de soporte", SALA_GENERAL, cliente_socket)
+        
+        # Hilo para manejar mensajes del cliente
+        threading.Thread(
+            target=self.manejar_cliente, 
+            args=(cliente_socket,), 
+            daemon=True
+        ).start()
     
     def manejar_cliente(self, cliente_socket):
         """Maneja los mensajes de un cliente específico"""
         cliente_info = self.clientes[cliente_socket]
         nickname = cliente_info['nickname']
+        conexion = cliente_info['conexion']
+        cola = cliente_info['cola']
         
         while self.activo and cliente_info['conectado']:
             try:
-                mensaje = cliente_socket.recv(1024).decode('utf-8')
+                mensaje = conexion.recibir()
                 
-                if not mensaje or mensaje.lower() == 'salir':
+                if mensaje is None or mensaje.lower() == 'salir':
                     break
                 
                 print(f"[{nickname}]: {mensaje}")
+                self.mensajes_recibidos.incrementar()
+                self.metricas_clientes['recibidos'].marcar()
+                self.metricas_clientes['bytes'].incrementar(len(mensaje.encode('utf-8')))
                 
-                # Reenviar mensaje a todos los clientes (incluyendo al remitente)
-                timestamp = datetime.now().strftime("%H:%M:%S")
+                # Comandos de salas (/unir, /dejar, /salas, /sala)
+                comando = interpretar_comando(mensaje)
+                if comando:
+                    self.procesar_comando(cliente_socket, cliente_info, *comando)
+                    continue
+                
+                # Reenviar mensaje a los clientes de su sala (incluyendo al remitente si eco_remitente)
+                sala = cliente_info['sala']
+                ahora = datetime.now()
+                timestamp = ahora.strftime("%H:%M:%S")
                 mensaje_formateado = f"[{timestamp}] {nickname}: {mensaje}"
-                self.broadcast(mensaje_formateado)
+                chat = (ahora.isoformat(sep=' ', timespec='milliseconds'), nickname, mensaje)
+                self.difundir_en_sala(mensaje_formateado, sala,
+                                    None if self.eco_remitente else cliente_socket, chat)
+                if self.transcripcion:
+                    self.transcripcion.agregar(nickname, mensaje, ahora, sala)
                 
                 # Respuesta automática del sistema
-                if "hola" in mensaje.lower() or "buenos" in mensaje.lower():
-                    respuesta = f"[Sistema] Hola {nickname}! ¿En qué puedo ayudarte con el Sistema Ganadero?"
-                    cliente_socket.send(respuesta.encode('utf-8'))
-                elif "error" in mensaje.lower():
-                    respuesta = "[Sistema] Lamentamos los errores. Por favor describe el problema en detalle."
-                    cliente_socket.send(respuesta.encode('utf-8'))
-                elif "gracias" in mensaje.lower():
-                    respuesta = f"[Sistema] De nada {nickname}! ¿Necesitas ayuda con algo más?"
-                    cliente_socket.send(respuesta.encode('utf-8'))
+                inicio = time.perf_counter()
+                respuesta = self.motor_respuestas.responder(mensaje, nickname, self.responder_siempre)
+                self.metricas_clientes['respuesta'].observar((time.perf_counter() - inicio) * 1000)
+                if respuesta:
+                    cola.encolar(empaquetar(respuesta))
                     
             except Exception as e:
                 print(f"Error con cliente {nickname}: {e}")
@@ -105,37 +325,92 @@ class ServidorSoporte:
         # Desconectar cliente
         self.desconectar_cliente(cliente_socket)
     
-    def broadcast(self, mensaje, cliente_excluido=None):
-        """Envía un mensaje a todos los clientes conectados"""
-        clientes_a_eliminar = []
-        
-        for cliente_socket, info in self.clientes.items():
-            if cliente_socket != cliente_excluido and info['conectado']:
-                try:
-                    cliente_socket.send(mensaje.encode('utf-8'))
-                except:
-                    clientes_a_eliminar.append(cliente_socket)
-        
-        # Eliminar clientes desconectados
-        for cliente in clientes_a_eliminar:
-            self.desconectar_cliente(cliente)
+    def broadcast(self, mensaje, cliente_excluido=None, sala=None):
+        """Encola un mensaje para los clientes de una sala, o de todas si sala es None.
+
+        Solo encola (no escribe en los sockets) y recorre únicamente los
+        miembros de la sala, no a todos los conectados.
+        """
+        trama = empaquetar(mensaje)  # Se codifica una sola vez para todos
+        momento = time.perf_counter()
+        self.difusiones.incrementar()
+        destinatarios = self.clientes if sala is None else self.salas.miembros(sala)
+        for cliente_socket, info in destinatarios.items():
+            if cliente_socket is not cliente_excluido and info['conectado']:
+                info['cola'].encolar(trama, momento)
+    
+    def enviar_a_cliente(self, cliente_socket, mensaje):
+        """Encola un mensaje solo para un cliente"""
+        info = self.clientes.get(cliente_socket)
+        if info:
+            info['cola'].encolar(empaquetar(mensaje))
+    
+    def iniciar_admin(self):
+        """Abre el endpoint HTTP local de métricas y administración (si se configuró)"""
+        if self.puerto_admin:
+            self.admin = ServidorAdmin(self, port=self.puerto_admin)
+            self.admin.iniciar()
+    
+    def resumen_clientes(self):
+        return [resumen_cliente(info) for info in list(self.clientes.values())]
+    
+    def expulsar(self, nickname):
+        """Desconecta a los clientes con ese nickname; retorna cuántos eran"""
+        sockets = [s for s, info in self.clientes.items() if info['nickname'] == nickname]
+        for cliente_socket in sockets:
+            self.desconectar_cliente(cliente_socket)
+        return len(sockets)
+    
+    def iniciar_relevo(self):
+        """Se conecta al relevo (si se configuró) para compartir las salas con otros procesos"""
+        if self.direccion_relevo:
+            self.relevo = ClienteRelevo(self.direccion_relevo, f"{self.host}:{self.port}",
+                                        self.recibir_de_relevo, self.salas)
+            self.relevo.iniciar()
+    
+    def desconectar_lento(self, cliente_socket):
+        """Desconecta a un cliente cuya cola de salida se llenó"""
+        info = self.clientes.get(cliente_socket)
+        if info:
+            print(f"Cliente lento desconectado: {info['nickname']}")
+        self.desconectar_cliente(cliente_socket)
     
     def desconectar_cliente(self, cliente_socket):
         """Desconecta un cliente y limpia recursos"""
-        if cliente_socket in self.clientes:
-            nickname = self.clientes[cliente_socket]['nickname']
-            self.clientes[cliente_socket]['conectado'] = False
-            
-            try:
-                cliente_socket.close()
-            except:
-                pass
-            
-            del self.clientes[cliente_socket]
-            print(f"Cliente desconectado: {nickname}")
-            
-            # Notificar a otros clientes
-            self.broadcast(f"{nickname} ha abandonado el chat")
+        with self._lock_clientes:
+            if cliente_socket not in self.clientes:
+                return
+            clientes = dict(self.clientes)
+            info = clientes.pop(cliente_socket)
+            self.clientes = clientes
+        
+        nickname = info['nickname']
+        info['conectado'] = False
+        info['cola'].cerrar()
+        self.salir_de_sala(cliente_socket, info)
+        try:
+            # shutdown despierta al hilo que está bloqueado en recv()
+            cliente_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            cliente_socket.close()
+        except:
+            pass
+        
+        print(f"Cliente desconectado: {nickname}")
+        
+        # Notificar a los demás de su sala
+        self.difundir_en_sala(f"{nickname} ha abandonado el chat", info['sala'])
+    
+    def mostrar_metricas(self):
+        for nombre, valor in self.metricas.instantanea().items():
+            print(f"  {nombre}: {valor}")
+    
+    def mostrar_salas(self):
+        for sala, cantidad in sorted(self.salas.conteos_totales().items()):
+            locales = len(self.salas.miembros(sala))
+            print(f"  {sala}: {cantidad} miembros ({locales} en este proceso)")
     
     def control_servidor(self):
         """Permite controlar el servidor desde la consola"""
@@ -146,11 +421,19 @@ class ServidorSoporte:
                     self.detener_servidor()
                     break
                 elif comando == 'clientes':
-                    print(f"Clientes conectados: {len(self.clientes)}")
-                    for info in self.clientes.values():
-                        print(f"  - {info['nickname']} ({info['direccion']})")
+                    clientes = self.resumen_clientes()
+                    print(f"Clientes conectados: {len(clientes)}")
+                    for cliente in clientes:
+                        print(f"  - {cliente['nickname']} ({cliente['direccion']}) sala {cliente['sala']}, "
+                            f"cola {cliente['cola']}")
+                elif comando == 'metricas':
+                    self.mostrar_metricas()
+                elif comando == 'salas':
+                    self.mostrar_salas()
                 elif comando == 'help':
-                    print("Comandos disponibles: salir, clientes, help")
+                    print("Comandos disponibles: salir, clientes, salas, metricas, help")
+            except EOFError:
+                break  # Sin consola (por ejemplo, ejecutado en segundo plano)
             except:
                 pass
     
@@ -162,6 +445,10 @@ class ServidorSoporte:
         # Desconectar todos los clientes
         for cliente_socket in list(self.clientes.keys()):
             self.desconectar_cliente(cliente_socket)
+        if self.relevo:
+            self.relevo.detener()
+        if self.admin:
+            self.admin.detener()
         
         # Cerrar socket del servidor
         if self.socket_servidor:
@@ -172,17 +459,63 @@ class ServidorSoporte:
         
         print("Servidor detenido correctamente")
 
+def crear_servidor(modo='hilos', **opciones):
+    """Crea el servidor en el modo pedido: 'hilos' (un hilo por cliente) o 'async' (asyncio)"""
+    if modo == 'async':
+        from servidor_async import ServidorSoporteAsync
+        return ServidorSoporteAsync(**opciones)
+    if modo == 'hilos':
+        return ServidorSoporte(**opciones)
+    raise ValueError(f"Modo de servidor no válido: {modo}")
+
 def main():
     """Función principal del servidor"""
+    parser = argparse.ArgumentParser(description="Servidor de soporte del Sistema Ganadero")
+    parser.add_argument('--modo', choices=['hilos', 'async'], default='hilos',
+                        help="hilos: un hilo por cliente; async: un solo hilo con asyncio")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--puerto', type=int, default=5000)
+    parser.add_argument('--backlog', type=int, default=1024,
+                        help="Conexiones en espera de ser aceptadas que admite el sistema")
+    parser.add_argument('--db', default='ganadero.db',
+                        help="Base de datos para responder preguntas como 'cuántos animales'")
+    parser.add_argument('--ttl', type=float, default=30,
+                        help="Segundos que se reutilizan los datos antes de volver a consultarlos")
+    parser.add_argument('--admin', type=int, metavar='PUERTO',
+                        help="Puerto local para /metrics (Prometheus) y /admin (JSON)")
+    parser.add_argument('--relevo', metavar='[HOST:]PUERTO',
+                        help="Relevo de salas para compartirlas con otros procesos (ver relevo.py)")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("SISTEMA DE SOPORTE GANADERO - SERVIDOR")
     print("=" * 50)
     
-    servidor = ServidorSoporte()
+    motor = None
+    datos_chat = None
+    transcripcion = None
+    if os.path.exists(args.db):
+        from consultas_chat import DatosChat, crear_consultas
+        from database import Database
+        from transcripcion import RegistroTranscripcion
+        db = Database(args.db)
+        datos_chat = DatosChat(db, ttl=args.ttl)
+        motor = MotorRespuestas.desde_archivo(consultas=crear_consultas(datos_chat))
+        transcripcion = RegistroTranscripcion(db)
+        print(f"Respuestas con datos y transcripción en {args.db}")
+    
+    servidor = crear_servidor(args.modo, host=args.host, port=args.puerto, motor_respuestas=motor,
+                            transcripcion=transcripcion, backlog=args.backlog,
+                            relevo=direccion_relevo(args.relevo) if args.relevo else None,
+                            puerto_admin=args.admin)
+    if datos_chat:
+        servidor.metricas.agregar(datos_chat.duracion)
     
     if servidor.iniciar_servidor():
         print("\nComandos del servidor:")
         print("   'clientes' - Ver clientes conectados")
+        print("   'salas' - Ver salas y cuántos miembros tienen")
+        print("   'metricas' - Ver métricas de difusión")
         print("   'salir' - Detener servidor")
         print("   'help' - Mostrar ayuda")
         print("\nServidor en ejecución...")
@@ -194,6 +527,8 @@ def main():
         except KeyboardInterrupt:
             print("\nInterrupción recibida...")
             servidor.detener_servidor()
+        if transcripcion:
+            transcripcion.detener()
     else:
         print("No se pudo iniciar el servidor")
 
@@ -0,0 +1,41 @@
+# AlmacenRegistros: un registro rechazado no debe cambiar el almacén
+
+from datetime import date
+import pytest
+from modelos.almacenRegistros import AlmacenRegistros
+from modelos.animal import Animal
+from modelos.eventoSanitario import EventoSanitario
+from modelos.produccion import Produccion
+
+def _estado(almacen):
+    columnas = (almacen.animal, almacen.fecha, almacen.tipo, almacen.medicamento,
+                almacen.cantidad, almacen.clase)
+    return ([c.tolist() for c in columnas], list(almacen._animales), list(almacen._textos))
+
+@pytest.mark.parametrize('produccion', [
+    Produccion('leche', 'mucha', date(2024, 5, 1)),
+    Produccion('leche', 12.5, '01/05/2024'),
+    Produccion('leche', 12.5, 20240501),
+    Produccion(7, 12.5, date(2024, 5, 1)),
+])
+def test_registro_rechazado_no_cambia_el_almacen(produccion):
+    almacen = AlmacenRegistros()
+    vaca = Animal('A1', 'bovino', 400.0, date(2020, 1, 1))
+    almacen.agregar_produccion(vaca, Produccion('leche', 20.0, date(2024, 4, 30)))
+    antes = _estado(almacen)
+
+    with pytest.raises((TypeError, ValueError)):
+        almacen.agregar_produccion(Animal('B2', 'bovino', 380.0, None), produccion)
+
+    assert _estado(almacen) == antes
+    assert len(almacen) == 1
+    assert almacen[0].animal is vaca
+
+def test_fechas_en_texto_iso():
+    almacen = AlmacenRegistros()
+    vaca = Animal('A1', 'bovino', 400.0, None)
+    almacen.agregar_evento(vaca, EventoSanitario('vacunación', '2024-05-01', 'aftosa'))
+    almacen.agregar_produccion(vaca, Produccion('leche', '18.5', '2024-05-02'))
+    assert almacen[0].evento.fecha == date(2024, 5, 1)
+    assert almacen[1].produccion.fecha == date(2024, 5, 2)
+    assert almacen[1].produccion.cantidad == 18.5
@@ -0,0 +1,45 @@
+# ClienteReconectable: sigue leyendo mientras tiene datos por enviar
+
+import socket
+import threading
+from cliente_reconectable import ClienteReconectable
+from protocolo import LectorMensajes, empaquetar_varios
+
+def test_envio_pendiente_no_traba_contra_un_servidor_que_no_lee():
+    escucha = socket.create_server(('localhost', 0))
+    puerto = escucha.getsockname()[1]
+    texto = 'x' * 1000
+    cantidad = 5000   # ~5 MB en cada sentido, mucho más que los buffers de los sockets
+    recibidos_servidor = []
+    encolados = threading.Event()
+
+    def servidor():
+        encolados.wait(5)
+        conexion, _ = escucha.accept()
+        with conexion:
+            # Escribe todo antes de leer: sin leer a la vez, el cliente y el
+            # servidor quedarían trabados cada uno en su envío
+            conexion.sendall(empaquetar_varios([texto] * cantidad))
+            lector = LectorMensajes()
+            while len(recibidos_servidor) < cantidad + 1:
+                datos = conexion.recv(65536)
+                if not datos:
+                    break
+                recibidos_servidor.extend(lector.alimentar(datos))
+
+    hilo = threading.Thread(target=servidor, daemon=True)
+    hilo.start()
+    recibidos_cliente = []
+    cliente = ClienteReconectable('localhost', puerto, 'ana', recibidos_cliente.append, tamano_buffer=cantidad)
+    try:
+        assert cliente.iniciar(esperar=5)
+        for _ in range(cantidad):
+            cliente.enviar(texto)
+        encolados.set()
+        hilo.join(10)
+        assert not hilo.is_alive()
+        assert len(recibidos_servidor) == cantidad + 1   # Saludo y mensajes
+        assert len(recibidos_cliente) == cantidad
+    finally:
+        cliente.detener(despedida=None)
+        escucha.close()
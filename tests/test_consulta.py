@@ -0,0 +1,76 @@
+# Consulta debe dar los mismos resultados, en el mismo orden, con la base de
+# datos y con el sistema en memoria (también al paginar con limitar()).
+
+from datetime import date
+import pytest
+from database import Database
+from modelos.animal import Animal
+from modelos.consulta import Consulta
+from modelos.eventoSanitario import EventoSanitario
+from modelos.sistemaGanadero import SistemaGanadero
+
+# Agregados a propósito fuera del orden por ID y por fecha
+ANIMALES = [
+    Animal('B2', 'bovino', 420.0, date(2019, 3, 1)),
+    Animal('C3', 'ovino', 55.0, date(2022, 7, 15)),
+    Animal('A1', 'bovino', 380.0, date(2020, 5, 10)),
+    Animal('D4', 'bovino', 510.0, date(2018, 1, 20)),
+]
+EVENTOS = [
+    ('B2', EventoSanitario('vacunación', date(2024, 6, 1), 'aftosa')),
+    ('C3', EventoSanitario('vacunación', date(2024, 2, 1), 'aftosa')),
+    ('A1', EventoSanitario('desparasitación', date(2024, 6, 1), 'ivermectina')),
+    ('D4', EventoSanitario('vacunación', date(2024, 6, 1), 'brucelosis')),
+    ('A1', EventoSanitario('vacunación', date(2023, 11, 5), 'aftosa')),
+]
+
+CONSULTAS = [
+    {},
+    {'especie': 'bovino'},
+    {'peso_min': 400},
+    {'nacido_desde': '2019-01-01'},
+    {'tipo': 'vacunación'},
+    {'medicamento': 'aftosa', 'especie': 'bovino'},
+    {'desde': '2024-01-01', 'hasta': '2024-06-01'},
+    {'animal_id': 'A1'},
+]
+
+@pytest.fixture
+def origenes(tmp_path):
+    db = Database(str(tmp_path / 'consulta.db'))
+    db.init_db()
+    sistema = SistemaGanadero()
+    for animal in ANIMALES:
+        db.agregar_animal(animal)
+        sistema.agregar_animal(animal)
+    for animal_id, evento in EVENTOS:
+        db.registrar_evento(animal_id, evento)
+        sistema.registrar_evento(animal_id, evento)
+    yield db, sistema
+    db.cerrar()
+
+def _animales(consulta):
+    return [animal.id for animal in consulta.buscar_animal()]
+
+def _eventos(consulta):
+    return [(r.animal.id, r.evento.tipo, r.evento.fecha, r.evento.medicamento)
+            for r in consulta.filtrar_eventos()]
+
+@pytest.mark.parametrize('criterios', CONSULTAS)
+def test_mismos_resultados_en_ambos_origenes(origenes, criterios):
+    db, sistema = origenes
+    assert _animales(Consulta(db, criterios)) == _animales(Consulta(sistema, criterios))
+    assert _eventos(Consulta(db, criterios)) == _eventos(Consulta(sistema, criterios))
+
+@pytest.mark.parametrize('limite, desplazamiento', [(1, 0), (2, 1), (2, 3), (None, 2)])
+def test_mismas_paginas_en_ambos_origenes(origenes, limite, desplazamiento):
+    db, sistema = origenes
+    en_db = Consulta(db).limitar(limite, desplazamiento)
+    en_memoria = Consulta(sistema).limitar(limite, desplazamiento)
+    assert _animales(en_db) == _animales(en_memoria)
+    assert _eventos(en_db) == _eventos(en_memoria)
+
+def test_orden_por_id_y_por_fecha(origenes):
+    _, sistema = origenes
+    assert _animales(Consulta(sistema).limitar(1)) == ['A1']
+    assert [e[0] for e in _eventos(Consulta(sistema))] == ['A1', 'C3', 'B2', 'A1', 'D4']
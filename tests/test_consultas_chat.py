@@ -0,0 +1,60 @@
+# DatosChat: cada consulta en caché con su propia clave; IDs exactos
+
+import time
+import pytest
+from database import Database
+from consultas_chat import DatosChat, responder_eventos_animal
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'chat.db'))
+    db.init_db()
+    with db.transaccion() as conexion:
+        conexion.executemany('INSERT INTO animales VALUES (?, ?, ?, ?)',
+                             [('A001', 'vaca', 400, '2020-01-01'), ('a001', 'vaca', 380, '2021-01-01')])
+        conexion.executemany('INSERT INTO eventos_sanitarios (animal_id, tipo, fecha, medicamento) VALUES (?, ?, ?, ?)',
+                             [('A001', 'vacuna', '2026-01-01', 'x'), ('A001', 'vacuna', '2026-02-01', 'x')])
+    yield db
+    db.cerrar()
+
+def _responder(datos_chat, mensaje):
+    # La primera pregunta pide el dato al hilo de fondo y no espera
+    for _ in range(500):
+        respuesta = responder_eventos_animal(datos_chat, mensaje)
+        if not respuesta.startswith('Estoy buscando'):
+            return respuesta
+        time.sleep(0.01)
+    raise AssertionError("El hilo de fondo no respondió")
+
+def test_eventos_por_id_exacto(db):
+    datos_chat = DatosChat(db)
+    try:
+        assert responder_eventos_animal(datos_chat, 'eventos del animal A001').startswith('Estoy buscando')
+        assert '2 eventos' in _responder(datos_chat, 'eventos del animal A001')
+        # Un ID que solo cambia en mayúsculas es otro animal
+        assert 'no tiene eventos' in _responder(datos_chat, 'Eventos del Animal a001')
+        assert 'No encontré' in _responder(datos_chat, 'eventos del animal B7')
+        consultas = datos_chat.consultas
+        _responder(datos_chat, 'eventos del animal A001')
+        assert datos_chat.consultas == consultas  # Dentro del ttl no se vuelve a consultar
+    finally:
+        datos_chat.detener()
+
+def test_cada_clave_vence_por_separado(db):
+    datos_chat = DatosChat(db, ttl=0.05)
+    try:
+        _responder(datos_chat, 'eventos del animal A001')
+        with db.transaccion() as conexion:
+            conexion.execute("INSERT INTO eventos_sanitarios (animal_id, tipo, fecha, medicamento) "
+                             "VALUES ('A001', 'vacuna', '2026-03-01', 'x')")
+        time.sleep(0.1)
+        # Vencido: responde con el valor anterior mientras se recalcula
+        assert '2 eventos' in responder_eventos_animal(datos_chat, 'eventos del animal A001')
+        for _ in range(500):
+            if '3 eventos' in responder_eventos_animal(datos_chat, 'eventos del animal A001'):
+                break
+            time.sleep(0.01)
+        else:
+            raise AssertionError("No se recalculó la clave vencida")
+    finally:
+        datos_chat.detener()
@@ -0,0 +1,23 @@
+# Database: caché de los contadores del tablero
+
+from database import Database
+
+def test_resumen_no_guarda_resultado_de_antes_de_una_escritura(tmp_path):
+    db = Database(str(tmp_path / 'ganadero.db'))
+    try:
+        conexion = db.get_connection()
+
+        class ConexionConEscritura:
+            # Simula otro hilo que escribe mientras se calcula el resumen
+            def execute(self, sql):
+                cursor = conexion.execute(sql)
+                with db.transaccion() as c:
+                    c.execute("INSERT INTO animales VALUES ('A1', 'vaca', 400, '2020-01-01')")
+                return cursor
+
+        db.get_connection = ConexionConEscritura
+        assert db.obtener_resumen()['animales'] == 0
+        del db.get_connection
+        assert db.obtener_resumen()['animales'] == 1
+    finally:
+        db.cerrar()
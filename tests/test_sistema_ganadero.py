@@ -0,0 +1,20 @@
+# Índices de SistemaGanadero al agregar y eliminar animales
+
+from modelos.animal import Animal
+from modelos.sistemaGanadero import SistemaGanadero
+
+def test_eliminar_animal_que_cambio_de_especie():
+    sistema = SistemaGanadero()
+    cambiado = Animal('A1', 'bovino', 300.0, None)
+    otro = Animal('A2', 'bovino', 280.0, None)
+    sistema.agregar_animal(cambiado)
+    sistema.agregar_animal(otro)
+
+    cambiado.especie = 'ovino'
+    assert sistema.eliminar_animal('A1') is cambiado
+    assert sistema.animales_por_especie('bovino') == [otro]
+    assert sistema.animales_por_especie('ovino') == []
+    assert sistema.buscar_animal('A1') is None
+
+    assert sistema.eliminar_animal('A2') is otro
+    assert sistema.consultar_datos()['por_especie'] == {}
@@ -0,0 +1,55 @@
+# RegistroTranscripcion: historial de salas leído en el hilo de fondo y caché acotada
+
+import threading
+import pytest
+from database import Database
+from transcripcion import RegistroTranscripcion
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'chat.db'))
+    db.init_db()
+    db.guardar_mensajes_chat([('2026-01-01 10:00:00.000', 'x', f's{i}', 'sanitario') for i in range(3)])
+    yield db
+    db.cerrar()
+
+def _historial(transcripcion, sala, cantidad=10):
+    listo = threading.Event()
+    resultado = []
+    def al_cargar(tramas):
+        resultado.append((tramas, threading.current_thread()))
+        listo.set()
+    transcripcion.pedir_historial(cantidad, sala, al_cargar)
+    assert listo.wait(5)
+    return resultado[0]
+
+def test_sala_nueva_se_lee_en_el_hilo_de_fondo(db):
+    transcripcion = RegistroTranscripcion(db)
+    try:
+        listo = threading.Event()
+        recibido = []
+        transcripcion.pedir_historial(10, 'sanitario', lambda tramas: (recibido.append(tramas), listo.set()))
+        transcripcion.agregar('y', 'nuevo', sala='sanitario')  # Llega mientras se lee
+        assert listo.wait(5)
+        assert [b's0' in recibido[0], b's2' in recibido[0]] == [True, True]
+        assert [fila[2] for fila in transcripcion.ultimos(sala='sanitario')] == ['s0', 's1', 's2', 'nuevo']
+
+        # Ya en memoria: se entrega enseguida en el mismo hilo
+        tramas, hilo = _historial(transcripcion, 'sanitario', 1)
+        assert hilo is threading.current_thread()
+        assert b'nuevo' in tramas and b's2' not in tramas
+    finally:
+        transcripcion.detener()
+
+def test_salas_en_memoria_acotadas(db):
+    transcripcion = RegistroTranscripcion(db, salas_en_memoria=3)
+    try:
+        for i in range(20):
+            _historial(transcripcion, f'sala{i}')
+        assert list(transcripcion._recientes) == ['sala17', 'sala18', 'sala19']
+        # Una sala descartada se vuelve a leer de la base, con lo guardado mientras tanto
+        transcripcion.agregar('y', 'nuevo', sala='sanitario')
+        tramas, _ = _historial(transcripcion, 'sanitario')
+        assert b's0' in tramas and b'nuevo' in tramas
+    finally:
+        transcripcion.detener()
@@ -0,0 +1,134 @@
+# Ejecución de tareas de base de datos fuera del hilo principal de Tkinter
+
+import queue
+import threading
+import time
+
+class TareaCancelada(Exception):
+    """Se lanza dentro de una tarea cuando el usuario la cancela"""
+
+class Tarea:
+    """Tarea enviada al trabajador; permite informar progreso y cancelarla"""
+    def __init__(self, funcion, args, kwargs, al_terminar, al_error, al_progreso):
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.al_terminar = al_terminar
+        self.al_error = al_error
+        self.al_progreso = al_progreso
+        self.cancelada = False
+        self.progreso = None
+        self._cola_resultados = None
+
+    def cancelar(self):
+        self.cancelada = True
+
+    def verificar_cancelacion(self):
+        """Llamar periódicamente desde la tarea para detenerse si fue cancelada"""
+        if self.cancelada:
+            raise TareaCancelada()
+
+    def informar_progreso(self, valor):
+        """Publica el progreso; la interfaz lo recibe en el hilo principal"""
+        self.progreso = valor
+        if self.al_progreso and self._cola_resultados is not None:
+            self._cola_resultados.put((self.al_progreso, valor))
+
+class TrabajadorFondo:
+    """Ejecuta funciones en hilos de fondo y entrega los resultados con root.after.
+
+    Cada hilo tiene su propia conexión SQLite (ver PoolConexiones), por eso el
+    valor por defecto es un solo hilo: así un generador de reporte puede leerse
+    por páginas desde tareas distintas sin cambiar de conexión.
+    """
+    def __init__(self, root, hilos=1, intervalo_ms=30, al_salir=None):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.al_salir = al_salir  # Se llama en cada hilo al detenerse (p. ej. cerrar su conexión)
+        self._tareas = queue.Queue()
+        self._resultados = queue.Queue()
+        self._activo = True
+        self._hilos = [threading.Thread(target=self._ejecutar_tareas, daemon=True)
+                    for _ in range(hilos)]
+        for hilo in self._hilos:
+            hilo.start()
+        self.root.after(self.intervalo_ms, self._entregar_resultados)
+
+    def ejecutar(self, funcion, *args, al_terminar=None, al_error=None, al_progreso=None,
+                con_tarea=False, **kwargs):
+        """Encola funcion(*args, **kwargs); con_tarea=True le pasa la Tarea como argumento 'tarea'"""
+        tarea = Tarea(funcion, args, kwargs, al_terminar, al_error, al_progreso)
+        tarea._cola_resultados = self._resultados
+        if con_tarea:
+            tarea.kwargs = dict(kwargs, tarea=tarea)
+        self._tareas.put(tarea)
+        return tarea
+
+    def _ejecutar_tareas(self):
+        try:
+            self._atender_tareas()
+        finally:
+            if self.al_salir:
+                self.al_salir()
+
+    def _atender_tareas(self):
+        while self._activo:
+            tarea = self._tareas.get()
+            if tarea is None:
+                break
+            if tarea.cancelada:
+                continue
+            try:
+                resultado = tarea.funcion(*tarea.args, **tarea.kwargs)
+            except TareaCancelada:
+                continue
+            except Exception as e:
+                if tarea.al_error:
+                    self._resultados.put((tarea.al_error, e))
+                else:
+                    print(f"Error en tarea de fondo: {e}")
+                continue
+            if tarea.al_terminar and not tarea.cancelada:
+                self._resultados.put((tarea.al_terminar, resultado))
+
+    def _entregar_resultados(self):
+        # Corre en el hilo principal: aquí sí se pueden tocar los widgets
+        try:
+            while True:
+                callback, valor = self._resultados.get_nowait()
+                try:
+                    callback(valor)
+                except Exception as e:
+                    print(f"Error procesando resultado: {e}")
+        except queue.Empty:
+            pass
+        if self._activo:
+            self.root.after(self.intervalo_ms, self._entregar_resultados)
+
+    def detener(self):
+        self._activo = False
+        for _ in self._hilos:
+            self._tareas.put(None)
+
+class MonitorBloqueos:
+    """Mide cuánto se atrasa el bucle de eventos de Tk (bloqueos del hilo principal)"""
+    def __init__(self, root, intervalo_ms=50):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.max_bloqueo_ms = 0.0
+        self.bloqueos = 0  # Latidos atrasados más de 100 ms
+        self._ultimo = time.perf_counter()
+        self.root.after(self.intervalo_ms, self._latido)
+
+    def _latido(self):
+        ahora = time.perf_counter()
+        atraso = (ahora - self._ultimo) * 1000 - self.intervalo_ms
+        if atraso > self.max_bloqueo_ms:
+            self.max_bloqueo_ms = atraso
+        if atraso > 100:
+            self.bloqueos += 1
+        self._ultimo = ahora
+        self.root.after(self.intervalo_ms, self._latido)
+
+    def reporte(self):
+        return f"Bloqueo máximo del hilo principal: {self.max_bloqueo_ms:.0f} ms ({self.bloqueos} mayores a 100 ms)"
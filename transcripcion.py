@@ -0,0 +1,163 @@
+# Transcripción persistente del chat de soporte
+#
+# Los hilos del chat solo encolan el mensaje en memoria; un hilo de fondo los
+# guarda en la tabla mensajes_chat por lotes (una transacción por lote). Los
+# últimos mensajes de cada sala se mantienen también en memoria para
+# repetirlos a quien entra sin leer la base de datos. Si una sala todavía no
+# está en memoria, la lee el mismo hilo de fondo: quien conversa nunca espera
+# a SQLite. Solo se guardan en memoria las salas usadas más recientemente.
+
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from metricas import Histograma
+from protocolo import empaquetar
+from salas import SALA_GENERAL
+
+SALAS_EN_MEMORIA = 100  # Salas con historial en memoria; se descarta la usada hace más tiempo
+
+class _CargaSala:
+    """Pedido al hilo de fondo: leer de la base los últimos mensajes de una sala"""
+    __slots__ = ('sala',)
+
+    def __init__(self, sala):
+        self.sala = sala
+
+class RegistroTranscripcion:
+    """Escribe la transcripción del chat en la base de datos sin frenar a quien conversa"""
+    def __init__(self, db, historial=50, tamano_lote=500, intervalo=0.5, salas_en_memoria=SALAS_EN_MEMORIA):
+        self.db = db
+        self.historial = historial
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo      # Espera máxima (s) antes de guardar un lote incompleto
+        self.salas_en_memoria = salas_en_memoria
+        self.guardados = 0
+        self.duracion = Histograma('db_transcripcion_lote_ms', "Tiempo de guardar un lote de la transcripción")
+        self._pendientes = queue.Queue()
+        self._recientes = OrderedDict()  # sala -> últimos mensajes, de la menos a la más usada
+        self._cargando = {}              # sala -> [(cantidad, al_cargar)] esperando la lectura
+        self._lock = threading.Lock()
+        self._hilo = threading.Thread(target=self._escribir, daemon=True)
+        self._hilo.start()
+        with self._lock:
+            self._pedir_carga(SALA_GENERAL)  # La sala a la que entra todo el mundo se lee de entrada
+
+    def _pedir_carga(self, sala):
+        # Con self._lock tomado. La sala entra
+        # vacía a la caché: lo que llegue mientras tanto se suma a lo leído.
+        self._cargando.setdefault(sala, [])
+        self._recientes[sala] = deque(maxlen=self.historial)
+        self._pendientes.put(_CargaSala(sala))
+
+    def _descartar_salas(self):
+        # Con self._lock tomado: quita las salas usadas hace más tiempo (no las que se están leyendo)
+        sobrantes = len(self._recientes) - self.salas_en_memoria
+        for sala in [s for s in self._recientes if s not in self._cargando][:max(0, sobrantes)]:
+            del self._recientes[sala]
+
+    def agregar(self, nickname, texto, momento=None, sala=SALA_GENERAL, guardar=True):
+        """Registra un mensaje; no espera a la base de datos.
+
+        Con guardar=False solo queda en memoria (mensajes que otro proceso ya guardó).
+        """
+        fila = ((momento or datetime.now()).isoformat(sep=' ', timespec='milliseconds'), nickname, texto)
+        with self._lock:
+            # Si la sala no está en memoria el mensaje solo va a la base; quien la pida lo leerá de ahí
+            recientes = self._recientes.get(sala)
+            if recientes is not None:
+                recientes.append(fila)
+                self._recientes.move_to_end(sala)
+            if guardar:
+                self._pendientes.put(fila + (sala,))
+
+    def ultimos(self, cantidad=None, sala=SALA_GENERAL):
+        """Últimos mensajes (momento, nickname, texto) de la sala que hay en memoria, en orden cronológico"""
+        with self._lock:
+            recientes = list(self._recientes.get(sala, ()))
+        return recientes if cantidad is None else recientes[-cantidad:]
+
+    def pedir_historial(self, cantidad, sala, al_cargar):
+        """Llama a al_cargar(tramas) con los últimos mensajes de la sala ya empaquetados.
+
+        Si la sala está en memoria se llama enseguida, en este hilo. Si no, se
+        llama desde el hilo de fondo después de leerla de la base de datos.
+        """
+        with self._lock:
+            if sala in self._cargando or sala not in self._recientes:
+                if sala not in self._cargando:
+                    self._pedir_carga(sala)
+                    self._descartar_salas()
+                self._cargando[sala].append((cantidad, al_cargar))
+                return
+            self._recientes.move_to_end(sala)
+            filas = list(self._recientes[sala])[-cantidad:]
+        al_cargar(tramas_historial(filas))
+
+    def _cargar_sala(self, sala):
+        # En el hilo de fondo, después de guardar todo lo encolado antes del pedido
+        try:
+            filas = self.db.ultimos_mensajes_chat(self.historial, sala)
+        except Exception as e:
+            print(f"Error leyendo el historial de la sala {sala}: {e}")
+            filas = []
+        with self._lock:
+            # Lo agregado mientras se leía todavía no estaba guardado: va después
+            recientes = deque(filas, maxlen=self.historial)
+            recientes.extend(self._recientes.get(sala, ()))
+            self._recientes[sala] = recientes
+            esperando = self._cargando.pop(sala, [])
+            self._descartar_salas()
+            filas = list(recientes)
+        for cantidad, al_cargar in esperando:
+            try:
+                al_cargar(tramas_historial(filas[-cantidad:]))
+            except Exception as e:
+                print(f"Error entregando el historial de la sala {sala}: {e}")
+
+    def _escribir(self):
+        activo = True
+        while activo:
+            lote = []
+            carga = None
+            fila = self._pendientes.get()
+            limite = time.monotonic() + self.intervalo
+            while True:
+                if fila is None:
+                    activo = False
+                    break
+                if isinstance(fila, _CargaSala):
+                    carga = fila  # Se guarda el lote primero, así la lectura lo incluye
+                    break
+                lote.append(fila)
+                if len(lote) >= self.tamano_lote:
+                    break
+                try:
+                    fila = self._pendientes.get(timeout=max(0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+            if lote:
+                try:
+                    inicio = time.perf_counter()
+                    self.db.guardar_mensajes_chat(lote)
+                    self.duracion.observar((time.perf_counter() - inicio) * 1000)
+                    self.guardados += len(lote)
+                except Exception as e:
+                    print(f"Error guardando la transcripción del chat: {e}")
+            if carga:
+                self._cargar_sala(carga.sala)
+
+    def detener(self):
+        """Guarda lo pendiente y detiene el hilo de escritura"""
+        self._pendientes.put(None)
+        self._hilo.join(timeout=5)
+
+def tramas_historial(filas):
+    """Mensajes (momento, nickname, texto) empaquetados en un solo bloque de bytes para enviar de una vez"""
+    return b''.join(empaquetar(formatear_mensaje(fila)) for fila in filas)
+
+def formatear_mensaje(fila):
+    """Mismo formato que los mensajes en vivo: [HH:MM:SS] nickname: texto"""
+    momento, nickname, texto = fila[:3]
+    return f"[{momento[11:19]}] {nickname}: {texto}"